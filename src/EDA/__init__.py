@@ -1,16 +0,0 @@
-"""
-This module contains the code for the EDA notebook.
-"""
-
-from .main import eda
-from .eda_llm import save_llm_context, generate_llm_summary, generate_llm_insights
-from .eda_network import analyze_networks, save_network_data
-
-__all__ = [
-    "eda", 
-    "save_llm_context", 
-    "generate_llm_summary", 
-    "generate_llm_insights",
-    "analyze_networks",
-    "save_network_data"
-]
@@ -0,0 +1,332 @@
+"""
+Benchmark suite for the EDA stages.
+
+Every stage runs on a synthetic dataset from `synthetic.write_dataset`
+with cold caches: a fresh frame, an empty result cache and no disk cache.
+Each stage is timed over several runs (wall and CPU time) and then run
+once more under tracemalloc for its peak Python memory. Results are saved
+per commit in BENCH_DIR so runs can be compared across commits with
+`python -m src.main bench --compare <commit>`.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .synthetic import write_dataset
+
+BENCH_DIR = "data/benchmarks"
+
+# Repository the benchmarked code belongs to, for commit lookups
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ROWS = 100_000
+DEFAULT_REPEAT = 3
+
+# A stage whose median time changes by more than this is flagged in comparisons
+REGRESSION_THRESHOLD = 0.10
+
+
+@contextmanager
+def _working_directory(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _stages() -> Dict[str, Dict[str, Any]]:
+    """
+    Benchmarked stages, in run order.
+
+    Each stage has a "run" function taking the benchmark context and, when
+    it scores text, "nltk": True so it is skipped without the NLTK corpora.
+    An optional "setup" function runs once, untimed, and returns entries
+    added to the context.
+    """
+    from .classifier import TrollClassifier
+    from .eda.eda_basic import (
+        basic_stats,
+        analyze_account_behavior,
+        analyze_cardinality,
+        analyze_categorical_features,
+        analyze_numerical_features,
+        analyze_temporal_patterns,
+    )
+    from .eda.eda_bursts import analyze_bursts
+    from .eda.eda_coordination import analyze_coordination
+    from .eda.eda_helpers import clean_text
+    from .eda.eda_llm import generate_llm_summary
+    from .eda.eda_network import analyze_networks
+    from .eda.eda_nlp import analyze_content, correlation_matrix, sentiment_analysis
+    from .features import derive_features
+    from .utils import load_data
+
+    def analysis(func):
+        return lambda context: func(context["combined"], "benchmark", plots=False)
+
+    def load(context):
+        with _working_directory(context["workdir"]):
+            load_data(use_cache=False)
+
+    return {
+        "load_data": {"run": load},
+        "derive_features": {"run": lambda context: derive_features(context["raw"])},
+        "basic_stats": {"run": lambda context: basic_stats(context["raw"], "benchmark", plots=False)},
+        "analyze_categorical_features": {"run": analysis(analyze_categorical_features)},
+        "analyze_cardinality": {"run": analysis(analyze_cardinality)},
+        "analyze_numerical_features": {"run": analysis(analyze_numerical_features)},
+        "analyze_temporal_patterns": {"run": analysis(analyze_temporal_patterns)},
+        "analyze_account_behavior": {"run": analysis(analyze_account_behavior)},
+        "analyze_bursts": {"run": analysis(analyze_bursts)},
+        "analyze_coordination": {"run": lambda context: analyze_coordination(context["combined"], "benchmark")},
+        "correlation_matrix": {"run": analysis(correlation_matrix)},
+        "analyze_content": {"run": analysis(analyze_content)},
+        "clean_text": {
+            "run": lambda context: [clean_text(text) for text in context["combined"]["content"]],
+            "nltk": True,
+        },
+        "sentiment_analysis": {"run": analysis(sentiment_analysis), "nltk": True},
+        "analyze_networks": {"run": lambda context: analyze_networks(context["combined"])},
+        "train_classifier": {"run": lambda context: TrollClassifier().fit(context["combined"])},
+        # Batch inference throughput of a trained model
+        "predict_classifier": {
+            "setup": lambda frames: {"classifier": TrollClassifier().fit(frames["combined"], epochs=1)},
+            "run": lambda context: context["classifier"].predict_proba(context["combined"]),
+        },
+        # Runs every analysis, as the headless LLM report does on a cold cache
+        "generate_llm_summary": {
+            "run": lambda context: generate_llm_summary(context["combined"]),
+            "nltk": True,
+        },
+    }
+
+
+def _fresh_context(frames: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copies of the frames, so no frame cache or cached result is reused"""
+    from .eda.eda_cache import clear_result_cache, register_dataset
+
+    clear_result_cache()
+    context = dict(frames)
+    for key in ("raw", "derived", "combined"):
+        context[key] = frames[key].copy(deep=False)
+        register_dataset(context[key], frames["sources"], f"benchmark_{key}")
+    return context
+
+
+def _measure(func: Callable, frames: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    wall, cpu = [], []
+    # Stages print their own reports; keep them out of the benchmark output
+    with redirect_stdout(StringIO()):
+        for _ in range(repeat):
+            context = _fresh_context(frames)
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            func(context)
+            wall.append(time.perf_counter() - start_wall)
+            cpu.append(time.process_time() - start_cpu)
+
+        # Memory is measured in a separate run, as tracing slows allocation down
+        context = _fresh_context(frames)
+        tracemalloc.start()
+        try:
+            func(context)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    rows = len(frames["combined"])
+    median = statistics.median(wall)
+    return {
+        "wall_seconds": {"min": min(wall), "median": median, "runs": wall},
+        "cpu_seconds": {"min": min(cpu), "median": statistics.median(cpu)},
+        "peak_memory_mb": peak / 2**20,
+        "rows_per_second": rows / median if median > 0 else None,
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "-C", REPO_ROOT, *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def current_commit() -> Dict[str, Any]:
+    """Short hash of HEAD and whether tracked files have uncommitted changes"""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": _git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(status)}
+
+
+def prepare_dataset(rows: int, seed: int = 0) -> str:
+    """
+    Write the synthetic dataset for a benchmark unless it already exists.
+
+    Returns:
+        Working directory whose data/raw holds the shard
+    """
+    workdir = os.path.abspath(os.path.join(BENCH_DIR, "work", f"{rows}_{seed}"))
+    raw_dir = os.path.join(workdir, "data", "raw")
+    if not os.path.exists(os.path.join(raw_dir, "1_derived.csv")):
+        print(f"Generating {rows} synthetic rows in {raw_dir}")
+        write_dataset(rows, seed, raw_dir)
+    return workdir
+
+
+def run_benchmarks(
+    rows: int = DEFAULT_ROWS,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    only: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Time and memory-profile the EDA stages on a synthetic dataset.
+
+    Args:
+        rows: Rows of the synthetic dataset
+        repeat: Timed runs per stage
+        seed: Seed of the synthetic dataset
+        only: Names of the stages to run (all by default)
+
+    Returns:
+        JSON-compatible report with the environment and per-stage results
+
+    Raises:
+        ValueError: If `only` names an unknown stage
+    """
+    from .eda.eda_cache import use_disk_cache
+    from .eda.eda_resources import load_resources, missing_resources
+    from .utils import load_data, shard_paths
+
+    stages = _stages()
+    unknown = sorted(set(only or []) - set(stages))
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {unknown}. Known: {list(stages)}")
+
+    # Load the corpora from the project directory before changing into the dataset's
+    nltk_missing = missing_resources()
+    if not nltk_missing:
+        load_resources()
+    use_disk_cache(False)
+
+    workdir = prepare_dataset(rows, seed)
+    with _working_directory(workdir):
+        raw_df, derived_df, combined_df = load_data(use_cache=False)
+        sources = [os.path.abspath(path) for path in shard_paths()]
+    frames = {"workdir": workdir, "sources": sources, "raw": raw_df, "derived": derived_df, "combined": combined_df}
+
+    results = {}
+    for name, stage in stages.items():
+        if only and name not in only:
+            continue
+        if stage.get("nltk") and nltk_missing:
+            results[name] = {"skipped": f"missing NLTK resources: {', '.join(nltk_missing)}"}
+            print(f"{name:<32} skipped (missing NLTK resources)")
+            continue
+        stage_frames = {**frames, **stage["setup"](frames)} if "setup" in stage else frames
+        results[name] = _measure(stage["run"], stage_frames, repeat)
+        print(f"{name:<32} {results[name]['wall_seconds']['median']:8.3f}s "
+              f"{results[name]['peak_memory_mb']:9.1f} MB")
+
+    return {
+        **current_commit(),
+        "timestamp": pd.Timestamp.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "rows": rows,
+        "seed": seed,
+        "repeat": repeat,
+        "stages": results,
+    }
+
+
+def save_results(report: Dict[str, Any]) -> str:
+    """
+    Save a benchmark report as BENCH_DIR/results/<commit>[-dirty]_<rows>.json.
+
+    Returns:
+        Path of the saved report
+    """
+    results_dir = os.path.join(BENCH_DIR, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    name = report["commit"] + ("-dirty" if report["dirty"] else "")
+    path = os.path.join(results_dir, f"{name}_{report['rows']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_results(reference: str, rows: int) -> Dict[str, Any]:
+    """
+    Load a saved report by path, or by commit for the given dataset size.
+
+    A commit's clean report is preferred over one taken with uncommitted changes.
+
+    Raises:
+        FileNotFoundError: If no report matches
+    """
+    if os.path.exists(reference):
+        candidates = [reference]
+    else:
+        commit = _git("rev-parse", "--short", reference) or reference
+        candidates = [
+            os.path.join(BENCH_DIR, "results", f"{name}_{rows}.json")
+            for name in (commit, f"{commit}-dirty")
+        ]
+    for path in candidates:
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+    raise FileNotFoundError(f"No benchmark results for {reference!r} with {rows} rows")
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare median wall times and peak memory of two reports.
+
+    Returns:
+        Dictionary of stage -> {"baseline", "current", "ratio", "memory_ratio",
+        "regression"} for the stages measured in both
+    """
+    comparison = {}
+    for name, result in current["stages"].items():
+        before = baseline["stages"].get(name, {})
+        if "wall_seconds" not in result or "wall_seconds" not in before:
+            continue
+        old, new = before["wall_seconds"]["median"], result["wall_seconds"]["median"]
+        ratio = new / old if old > 0 else None
+        comparison[name] = {
+            "baseline": old,
+            "current": new,
+            "ratio": ratio,
+            "memory_ratio": (
+                result["peak_memory_mb"] / before["peak_memory_mb"]
+                if before["peak_memory_mb"] > 0 else None
+            ),
+            "regression": ratio is not None and ratio > 1 + REGRESSION_THRESHOLD,
+        }
+    return comparison
+
+
+def print_comparison(comparison: Dict[str, Any], baseline: str) -> None:
+    """Print a comparison from `compare_results`"""
+    print(f"\n=== Compared with {baseline} ===")
+    for name, row in comparison.items():
+        flag = "  REGRESSION" if row["regression"] else ""
+        memory = f"{row['memory_ratio']:.2f}x" if row["memory_ratio"] is not None else "n/a"
+        print(f"{name:<32} {row['baseline']:8.3f}s -> {row['current']:8.3f}s "
+              f"({row['ratio']:.2f}x time, {memory} memory){flag}")
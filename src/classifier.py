@@ -0,0 +1,552 @@
+"""
+Troll-category classifier on the derived features and hashed text.
+
+`TrollClassifier` is a multinomial logistic regression predicting
+`account_category` from three groups of inputs:
+
+- the numerical account and tweet features (DENSE_FEATURES), standardized,
+  with the heavy-tailed counts log-transformed first
+- the calendar fields in CATEGORICAL_FEATURES, hashed as one token each
+- the lowercased words of `content`, hashtags and mentions included,
+  hashed into 2**HASH_BITS buckets and weighted by 1/sqrt(words)
+
+It trains with mini-batch SGD in vectorized NumPy, updating only the hash
+buckets a batch touches. Prediction encodes and scores large chunks at a
+time, and words are found and hashed over the bytes of thousands of tweets
+at once, so no Python code runs per tweet or word.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .features import DERIVED_COLUMNS, derive_features
+
+DENSE_FEATURES = [
+    "followers",
+    "following",
+    "updates",
+    "retweet",
+    "followers_to_following_ratio",
+    "count_hashtags",
+    "count_mentions",
+    "count_emojis",
+    "count_special_characters",
+    "word_count",
+    "count_links",
+    "text_length",
+    "all_words_caps",
+    "has_quote",
+    "starts_with_mention",
+    "starts_with_hashtag",
+]
+# Features passed through log1p before standardizing
+LOG_FEATURES = ["followers", "following", "updates", "followers_to_following_ratio"]
+CATEGORICAL_FEATURES = ["hour_of_day", "day_of_week"]
+
+TARGET = "account_category"
+
+HASH_BITS = 18
+
+TRAIN_EPOCHS = 5
+TRAIN_BATCH_ROWS = 512
+LEARNING_RATE = 0.5
+L2 = 1e-6
+
+# Rows encoded and scored at a time by `predict_proba`
+PREDICT_BATCH_ROWS = 100_000
+
+MODEL_PATH = "data/processed/models/classifier.npz"
+
+# Tweets whose words are hashed together; bounds the power tables of the hash
+_WORD_CHUNK_ROWS = 10_000
+
+# ASCII whitespace and NUL end words
+_WORD_SEPARATORS = np.zeros(256, dtype=bool)
+_WORD_SEPARATORS[[0, 9, 10, 11, 12, 13, 32]] = True
+
+# Odd multiplier of the word hash, and its inverse modulo 2**64
+_P = np.uint64(0x100000001B3)
+_P_INVERSE = np.uint64(pow(0x100000001B3, -1, 1 << 64))
+_POWERS = {"forward": np.ones(0, dtype=np.uint64), "inverse": np.ones(0, dtype=np.uint64)}
+
+
+def _hash_field(feature: str, values: pd.Series, hash_bits: int) -> np.ndarray:
+    """Hash bucket of every value of a numeric categorical feature, salted by its name"""
+    # Hashed as numbers, so 17 read from a CSV as 17.0 lands in the same bucket
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    salt = pd.util.hash_array(np.array([feature], dtype=object))[0]
+    buckets = pd.util.hash_array(numbers) ^ salt
+    return (buckets & np.uint64((1 << hash_bits) - 1)).astype(np.int64)
+
+
+def _powers(size: int):
+    """P**i and P**-i modulo 2**64 for i < size, grown and kept between calls"""
+    if len(_POWERS["forward"]) < size:
+        size = 1 << (size - 1).bit_length()
+        with np.errstate(over="ignore"):
+            _POWERS["forward"] = np.cumprod(np.full(size, _P, dtype=np.uint64)) * _P_INVERSE
+            _POWERS["inverse"] = np.cumprod(np.full(size, _P_INVERSE, dtype=np.uint64)) * _P
+    return _POWERS["forward"], _POWERS["inverse"]
+
+
+def _hash_word_chunk(texts, hash_bits: int):
+    """Hash buckets and rows of the words of a few thousand tweets"""
+    # One buffer for the chunk, tweets separated by NUL, which also ends words
+    data = np.frombuffer("\x00".join(texts).lower().encode("utf-8"), dtype=np.uint8)
+    separators = np.flatnonzero(data == 0)
+    if len(separators) != max(len(texts) - 1, 0):
+        # Some tweets contain NUL themselves
+        texts = [text.replace("\x00", " ") for text in texts]
+        data = np.frombuffer("\x00".join(texts).lower().encode("utf-8"), dtype=np.uint8)
+        separators = np.flatnonzero(data == 0)
+    in_word = ~_WORD_SEPARATORS[data]
+    edges = np.flatnonzero(np.diff(in_word, prepend=False, append=False))
+    starts, ends = edges[::2], edges[1::2]
+
+    # Polynomial hash of every word from prefix sums: the hash of bytes
+    # [start, end) is (prefix[end] - prefix[start]) * P**-start
+    forward, inverse = _powers(len(data))
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        np.cumsum(data * forward[:len(data)], out=prefix[1:])
+        hashes = (prefix[ends] - prefix[starts]) * inverse[starts]
+        # Mix the high bits into the low bits kept as the bucket
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= np.uint64(0xFF51AFD7ED558CCD)
+        hashes ^= hashes >> np.uint64(33)
+    rows = np.searchsorted(separators, starts)
+    return (hashes & np.uint64((1 << hash_bits) - 1)).astype(np.int64), rows
+
+
+def _hash_words(content: pd.Series, hash_bits: int):
+    """
+    Hash the lowercased whitespace-separated words of every tweet.
+
+    Words are found and hashed in NumPy over the UTF-8 bytes of many tweets
+    at once, so no Python code runs per word.
+
+    Returns:
+        Tuple of (int64 hash bucket of every word, int64 row of every word),
+        in row order
+    """
+    texts = content.fillna("").astype(str).tolist()
+    buckets, rows = [], []
+    for start in range(0, len(texts), _WORD_CHUNK_ROWS):
+        chunk_buckets, chunk_rows = _hash_word_chunk(texts[start:start + _WORD_CHUNK_ROWS], hash_bits)
+        buckets.append(chunk_buckets)
+        rows.append(chunk_rows + start)
+    if not buckets:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(buckets), np.concatenate(rows)
+
+
+def _take_rows(encoded: Dict[str, np.ndarray], rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Rows of an encoded batch, in the given order"""
+    starts = encoded["indptr"][rows]
+    lengths = encoded["indptr"][rows + 1] - starts
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    # Position of every word of the selected rows in the source arrays
+    positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+    return {
+        "dense": encoded["dense"][rows],
+        "fields": encoded["fields"][rows],
+        "norm": encoded["norm"][rows],
+        "indptr": indptr,
+        "buckets": encoded["buckets"][positions],
+    }
+
+
+def _slice_rows(encoded: Dict[str, np.ndarray], start: int, stop: int) -> Dict[str, np.ndarray]:
+    """Contiguous rows of an encoded batch, without copying"""
+    indptr = encoded["indptr"][start:stop + 1]
+    return {
+        "dense": encoded["dense"][start:stop],
+        "fields": encoded["fields"][start:stop],
+        "norm": encoded["norm"][start:stop],
+        "indptr": indptr - indptr[0],
+        "buckets": encoded["buckets"][indptr[0]:indptr[-1]],
+    }
+
+
+def with_derived_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the frame with the derived columns, deriving them if it has none"""
+    if set(DERIVED_COLUMNS) <= set(df.columns):
+        return df
+    return pd.concat([df, derive_features(df)], axis=1)
+
+
+class TrollClassifier:
+    """
+    Multinomial logistic regression over dense, categorical and hashed text features.
+
+    Args:
+        hash_bits: The hashed features share 2**hash_bits buckets
+    """
+
+    def __init__(self, hash_bits: int = HASH_BITS):
+        self.hash_bits = hash_bits
+        self.classes: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.dense_weights: Optional[np.ndarray] = None
+        self.hashed_weights: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+
+    def _dense(self, df: pd.DataFrame) -> np.ndarray:
+        dense = np.column_stack([
+            df[feature].to_numpy(dtype="float64", na_value=np.nan)
+            if feature in df.columns else np.full(len(df), np.nan)
+            for feature in DENSE_FEATURES
+        ])
+        for i, feature in enumerate(DENSE_FEATURES):
+            if feature in LOG_FEATURES:
+                with np.errstate(invalid="ignore"):
+                    dense[:, i] = np.log1p(np.clip(dense[:, i], 0, None))
+        dense[~np.isfinite(dense)] = np.nan
+        return dense
+
+    def encode(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Encode a frame with the trimmed and derived columns as model inputs.
+
+        Args:
+            df: Combined DataFrame
+
+        Returns:
+            Dictionary of arrays: "dense" standardized features (float32,
+            missing values at the mean), "fields" hash buckets of the
+            categorical features, the words' "buckets" grouped by row with
+            row offsets "indptr", and each row's word weight "norm"
+        """
+        dense = (self._dense(df) - self.mean) / self.scale
+        dense = np.nan_to_num(dense, nan=0.0).astype(np.float32)
+
+        fields = np.column_stack([
+            _hash_field(feature, df[feature] if feature in df.columns else pd.Series(np.nan, index=df.index),
+                        self.hash_bits)
+            for feature in CATEGORICAL_FEATURES
+        ])
+
+        if "content" in df.columns:
+            buckets, rows = _hash_words(df["content"], self.hash_bits)
+        else:
+            buckets, rows = np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        counts = np.bincount(rows, minlength=len(df))
+        return {
+            "dense": dense,
+            "fields": fields,
+            "norm": (1.0 / np.sqrt(np.maximum(counts, 1))).astype(np.float32),
+            "indptr": np.concatenate(([0], np.cumsum(counts))),
+            "buckets": buckets,
+        }
+
+    def _logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        logits = encoded["dense"] @ self.dense_weights + self.bias
+        for column in encoded["fields"].T:
+            logits += self.hashed_weights[column]
+
+        indptr = encoded["indptr"]
+        if indptr[-1]:
+            # Sum the weights of each row's words; rows without words add nothing
+            has_words = indptr[1:] > indptr[:-1]
+            sums = np.add.reduceat(self.hashed_weights[encoded["buckets"]], indptr[:-1][has_words], axis=0)
+            logits[has_words] += sums * encoded["norm"][has_words, None]
+        return logits
+
+    def fit(
+        self,
+        df: pd.DataFrame,
+        epochs: int = TRAIN_EPOCHS,
+        batch_rows: int = TRAIN_BATCH_ROWS,
+        learning_rate: float = LEARNING_RATE,
+        l2: float = L2,
+        seed: int = 0,
+    ) -> "TrollClassifier":
+        """
+        Train on the rows of a frame with a known account category.
+
+        Args:
+            df: Combined DataFrame with the TARGET column
+            epochs: Passes over the rows, each in a new random order
+            batch_rows: Rows per SGD step
+            learning_rate: Initial step size; epoch e uses learning_rate / sqrt(e + 1)
+            l2: L2 penalty of the weights
+            seed: Random seed of the row order
+
+        Returns:
+            self
+
+        Raises:
+            ValueError: If the frame has no labelled rows
+        """
+        df = df[df[TARGET].notna()]
+        if df.empty:
+            raise ValueError(f"No rows with a '{TARGET}' to train on")
+        self.classes, labels = np.unique(df[TARGET].astype(str).to_numpy(), return_inverse=True)
+        dense = self._dense(df)
+        self.mean = np.nanmean(dense, axis=0)
+        self.scale = np.nanstd(dense, axis=0)
+        self.mean[np.isnan(self.mean)] = 0.0
+        self.scale[~(self.scale > 0)] = 1.0
+
+        n_classes = len(self.classes)
+        self.dense_weights = np.zeros((len(DENSE_FEATURES), n_classes), dtype=np.float32)
+        self.hashed_weights = np.zeros((1 << self.hash_bits, n_classes), dtype=np.float32)
+        self.bias = np.zeros(n_classes, dtype=np.float32)
+
+        encoded = self.encode(df)
+        targets = np.eye(n_classes, dtype=np.float32)[labels]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = np.float32(learning_rate / np.sqrt(epoch + 1))
+            order = rng.permutation(len(df))
+            shuffled = _take_rows(encoded, order)
+            shuffled_targets = targets[order]
+            for start in range(0, len(df), batch_rows):
+                stop = min(start + batch_rows, len(df))
+                self._step(_slice_rows(shuffled, start, stop), shuffled_targets[start:stop], step, l2)
+        return self
+
+    def _step(self, batch: Dict[str, np.ndarray], targets: np.ndarray, step: np.float32, l2: float) -> None:
+        """One SGD step on the mean cross-entropy of a batch"""
+        probabilities = _softmax(self._logits(batch))
+        gradient = (probabilities - targets) / len(targets)
+
+        self.dense_weights -= step * (batch["dense"].T @ gradient + l2 * self.dense_weights)
+        self.bias -= step * gradient.sum(axis=0)
+
+        # Word and field buckets get the row gradient, words scaled by the row's norm
+        lengths = np.diff(batch["indptr"])
+        rows = np.repeat(np.arange(len(targets)), lengths)
+        n_fields = batch["fields"].shape[1]
+        buckets = np.concatenate([batch["buckets"], batch["fields"].ravel()])
+        updates = np.concatenate([
+            gradient[rows] * batch["norm"][rows, None],
+            np.repeat(gradient, n_fields, axis=0),
+        ])
+        touched, inverse = np.unique(buckets, return_inverse=True)
+        summed = np.zeros((len(touched), gradient.shape[1]), dtype=np.float32)
+        np.add.at(summed, inverse, updates)
+        self.hashed_weights[touched] -= step * (summed + l2 * self.hashed_weights[touched])
+
+    def predict_proba(self, df: pd.DataFrame, batch_rows: int = PREDICT_BATCH_ROWS) -> np.ndarray:
+        """
+        Class probabilities of every row, scoring `batch_rows` rows at a time.
+
+        Args:
+            df: Combined DataFrame
+            batch_rows: Rows encoded and scored at a time
+
+        Returns:
+            float32 array of shape (rows, classes), columns in `classes` order
+        """
+        if self.classes is None:
+            raise ValueError("The classifier has not been trained")
+        probabilities = np.empty((len(df), len(self.classes)), dtype=np.float32)
+        for start in range(0, len(df), batch_rows):
+            chunk = df.iloc[start:start + batch_rows]
+            probabilities[start:start + len(chunk)] = _softmax(self._logits(self.encode(chunk)))
+        return probabilities
+
+    def predict(self, df: pd.DataFrame, batch_rows: int = PREDICT_BATCH_ROWS) -> np.ndarray:
+        """Predicted account category of every row; see `predict_proba`"""
+        return self.classes[self.predict_proba(df, batch_rows).argmax(axis=1)]
+
+    def predict_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Score an iterable of frames, such as `pd.read_csv(..., chunksize=...)`.
+
+        Frames with only the trimmed columns get their derived features first.
+
+        Args:
+            chunks: Frames of tweets
+
+        Yields:
+            One frame per chunk, with the "prediction" and its "probability"
+        """
+        for chunk in chunks:
+            probabilities = self.predict_proba(with_derived_features(chunk))
+            best = probabilities.argmax(axis=1)
+            yield pd.DataFrame({
+                "prediction": self.classes[best],
+                "probability": probabilities[np.arange(len(best)), best],
+            }, index=chunk.index)
+
+    def evaluate(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Accuracy, macro F1 and per-class precision and recall on labelled rows.
+
+        Returns:
+            JSON-compatible dictionary
+        """
+        df = df[df[TARGET].notna()]
+        actual = df[TARGET].astype(str).to_numpy()
+        predicted = self.predict(df)
+        per_class = {}
+        f1_scores = []
+        for label in self.classes:
+            true_positives = int(((predicted == label) & (actual == label)).sum())
+            predicted_count = int((predicted == label).sum())
+            actual_count = int((actual == label).sum())
+            precision = true_positives / predicted_count if predicted_count else 0.0
+            recall = true_positives / actual_count if actual_count else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            if actual_count:
+                f1_scores.append(f1)
+            per_class[str(label)] = {"precision": precision, "recall": recall, "f1": f1, "support": actual_count}
+        return {
+            "rows": len(df),
+            "accuracy": float((predicted == actual).mean()) if len(df) else None,
+            "macro_f1": float(np.mean(f1_scores)) if f1_scores else None,
+            "per_class": per_class,
+        }
+
+    def save(self, path: str = MODEL_PATH) -> None:
+        """Save the trained model as an .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            hash_bits=self.hash_bits,
+            classes=self.classes.astype(str),
+            mean=self.mean,
+            scale=self.scale,
+            dense_weights=self.dense_weights,
+            hashed_weights=self.hashed_weights,
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "TrollClassifier":
+        """Load a model saved with `save`"""
+        with np.load(path) as data:
+            model = cls(int(data["hash_bits"]))
+            model.classes = data["classes"].astype(object)
+            for name in ("mean", "scale", "dense_weights", "hashed_weights", "bias"):
+                setattr(model, name, data[name])
+        return model
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exponent = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exponent / exponent.sum(axis=1, keepdims=True)
+
+
+def holdout_mask(df: pd.DataFrame, fraction: float = 0.2, seed: int = 0) -> np.ndarray:
+    """
+    Rows held out for evaluation.
+
+    With an author column, whole authors are held out, so no account is
+    both trained and evaluated on. Otherwise rows are drawn at random.
+
+    Args:
+        df: Combined DataFrame
+        fraction: Share of the rows (or authors) held out
+        seed: Random seed
+
+    Returns:
+        Boolean array aligned with the frame
+    """
+    for column in ("external_author_id", "author"):
+        if column in df.columns:
+            hashes = pd.util.hash_array(df[column].astype(str).to_numpy(dtype=object), hash_key=f"{seed:016d}")
+            return (hashes % np.uint64(10_000)) < fraction * 10_000
+    return np.random.default_rng(seed).random(len(df)) < fraction
+
+
+def throughput(
+    model: TrollClassifier, df: pd.DataFrame, repeat: int = 3, batch_rows: int = PREDICT_BATCH_ROWS
+) -> Dict[str, float]:
+    """
+    Measure the best-of-`repeat` scoring speed of a trained model.
+
+    Args:
+        model: Trained classifier
+        df: Combined DataFrame to score
+        repeat: Timed runs
+        batch_rows: Rows scored at a time
+
+    Returns:
+        Dictionary with the "rows", the "seconds" of the fastest run and its
+        "rows_per_second"
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_proba(df, batch_rows)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    return {"rows": len(df), "seconds": seconds, "rows_per_second": len(df) / seconds if seconds else None}
+
+
+def train_model(
+    epochs: int = TRAIN_EPOCHS,
+    holdout: float = 0.2,
+    seed: int = 0,
+    model_path: str = MODEL_PATH,
+    metrics_path: str = "plots/classifier_metrics.json",
+) -> Dict[str, Any]:
+    """
+    Train on the dataset without its held-out rows, evaluate on them and save the model.
+
+    Args:
+        epochs: Passes over the training rows
+        holdout: Share of the rows held out; see `holdout_mask`
+        seed: Random seed of the split and the row order
+        model_path: Path of the saved model
+        metrics_path: Path of the JSON metrics
+
+    Returns:
+        JSON-compatible metrics with the "holdout" evaluation and the
+        "throughput" of scoring the held-out rows
+    """
+    from .utils import load_data
+
+    _, _, combined_df = load_data()
+    held_out = holdout_mask(combined_df, holdout, seed)
+    start = time.perf_counter()
+    model = TrollClassifier().fit(combined_df[~held_out], epochs=epochs, seed=seed)
+    training_seconds = time.perf_counter() - start
+    model.save(model_path)
+
+    test_df = combined_df[held_out]
+    metrics = {
+        "training_rows": int((~held_out).sum()),
+        "training_seconds": training_seconds,
+        "epochs": epochs,
+        "classes": [str(label) for label in model.classes],
+        "holdout": model.evaluate(test_df),
+        "throughput": throughput(model, test_df),
+    }
+    os.makedirs(os.path.dirname(metrics_path) or ".", exist_ok=True)
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    return metrics
+
+
+def predict_file(
+    path: str, output_path: str, model_path: str = MODEL_PATH, chunk_rows: int = PREDICT_BATCH_ROWS
+) -> int:
+    """
+    Score a CSV of tweets chunk by chunk and write the predictions as CSV.
+
+    Args:
+        path: CSV with the trimmed columns, and optionally the derived ones
+        output_path: CSV with one "prediction" and "probability" per input row
+        model_path: Model saved by `train_model`
+        chunk_rows: Rows read and scored at a time
+
+    Returns:
+        Number of rows scored
+    """
+    model = TrollClassifier.load(model_path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    rows = 0
+    for i, predictions in enumerate(model.predict_chunks(pd.read_csv(path, chunksize=chunk_rows))):
+        predictions.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(predictions)
+    return rows
@@ -0,0 +1,171 @@
+"""
+Date handling for the troll tweets dataset.
+
+`publish_date` values use the fixed `M/D/YYYY HH:MM` format. They are parsed
+with a vectorized byte-level parser into int64 epoch seconds, and calendar
+fields (hour, day of week, day of month, month) are derived from the epoch
+with integer arithmetic instead of going through datetime objects.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Epoch value for missing or unparseable dates (the same bit pattern as NaT)
+MISSING_EPOCH = np.iinfo(np.int64).min
+
+SECONDS_PER_DAY = 86_400
+
+_SLASH, _SPACE, _COLON, _ZERO = ord("/"), ord(" "), ord(":"), ord("0")
+# One byte wider than the longest valid value ("12/31/2017 23:59")
+_WIDTH = 17
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (H. Hinnant's algorithm)"""
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146_097 + day_of_era - 719_468
+
+
+def _civil_from_days(days):
+    """Inverse of `_days_from_civil`, returning (year, month, day) arrays"""
+    days = days + 719_468
+    era = np.floor_divide(days, 146_097)
+    day_of_era = days - era * 146_097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36_524 - day_of_era // 146_096
+    ) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = mp + np.where(mp < 10, 3, -9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def _parse_fixed_format(raw: np.ndarray):
+    """
+    Parse `M/D/YYYY HH:MM` values held in a fixed-width bytes array.
+
+    Month, day and hour are one or two digits wide, so every separator can
+    only sit at one of two byte offsets; each is located with a single
+    gather instead of a scan over the whole row.
+
+    Returns:
+        Tuple of (epoch seconds, success mask)
+    """
+    n = len(raw)
+    flat = raw.view(np.uint8)
+    row_start = np.arange(n, dtype=np.int64) * _WIDTH
+
+    def byte_at(position):
+        return flat[row_start + np.clip(position, 0, _WIDTH - 1)]
+
+    def field(start, end, max_width):
+        value = np.zeros(n, dtype=np.int64)
+        valid = (end > start) & (end - start <= max_width)
+        for offset in range(max_width, 0, -1):
+            position = end - offset
+            inside = position >= start
+            digit = byte_at(position).astype(np.int64) - _ZERO
+            valid &= ~inside | ((digit >= 0) & (digit <= 9))
+            value = np.where(inside, value * 10 + digit, value)
+        return value, valid
+
+    slash1 = np.where(byte_at(1) == _SLASH, 1, 2)
+    slash2 = np.where(byte_at(slash1 + 2) == _SLASH, slash1 + 2, slash1 + 3)
+    space = slash2 + 5
+    colon = np.where(byte_at(space + 2) == _COLON, space + 2, space + 3)
+    end = colon + 3
+
+    ok = (byte_at(slash1) == _SLASH) & (byte_at(slash2) == _SLASH)
+    ok &= (byte_at(space) == _SPACE) & (byte_at(colon) == _COLON)
+    # The value must end right after the minutes
+    ok &= (end < _WIDTH) & (byte_at(end) == 0)
+
+    month, m_ok = field(0, slash1, 2)
+    day, d_ok = field(slash1 + 1, slash2, 2)
+    year, y_ok = field(slash2 + 1, space, 4)
+    hour, h_ok = field(space + 1, colon, 2)
+    minute, n_ok = field(colon + 1, end, 2)
+    ok &= m_ok & d_ok & y_ok & h_ok & n_ok
+    ok &= (month >= 1) & (month <= 12) & (day >= 1) & (hour <= 23) & (minute <= 59)
+
+    days = _days_from_civil(year, month, day)
+    # Reject days past the end of their month, e.g. 2/30
+    _, check_month, _ = _civil_from_days(days)
+    ok &= check_month == month
+
+    epoch = days * SECONDS_PER_DAY + hour * 3600 + minute * 60
+    return np.where(ok, epoch, MISSING_EPOCH), ok
+
+
+def parse_publish_date(series: pd.Series) -> np.ndarray:
+    """
+    Parse `publish_date` strings into int64 epoch seconds.
+
+    Values in the `M/D/YYYY HH:MM` format go through the vectorized byte
+    parser; anything else falls back to `pd.to_datetime` with coercion.
+
+    Args:
+        series: Column of date strings
+
+    Returns:
+        int64 array of epoch seconds, MISSING_EPOCH where parsing failed
+    """
+    values = series.to_numpy(dtype=object)
+    present = pd.notna(values)
+    epoch = np.full(len(values), MISSING_EPOCH, dtype=np.int64)
+    if not present.any():
+        return epoch
+
+    text = values[present]
+    try:
+        raw = text.astype(f"S{_WIDTH}")
+    except (UnicodeEncodeError, TypeError, ValueError):
+        raw = np.char.encode(text.astype(str), "ascii", "replace").astype(f"S{_WIDTH}")
+    parsed, ok = _parse_fixed_format(raw)
+    if not ok.all():
+        fallback = pd.to_datetime(pd.Series(text[~ok]), errors="coerce", format="mixed")
+        fallback_epoch = fallback.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        fallback_epoch[fallback.isna().to_numpy()] = MISSING_EPOCH
+        parsed[~ok] = fallback_epoch
+    epoch[present] = parsed
+    return epoch
+
+
+def calendar_fields(epoch: np.ndarray) -> dict:
+    """
+    Derive calendar fields from epoch seconds with integer arithmetic.
+
+    Args:
+        epoch: int64 epoch seconds, MISSING_EPOCH for missing values
+
+    Returns:
+        Dictionary of int64 arrays (-1 where the epoch is missing): hour_of_day,
+        day_of_week (0=Monday), day_of_month, month, year and month_index
+        (months since 1970-01, for grouping by month)
+    """
+    epoch = np.asarray(epoch, dtype=np.int64)
+    missing = epoch == MISSING_EPOCH
+    safe = np.where(missing, 0, epoch)
+    days = np.floor_divide(safe, SECONDS_PER_DAY)
+    year, month, day = _civil_from_days(days)
+    fields = {
+        "hour_of_day": np.floor_divide(safe, 3600) % 24,
+        # 1970-01-01 was a Thursday, i.e. day 3 with Monday as 0
+        "day_of_week": (days + 3) % 7,
+        "day_of_month": day,
+        "month": month,
+        "year": year,
+        "month_index": (year - 1970) * 12 + month - 1,
+    }
+    return {key: np.where(missing, -1, value) for key, value in fields.items()}
+
+
+def epoch_to_datetime(epoch: np.ndarray) -> pd.DatetimeIndex:
+    """Convert epoch seconds to a DatetimeIndex with NaT for missing values"""
+    return pd.DatetimeIndex(np.asarray(epoch, dtype=np.int64).view("datetime64[s]"))
@@ -0,0 +1,38 @@
+"""
+This module contains the code for the EDA notebook.
+
+Submodules are imported on first use, so importing the package stays cheap
+and the plotting and NLP stacks load only when an analysis needs them.
+"""
+
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "eda": ".main",
+    "stats": ".main",
+    "network": ".main",
+    "shards": ".main",
+    "sql": ".main",
+    "serve": ".main",
+    "ingest": ".main",
+    "save_llm_context": ".eda_llm",
+    "generate_llm_summary": ".eda_llm",
+    "generate_llm_insights": ".eda_llm",
+    "analyze_networks": ".eda_network",
+    "save_network_data": ".eda_network",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,204 @@
+"""
+Account-level profile table for EDA.
+
+`followers`, `following` and `updates` are snapshots of the posting account
+repeated on every tweet, so account analyses work from one row per account
+instead of rescanning tweets. The table is built in a single pass over the
+account identifier (split by `account_category`, so category-level totals
+stay exact even when the identifier is only `account_type`) and kept in the
+dataset cache.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..dates import MISSING_EPOCH, epoch_to_datetime
+from ..utils import read_cache, write_cache, shard_paths
+from .eda_helpers import account_key, frame_cache, publish_epoch
+from .eda_sketch import split_list_column
+
+HOUR_COLUMNS = [f"hour_{hour:02d}" for hour in range(24)]
+
+
+def _profile_keys(df: pd.DataFrame) -> List[str]:
+    """Columns that identify one profile row"""
+    key = account_key(df)
+    if key is None:
+        return ["account_category"] if "account_category" in df.columns else []
+    return [key, "account_category"] if "account_category" in df.columns else [key]
+
+
+def _profile_codes(df: pd.DataFrame, keys: List[str]):
+    """Profile row of every tweet, and the profile keys in row order"""
+    key_frame = df[keys].astype(object).fillna("Unknown")
+    return pd.factorize(pd.MultiIndex.from_frame(key_frame))
+
+
+def _median_sentiment(codes: np.ndarray, n: int, sentiment) -> np.ndarray:
+    """Median score of every profile row"""
+    scores = pd.Series(pd.Series(sentiment).to_numpy(dtype="float64", na_value=np.nan))
+    return scores.groupby(codes).median().reindex(range(n)).to_numpy(dtype=np.float32)
+
+
+def build_account_profiles(df: pd.DataFrame, sentiment: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """
+    Aggregate tweets into one row per account.
+
+    Args:
+        df: DataFrame with an account identifier column and tweet rows
+        sentiment: Score of every row; its `sentiment` column by default
+
+    Returns:
+        DataFrame indexed by the account key (and account_category) with
+        tweets, retweets, retweet_ratio, first_seen, last_seen, first and
+        last follower/following/updates snapshots, follower_growth,
+        median_sentiment, distinct_hashtags, hashtag_diversity and one
+        tweet count per hour of day
+    """
+    keys = _profile_keys(df)
+    if not keys:
+        return pd.DataFrame()
+
+    codes, uniques = _profile_codes(df, keys)
+    n = len(uniques)
+    index = pd.MultiIndex.from_tuples(list(uniques), names=keys) if len(keys) > 1 else pd.Index(
+        [value[0] for value in uniques], name=keys[0]
+    )
+    profile = {"tweets": np.bincount(codes, minlength=n).astype(np.int32)}
+
+    if "retweet" in df.columns:
+        retweets = df["retweet"].to_numpy(dtype="float64", na_value=0.0)
+        profile["retweets"] = np.bincount(codes, retweets, n).astype(np.int32)
+        profile["retweet_ratio"] = (profile["retweets"] / profile["tweets"]).astype(np.float32)
+
+    # Sorting by (account, time) once gives first and last snapshots per account
+    epoch = publish_epoch(df)
+    dated = epoch != MISSING_EPOCH
+    order = np.lexsort((np.where(dated, epoch, np.iinfo(np.int64).max), codes))
+    starts = np.searchsorted(codes[order], np.arange(n))
+    # Undated tweets sort last within their account
+    n_dated = np.bincount(codes[dated], minlength=n)
+    lasts = np.where(n_dated > 0, starts + n_dated - 1, starts + profile["tweets"] - 1)
+    profile["first_seen"] = epoch_to_datetime(epoch[order[starts]])
+    profile["last_seen"] = epoch_to_datetime(epoch[order[lasts]])
+
+    for column in ("followers", "following", "updates"):
+        if column in df.columns:
+            values = df[column].to_numpy(dtype="float64", na_value=np.nan)
+            profile[f"{column}_first"] = values[order[starts]].astype(np.float32)
+            profile[f"{column}_last"] = values[order[lasts]].astype(np.float32)
+    if "followers" in df.columns:
+        profile["follower_growth"] = profile["followers_last"] - profile["followers_first"]
+
+    if sentiment is None and "sentiment" in df.columns:
+        sentiment = df["sentiment"]
+    if sentiment is not None:
+        profile["median_sentiment"] = _median_sentiment(codes, n, sentiment)
+
+    if "hashtags" in df.columns:
+        tags = split_list_column(pd.Series(df["hashtags"].to_numpy()))
+        tag_codes = pd.factorize(tags.to_numpy())[0]
+        owner = codes[tags.index.to_numpy()]
+        n_tags = len(np.unique(tag_codes))
+        uses = np.bincount(owner, minlength=n)
+        distinct = np.bincount(np.unique(owner * n_tags + tag_codes) // max(n_tags, 1), minlength=n)
+        profile["distinct_hashtags"] = distinct.astype(np.int32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profile["hashtag_diversity"] = np.where(uses > 0, distinct / uses, np.nan).astype(np.float32)
+
+    hour = np.where(dated, np.floor_divide(epoch, 3600) % 24, 0)
+    hours = np.bincount(codes[dated] * 24 + hour[dated], minlength=n * 24).reshape(n, 24)
+    for column, counts in zip(HOUR_COLUMNS, hours.T):
+        profile[column] = counts.astype(np.int32)
+
+    return pd.DataFrame(profile, index=index)
+
+
+def with_median_sentiment(
+    df: pd.DataFrame, profiles: pd.DataFrame, sentiment: Sequence[float]
+) -> pd.DataFrame:
+    """
+    Return a copy of the frame's profiles with the median sentiment of every account.
+
+    Args:
+        df: DataFrame the profiles were built from
+        profiles: Account profile DataFrame
+        sentiment: Score of every row of `df`
+
+    Returns:
+        Account profile DataFrame
+    """
+    keys = _profile_keys(df)
+    if not keys:
+        return profiles
+    codes, _ = _profile_codes(df, keys)
+    return profiles.assign(median_sentiment=_median_sentiment(codes, len(profiles), sentiment))
+
+
+def get_account_profiles(df: pd.DataFrame, sentiment: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """
+    Return the account profile table for a DataFrame, building it once per frame.
+
+    Args:
+        df: DataFrame with tweet rows
+        sentiment: Score of every row; added to profiles without median_sentiment
+
+    Returns:
+        Account profile DataFrame
+    """
+    cache = frame_cache(df)
+    if "account_profiles" not in cache:
+        cache["account_profiles"] = build_account_profiles(df, sentiment)
+    elif sentiment is not None and "median_sentiment" not in cache["account_profiles"].columns:
+        cache["account_profiles"] = with_median_sentiment(df, cache["account_profiles"], sentiment)
+    return cache["account_profiles"]
+
+
+def load_account_profiles(df: pd.DataFrame, sentiment: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """
+    Attach the dataset's account profiles to the frame from `load_data`, via the dataset cache.
+
+    Sentiment scores passed after the profiles were built are added to the
+    profiles and the cache. Only call this with the full combined frame;
+    other frames should use `get_account_profiles`.
+
+    Args:
+        df: Combined DataFrame returned by `load_data`
+        sentiment: Score of every row; added to profiles without median_sentiment
+
+    Returns:
+        Account profile DataFrame
+    """
+    sources = shard_paths()
+    cache = frame_cache(df)
+    profiles = cache.get("account_profiles")
+    if profiles is None:
+        profiles = read_cache("account_profiles", sources)
+    if profiles is None:
+        profiles = build_account_profiles(df, sentiment)
+        write_cache("account_profiles", profiles, sources)
+    elif sentiment is not None and "median_sentiment" not in profiles.columns:
+        profiles = with_median_sentiment(df, profiles, sentiment)
+        write_cache("account_profiles", profiles, sources)
+    # Replaced rather than modified, so stages reading the profiles are unaffected
+    cache["account_profiles"] = profiles
+    return profiles
+
+
+def category_totals(profiles: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum tweet and retweet counts of the account profiles by account_category.
+
+    Args:
+        profiles: Account profile DataFrame
+
+    Returns:
+        DataFrame indexed by account_category with tweets, retweets and retweet_ratio
+    """
+    columns = [column for column in ("tweets", "retweets") if column in profiles.columns]
+    totals = profiles[columns].groupby(level="account_category").sum()
+    if "retweets" in totals.columns:
+        totals["retweet_ratio"] = totals["retweets"] / totals["tweets"]
+    return totals
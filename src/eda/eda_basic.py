@@ -1,109 +1,190 @@
 """Basic EDA functions"""
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
+import numpy as np
+from ..dates import calendar_fields
+from .eda_accounts import category_totals, get_account_profiles
+from .eda_cache import run_analysis
+from .eda_figures import figure, histogram_data, box_data
+from .eda_groupby import get_group_index, group_aggregate
+from .eda_helpers import account_key, publish_epoch
+from .eda_outliers import numeric_block, iqr_outliers, grouped_iqr_outliers, outlier_table
+from .eda_profile import profile_columns, profile_frame
+from .eda_render import render_figures
+from .eda_rollup import get_rollup
+from .eda_sketch import distinct_count, distinct_counts_by_group, split_list_column
 
-def basic_stats(df, name):
+# Columns holding comma-separated entities extracted from the tweet text
+LIST_COLUMNS = ["hashtags", "mentions"]
+
+CATEGORICAL_FEATURES = ["region", "language", "account_type", "account_category"]
+
+NUMERICAL_FEATURES = [
+    "following",
+    "followers",
+    "updates",
+    "followers_to_following_ratio",
+    "count_hashtags",
+    "count_mentions",
+    "count_emojis",
+    "word_count",
+    "text_length",
+]
+
+def basic_stats(df, name, plots=True):
     """
     Print basic statistics about the dataset and return them in JSON-compatible format.
     
     Args:
         df: DataFrame to analyze
         name: Name prefix for output files
+        plots: Save the descriptive statistics table
         
     Returns:
         Dictionary with basic statistics in JSON-compatible format
     """
+    result, figures = run_analysis(compute_basic_stats, df)
+
     print(f"\n=== Basic Statistics for {name} ===")
     print(f"Shape: {df.shape}")
     print("\nMissing values:")
-    print(df.isnull().sum())
+    print(pd.Series(result["missing_values"]))
     print("\nData types:")
-    print(df.dtypes)
+    print(pd.Series(result["data_types"]))
+
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_basic_stats(df):
+    """
+    Compute basic statistics without drawing or writing anything.
+
+    Args:
+        df: DataFrame to analyze
 
-    # Save descriptive statistics to CSV
-    desc_stats = df.describe(include="all").T
-    desc_stats.to_csv(f"plots/{name}_descriptive_stats.csv")
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    profile = profile_columns(df)
+
+    # Descriptive statistics table, saved as CSV when rendered
+    figures = [figure("table", "descriptive_stats", table=profile_frame(profile))]
     
     # Create a JSON-compatible result
     result = {
-        "shape": {"rows": int(df.shape[0]), "columns": int(df.shape[1])},
-        "missing_values": {col: int(df[col].isnull().sum()) for col in df.columns},
-        "data_types": {col: str(df[col].dtype) for col in df.columns},
+        "shape": {"rows": int(df.shape[0]), "columns": len(profile)},
+        "missing_values": {col: stats["missing"] for col, stats in profile.items()},
+        "data_types": {col: stats["dtype"] for col, stats in profile.items()},
         "descriptive_stats": {}
     }
     
     # Add descriptive statistics
-    for col in df.columns:
-        col_stats = {}
-        
+    for col, stats in profile.items():
         # Numeric columns
-        if pd.api.types.is_numeric_dtype(df[col]):
+        if stats["kind"] == "numeric":
             col_stats = {
-                "count": int(df[col].count()),
-                "mean": float(df[col].mean()) if not pd.isna(df[col].mean()) else None,
-                "std": float(df[col].std()) if not pd.isna(df[col].std()) else None,
-                "min": float(df[col].min()) if not pd.isna(df[col].min()) else None,
-                "25%": float(df[col].quantile(0.25)) if not pd.isna(df[col].quantile(0.25)) else None,
-                "50%": float(df[col].quantile(0.5)) if not pd.isna(df[col].quantile(0.5)) else None,
-                "75%": float(df[col].quantile(0.75)) if not pd.isna(df[col].quantile(0.75)) else None,
-                "max": float(df[col].max()) if not pd.isna(df[col].max()) else None
+                "count": stats["count"],
+                "mean": stats["mean"],
+                "std": stats["std"],
+                "min": stats["min"],
+                "25%": stats["25%"],
+                "50%": stats["50%"],
+                "75%": stats["75%"],
+                "max": stats["max"]
             }
         
         # Categorical columns
         else:
             col_stats = {
-                "count": int(df[col].count()),
-                "unique": int(df[col].nunique()),
-                "top_value": str(df[col].value_counts().index[0]) if not df[col].value_counts().empty else None,
-                "top_count": int(df[col].value_counts().iloc[0]) if not df[col].value_counts().empty else None
+                "count": stats["count"],
+                "unique": stats["unique"],
+                "top_value": str(stats["top"]) if stats["top_count"] is not None else None,
+                "top_count": stats["top_count"]
             }
         
         result["descriptive_stats"][col] = col_stats
     
-    return result
+    return result, figures
 
 
-def analyze_categorical_features(df, name):
+def analyze_categorical_features(df, name, plots=True):
     """
     Analyze categorical features like region, language, account_type.
     
     Args:
         df: DataFrame to analyze
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with categorical feature analysis in JSON-compatible format
     """
-    categorical_features = ["region", "language", "account_type", "account_category"]
-    
+    result, figures = run_analysis(compute_categorical_features, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_categorical_features(df):
+    """
+    Compute categorical feature statistics and their figure specs.
+
+    Args:
+        df: DataFrame to analyze
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    counts = {
+        feature: get_group_index(df, feature).size()
+        for feature in CATEGORICAL_FEATURES
+        if feature in df.columns
+    }
+    return summarize_categorical_counts(counts)
+
+
+def summarize_categorical_counts(counts):
+    """
+    Report categorical feature statistics from value counts.
+
+    Counts may come from one frame or be summed over shards.
+
+    Args:
+        counts: Dictionary mapping features to Series of counts indexed by
+            value in sorted order
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     # Initialize result dictionary
     result = {"categorical_features": {}}
+    figures = []
 
-    for feature in categorical_features:
-        if feature in df.columns and not df[feature].dropna().empty:
-            # Generate visualization
-            plt.figure(figsize=(12, 6))
-            counts = df[feature].value_counts().head(15)
-            counts.plot(kind="bar")
-            plt.title(f'Top 15 {feature.replace("_", " ").title()} Distribution')
-            plt.xticks(rotation=45, ha="right")
-            plt.tight_layout()
-            plt.savefig(f"plots/{name}_{feature}_distribution.png")
-            plt.close()
+    for feature in CATEGORICAL_FEATURES:
+        if feature in counts and counts[feature].sum() > 0:
+            value_counts = counts[feature].sort_values(ascending=False, kind="stable")
+            top_counts = value_counts.head(15)
+            figures.append(figure(
+                "bar", f"{feature}_distribution",
+                labels=[str(label) for label in top_counts.index],
+                values=top_counts.tolist(),
+                title=f'Top 15 {feature.replace("_", " ").title()} Distribution',
+                xlabel=feature,
+                rotation=45, ha="right",
+            ))
             
             # Add feature data to result
-            value_counts = df[feature].value_counts()
             total_count = value_counts.sum()
             
             # Store top 15 categories and their statistics
             feature_data = {
-                "unique_values": int(df[feature].nunique()),
+                "unique_values": int(len(value_counts)),
                 "top_categories": {}
             }
             
-            for category, count in value_counts.head(15).items():
+            for category, count in top_counts.items():
                 feature_data["top_categories"][str(category)] = {
                     "count": int(count),
                     "percentage": float(count / total_count * 100)
@@ -113,211 +194,456 @@ def analyze_categorical_features(df, name):
         else:
             print(f"Skipping {feature} as data is empty.")
     
+    return result, figures
+
+
+def analyze_cardinality(df, name, exact=None, plots=True):
+    """
+    Count distinct values of high-cardinality columns and entities.
+
+    Small columns are counted exactly; large ones use HyperLogLog counters,
+    whose registers can be merged across shards.
+    
+    Args:
+        df: DataFrame to analyze
+        name: Name prefix for output files
+        exact: Force exact (True) or approximate (False) counting for all columns
+        plots: Render the figures (this analysis has none)
+        
+    Returns:
+        Dictionary with distinct counts in JSON-compatible format
+    """
+    result, figures = run_analysis(compute_cardinality, df, exact=exact)
+    if plots:
+        render_figures(figures, name)
     return result
 
 
-def analyze_numerical_features(df, name):
+def compute_cardinality(df, exact=None):
+    """
+    Compute distinct counts; see `analyze_cardinality`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    result = {"distinct_counts": {}}
+
+    for column in ["content", "region", "language", "account_type", "account_category"]:
+        if column in df.columns:
+            result["distinct_counts"][column] = distinct_count(df[column], exact=exact)
+
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            result["distinct_counts"][column] = distinct_count(
+                split_list_column(df[column]), exact=exact
+            )
+
+    # Distinct hashtags per account category per month
+    month = month_key(df)
+    if "hashtags" in df.columns and "account_category" in df.columns and month is not None:
+        counter = distinct_counts_by_group(
+            df, "hashtags", ["account_category", month], list_column=True
+        )
+        by_category = {}
+        for (category, period), count in sorted(counter.counts().items()):
+            by_category.setdefault(str(category), {})[str(period)] = int(count)
+        result["distinct_hashtags_by_category_month"] = by_category
+
+    return result, []
+
+
+def month_key(df):
+    """Return a YYYY-MM key per row, or None if the frame has no dates"""
+    if "publish_date" not in df.columns:
+        return None
+    month_index = calendar_fields(publish_epoch(df))["month_index"]
+    # Format each distinct month once and broadcast the labels back to rows
+    months, inverse = np.unique(month_index, return_inverse=True)
+    labels = np.array(
+        [f"{1970 + m // 12:04d}-{m % 12 + 1:02d}" if m >= 0 else None for m in months],
+        dtype=object,
+    )
+    return labels[inverse]
+
+
+def analyze_numerical_features(df, name, plots=True):
     """
     Analyze numerical features with histograms and boxplots.
     
     Args:
         df: DataFrame to analyze
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with numerical feature analysis in JSON-compatible format
     """
-    numerical_features = [
-        "following",
-        "followers",
-        "updates",
-        "followers_to_following_ratio",
-        "count_hashtags",
-        "count_mentions",
-        "count_emojis",
-        "word_count",
-        "text_length",
-    ]
-    
+    result, figures = run_analysis(compute_numerical_features, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_numerical_features(df):
+    """
+    Compute numerical feature statistics, outliers and binned figure data.
+
+    Args:
+        df: DataFrame to analyze
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     # Initialize result dictionary
     result = {"numerical_features": {}}
+    figures = []
 
-    for feature in numerical_features:
-        if feature in df.columns and not df[feature].dropna().empty:
-            # Generate visualizations
-            plt.figure(figsize=(12, 5))
+    features = [feature for feature in NUMERICAL_FEATURES if feature in df.columns]
+    profile = profile_columns(df, features)
+    features = [feature for feature in features if profile[feature]["count"] > 0]
 
-            # Histogram
-            plt.subplot(1, 2, 1)
-            sns.histplot(df[feature].dropna(), kde=True)
-            plt.title(f'Distribution of {feature.replace("_", " ").title()}')
+    # Count outliers for all features at once, reusing the profiled quartiles
+    block = numeric_block(df, features)
+    outliers = outlier_table(features, iqr_outliers(
+        block,
+        q1=[profile[feature]["25%"] for feature in features],
+        q3=[profile[feature]["75%"] for feature in features],
+    ))
 
-            # Boxplot
-            plt.subplot(1, 2, 2)
-            sns.boxplot(x=df[feature].dropna())
-            plt.title(f'Boxplot of {feature.replace("_", " ").title()}')
+    for column, feature in enumerate(features):
+        stats = profile[feature]
 
-            plt.tight_layout()
-            plt.savefig(f"plots/{name}_{feature}_analysis.png")
-            plt.close()
-            
-            # Add feature statistics to result
-            feature_data = {
-                "count": int(df[feature].count()),
-                "mean": float(df[feature].mean()) if not pd.isna(df[feature].mean()) else None,
-                "std": float(df[feature].std()) if not pd.isna(df[feature].std()) else None,
-                "min": float(df[feature].min()) if not pd.isna(df[feature].min()) else None,
-                "25%": float(df[feature].quantile(0.25)) if not pd.isna(df[feature].quantile(0.25)) else None,
-                "median": float(df[feature].median()) if not pd.isna(df[feature].median()) else None,
-                "75%": float(df[feature].quantile(0.75)) if not pd.isna(df[feature].quantile(0.75)) else None,
-                "max": float(df[feature].max()) if not pd.isna(df[feature].max()) else None
-            }
-            
-            # Check for outliers using IQR method
-            q1 = df[feature].quantile(0.25)
-            q3 = df[feature].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            outliers = df[(df[feature] < lower_bound) | (df[feature] > upper_bound)][feature]
-            
-            feature_data["outliers"] = {
-                "count": int(len(outliers)),
-                "percentage": float(len(outliers) / df[feature].count() * 100) if df[feature].count() > 0 else 0,
-                "lower_bound": float(lower_bound),
-                "upper_bound": float(upper_bound)
-            }
-            
-            result["numerical_features"][feature] = feature_data
+        # Histogram and boxplot, from binned data and box statistics
+        title = feature.replace("_", " ").title()
+        figures.append(figure(
+            "hist_box", f"{feature}_analysis",
+            hist=histogram_data(block[:, column], kde=True),
+            box=box_data(block[:, column]),
+            titles=[f"Distribution of {title}", f"Boxplot of {title}"],
+            figsize=(12, 5),
+        ))
+        
+        # Add feature statistics to result
+        feature_data = {
+            "count": stats["count"],
+            "mean": stats["mean"],
+            "std": stats["std"],
+            "min": stats["min"],
+            "25%": stats["25%"],
+            "median": stats["50%"],
+            "75%": stats["75%"],
+            "max": stats["max"]
+        }
+        
+        # Outliers using the IQR method
+        feature_data["outliers"] = outliers[feature]
+        
+        result["numerical_features"][feature] = feature_data
+
+    # Outliers against bounds computed separately for each account category
+    if features and "account_category" in df.columns:
+        result["outliers_by_category"] = {
+            str(category): outlier_table(features, category_outliers)
+            for category, category_outliers in grouped_iqr_outliers(
+                block, df["account_category"]
+            ).items()
+        }
     
+    return result, figures
+
+
+def summarize_numerical_sketches(sketches, category_sketches=None):
+    """
+    Report numerical feature statistics from merged quantile sketches.
+
+    This is the streaming/distributed counterpart of `analyze_numerical_features`:
+    each shard or chunk builds sketches with `build_quantile_sketches`, and the
+    merged sketches yield approximate quartiles, IQR bounds and outlier counts.
+    
+    Args:
+        sketches: Dictionary mapping feature names to QuantileSketch objects
+        category_sketches: Optional dictionary mapping account categories to
+            sketch dictionaries like `sketches`, for outliers against
+            per-category bounds
+        
+    Returns:
+        Dictionary with numerical feature analysis in JSON-compatible format
+    """
+    result = {"numerical_features": {}}
+
+    for feature in NUMERICAL_FEATURES:
+        sketch = sketches.get(feature)
+        if sketch is None or sketch.count == 0:
+            continue
+
+        q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75])
+        feature_data = {
+            "count": int(sketch.count),
+            "mean": float(sketch.mean),
+            "std": sketch.std,
+            "min": float(sketch.min),
+            "25%": float(q1),
+            "median": float(median),
+            "75%": float(q3),
+            "max": float(sketch.max),
+            "approximate": True
+        }
+        feature_data["outliers"] = _sketch_outliers(sketch)
+        result["numerical_features"][feature] = feature_data
+
+    if category_sketches:
+        result["outliers_by_category"] = {
+            str(category): {
+                feature: _sketch_outliers(sketch)
+                for feature, sketch in category_sketches[category].items()
+                if feature in result["numerical_features"] and sketch.count > 0
+            }
+            for category in sorted(category_sketches)
+        }
+
     return result
 
 
-def analyze_temporal_patterns(df, name):
+def _sketch_outliers(sketch):
+    """IQR outliers estimated from the sketch ranks of the bounds, as in `outlier_table`"""
+    q1, q3 = sketch.quantile([0.25, 0.75])
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    outlier_count = int(round(
+        sketch.rank(lower_bound) + sketch.count - sketch.rank(upper_bound, inclusive=True)
+    ))
+    return {
+        "count": outlier_count,
+        "percentage": float(outlier_count / sketch.count * 100),
+        "lower_bound": float(lower_bound),
+        "upper_bound": float(upper_bound)
+    }
+
+
+def analyze_temporal_patterns(df, name, plots=True):
     """
     Analyze temporal patterns in the data.
     
     Args:
         df: DataFrame to analyze
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with temporal pattern analysis in JSON-compatible format
     """
-    # Initialize result dictionary
-    result = {"has_temporal_data": False}
-    
+    result, figures = run_analysis(compute_temporal_patterns, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_temporal_patterns(df):
+    """
+    Compute temporal distributions from the rollup cube.
+
+    Args:
+        df: DataFrame to analyze
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     if "publish_date" in df.columns and not df["publish_date"].dropna().empty:
-        result["has_temporal_data"] = True
-        df["date"] = pd.to_datetime(df["publish_date"], errors="coerce")
+        # Temporal distributions are answered from the rollup cube
+        return summarize_temporal_rollup(get_rollup(df))
+    return {"has_temporal_data": False}, []
 
-        # Hourly distribution
-        if "hour_of_day" in df.columns and not df["hour_of_day"].dropna().empty:
-            hourly_posts = df["hour_of_day"].value_counts().sort_index()
-            
-            # Generate visualization
-            plt.figure(figsize=(12, 6))
-            hourly_posts.plot(kind="bar")
-            plt.title("Tweet Distribution by Hour of Day")
-            plt.xlabel("Hour of Day")
-            plt.ylabel("Number of Tweets")
-            plt.xticks(rotation=0)
-            plt.tight_layout()
-            plt.savefig(f"plots/{name}_hourly_distribution.png")
-            plt.close()
-            
-            # Add hourly distribution to result
-            result["hourly_distribution"] = {
-                str(hour): int(count) for hour, count in hourly_posts.items()
-            }
-            
-            # Find peak hours (top 3)
-            peak_hours = hourly_posts.nlargest(3)
-            result["peak_hours"] = [
-                {"hour": str(hour), "count": int(count)} 
-                for hour, count in peak_hours.items()
-            ]
-
-        # Daily distribution
-        if "day_of_week" in df.columns and not df["day_of_week"].dropna().empty:
-            dow_posts = df["day_of_week"].dropna().value_counts().sort_index()
-            dow_posts.index = dow_posts.index.astype(int)  # Convert to integers
-            days = [
-                "Monday",
-                "Tuesday",
-                "Wednesday",
-                "Thursday",
-                "Friday",
-                "Saturday",
-                "Sunday",
-            ]
-            valid_indices = [
-                i for i in dow_posts.index if i in range(7)
-            ]  # Filter valid indices
-            
-            if valid_indices:
-                # Generate visualization
-                dow_posts_valid = dow_posts.loc[valid_indices]
-                dow_posts_valid.index = [days[i] for i in dow_posts_valid.index]
-                plt.figure(figsize=(12, 6))
-                dow_posts_valid.plot(kind="bar")
-                plt.title("Tweet Distribution by Day of Week")
-                plt.xlabel("Day of Week")
-                plt.ylabel("Number of Tweets")
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                plt.savefig(f"plots/{name}_dayofweek_distribution.png")
-                plt.close()
-                
-                # Add daily distribution to result
-                result["daily_distribution"] = {
-                    days[i]: int(count) for i, count in zip(valid_indices, dow_posts_valid.values)
-                }
-                
-                # Find peak days (top 3)
-                peak_days = dow_posts_valid.nlargest(3)
-                result["peak_days"] = [
-                    {"day": day, "count": int(count)} 
-                    for day, count in peak_days.items()
-                ]
-            else:
-                print("Skipping day of week plot: No valid data.")
-    
-    return result
 
+def summarize_temporal_rollup(cube):
+    """
+    Report temporal distributions from a rollup cube.
+
+    The cube may be built from one frame or merged from the cubes of shards.
 
-def analyze_account_behavior(df, name):
+    Args:
+        cube: TimeRollup of a dataset with publish dates
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    result = {"has_temporal_data": True}
+    figures = []
+
+    # Hourly distribution
+    if len(cube.keys):
+        hourly_posts = cube.query("hour_of_day")["value"]
+        
+        figures.append(figure(
+            "bar", "hourly_distribution",
+            labels=[str(hour) for hour in hourly_posts.index],
+            values=hourly_posts.tolist(),
+            title="Tweet Distribution by Hour of Day",
+            xlabel="Hour of Day",
+            ylabel="Number of Tweets",
+        ))
+        
+        # Add hourly distribution to result
+        result["hourly_distribution"] = {
+            str(hour): int(count) for hour, count in hourly_posts.items()
+        }
+        
+        # Find peak hours (top 3)
+        peak_hours = hourly_posts.nlargest(3)
+        result["peak_hours"] = [
+            {"hour": str(hour), "count": int(count)} 
+            for hour, count in peak_hours.items()
+        ]
+
+    # Daily distribution
+    if len(cube.keys):
+        days = [
+            "Monday",
+            "Tuesday",
+            "Wednesday",
+            "Thursday",
+            "Friday",
+            "Saturday",
+            "Sunday",
+        ]
+        dow_posts = cube.query("day_of_week")["value"]
+        dow_posts.index = [days[i] for i in dow_posts.index]
+
+        figures.append(figure(
+            "bar", "dayofweek_distribution",
+            labels=list(dow_posts.index),
+            values=dow_posts.tolist(),
+            title="Tweet Distribution by Day of Week",
+            xlabel="Day of Week",
+            ylabel="Number of Tweets",
+            rotation=45,
+        ))
+        
+        # Add daily distribution to result
+        result["daily_distribution"] = {
+            day: int(count) for day, count in dow_posts.items()
+        }
+        
+        # Find peak days (top 3)
+        peak_days = dow_posts.nlargest(3)
+        result["peak_days"] = [
+            {"day": day, "count": int(count)} 
+            for day, count in peak_days.items()
+        ]
+    else:
+        print("Skipping day of week plot: No valid data.")
+
+    # Longer-range views
+    if len(cube.keys):
+        monthly = cube.query("month", by=["account_category"])
+        result["monthly_volume_by_category"] = {
+            str(category): {str(month): int(count) for month, count in counts.items() if count > 0}
+            for category, counts in monthly.items()
+        }
+        busiest_days = cube.query("day")["value"].nlargest(5)
+        result["busiest_days"] = [
+            {"date": str(day.date()), "count": int(count)}
+            for day, count in busiest_days.items()
+        ]
+
+    return result, figures
+
+
+def analyze_account_behavior(df, name, plots=True):
     """
     Analyze account behavior patterns.
     
     Args:
         df: DataFrame to analyze
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with account behavior analysis in JSON-compatible format
     """
+    result, figures = run_analysis(compute_account_behavior, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_account_behavior(df):
+    """
+    Compute account behavior statistics from the account profiles.
+
+    Args:
+        df: DataFrame to analyze
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    profiles = get_account_profiles(df)
+    retweet_by_category = None
+    follower_stats = None
+    level = None
+
+    # Retweet behavior by account category
+    if "account_category" in df.columns and "retweet" in df.columns:
+        retweet_by_category = category_totals(profiles)["retweet_ratio"]
+
+    # Follower/Following analysis by account category
+    if (
+        "account_category" in df.columns
+        and "followers" in df.columns
+        and "following" in df.columns
+    ):
+        if account_key(df) in (None, "account_type"):
+            # Account types are not accounts, so take medians over tweets
+            follower_stats = group_aggregate(
+                df, "account_category", ["followers", "following"], ["median"]
+            ).droplevel(1, axis=1)
+            level = "tweet"
+        else:
+            # Medians over accounts, using each account's latest snapshot
+            follower_stats = (
+                profiles[["followers_last", "following_last"]]
+                .groupby(level="account_category")
+                .median()
+                .rename(columns=lambda column: column[: -len("_last")])
+                .astype("float64")
+            )
+            level = "account"
+
+    return summarize_account_behavior(retweet_by_category, follower_stats, level)
+
+
+def summarize_account_behavior(retweet_by_category, follower_stats, level):
+    """
+    Report account behavior statistics from per-category aggregates.
+
+    Args:
+        retweet_by_category: Series of retweet ratios by account category,
+            or None without retweet data
+        follower_stats: DataFrame of median followers and following by
+            account category, or None without follower data
+        level: "tweet" or "account", what the medians were taken over
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     # Initialize result dictionary
     result = {"has_account_behavior_data": False}
+    figures = []
     
     # Retweet behavior by account category
-    if "account_category" in df.columns and "retweet" in df.columns:
+    if retweet_by_category is not None:
         result["has_account_behavior_data"] = True
         
-        # Generate visualization
-        plt.figure(figsize=(12, 6))
-        retweet_by_category = (
-            df.groupby("account_category")["retweet"]
-            .mean()
-            .sort_values(ascending=False)
-        )
-        retweet_by_category.plot(kind="bar")
-        plt.title("Retweet Ratio by Account Category")
-        plt.ylabel("Proportion of Retweets")
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        plt.savefig(f"plots/{name}_retweet_by_category.png")
-        plt.close()
+        retweet_by_category = retweet_by_category.sort_values(ascending=False)
+        figures.append(figure(
+            "bar", "retweet_by_category",
+            labels=[str(category) for category in retweet_by_category.index],
+            values=retweet_by_category.tolist(),
+            title="Retweet Ratio by Account Category",
+            xlabel="account_category",
+            ylabel="Proportion of Retweets",
+            rotation=45, ha="right",
+        ))
         
         # Add retweet behavior to result
         result["retweet_behavior"] = {
@@ -337,28 +663,21 @@ def analyze_account_behavior(df, name):
             }
 
     # Follower/Following analysis by account category
-    if (
-        "account_category" in df.columns
-        and "followers" in df.columns
-        and "following" in df.columns
-    ):
+    if follower_stats is not None:
         result["has_account_behavior_data"] = True
-        
-        # Generate visualization
-        plt.figure(figsize=(14, 6))
-        stats = (
-            df.groupby("account_category")
-            .agg({"followers": "median", "following": "median"})
-            .sort_values(by="followers", ascending=False)
-        )
+        result["follower_stats_level"] = level
+        stats = follower_stats.sort_values(by="followers", ascending=False)
 
-        stats.plot(kind="bar")
-        plt.title("Median Followers and Following by Account Category")
-        plt.ylabel("Count")
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        plt.savefig(f"plots/{name}_follower_following_by_category.png")
-        plt.close()
+        figures.append(figure(
+            "grouped_bar", "follower_following_by_category",
+            labels=[str(category) for category in stats.index],
+            series={column: stats[column].tolist() for column in stats.columns},
+            title="Median Followers and Following by Account Category",
+            xlabel="account_category",
+            ylabel="Count",
+            rotation=45, ha="right",
+            figsize=(14, 6),
+        ))
         
         # Add follower/following stats to result
         result["follower_following_stats"] = {}
@@ -389,4 +708,4 @@ def analyze_account_behavior(df, name):
                 "influence_ratio": float(least_influential.iloc[0])
             }
     
-    return result
+    return result, figures
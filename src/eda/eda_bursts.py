@@ -0,0 +1,299 @@
+"""
+Burst and activity-spike detection for temporal EDA.
+
+Count series (per account category, per hashtag) are laid out as rows of a
+dense matrix over time buckets. Each bucket is scored with a z-score
+against a trailing window computed from cumulative sums, so the cost is
+linear in the number of buckets. Runs of consecutive high-scoring buckets
+become burst windows. Hashtags are processed in fixed-size batches of rows,
+so every hashtag in the corpus can be scanned with bounded memory.
+"""
+
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from ..dates import MISSING_EPOCH
+from .eda_cache import run_analysis
+from .eda_figures import figure
+from .eda_helpers import publish_epoch
+from .eda_render import render_figures
+from .eda_sketch import split_list_column
+
+BUCKET_SECONDS = {"minute": 60, "hour": 3600, "day": 86_400}
+
+# Matrix cells (series x buckets) scored per hashtag batch
+_BATCH_CELLS = 4_000_000
+
+
+def rolling_zscores(counts: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    Score every bucket against the mean and spread of the preceding window.
+
+    Args:
+        counts: 2-D array (series x buckets)
+        window: Number of preceding buckets in the baseline
+
+    Returns:
+        Dictionary with "z" scores and the "baseline" mean, both shaped like `counts`
+    """
+    counts = np.asarray(counts, dtype="float64")
+    padded = np.pad(counts, ((0, 0), (1, 0)))
+    sums = np.cumsum(padded, axis=1)
+    squares = np.cumsum(padded * padded, axis=1)
+
+    # Baseline for bucket t covers buckets [t - window, t)
+    t = np.arange(counts.shape[1])
+    lo = np.maximum(t - window, 0)
+    size = np.maximum(t - lo, 1)
+    mean = (sums[:, t] - sums[:, lo]) / size
+    var = np.maximum((squares[:, t] - squares[:, lo]) / size - mean * mean, 0.0)
+    # A floor of sqrt(mean) (Poisson noise) and 1 keeps quiet series from exploding
+    spread = np.maximum(np.sqrt(var), np.maximum(np.sqrt(mean), 1.0))
+    z = (counts - mean) / spread
+    # The first buckets have no usable baseline yet
+    z[:, : min(window, counts.shape[1])] = 0.0
+    return {"z": z, "baseline": mean}
+
+
+def find_bursts(
+    counts: np.ndarray, window: int = 24, threshold: float = 4.0, min_count: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Find burst windows in every row of a count matrix.
+
+    Args:
+        counts: 2-D array (series x buckets)
+        window: Trailing baseline window in buckets
+        threshold: Minimum z-score for a bucket to be part of a burst
+        min_count: Minimum count for a bucket to be part of a burst
+
+    Returns:
+        List of bursts with series row, start and end bucket (end exclusive),
+        peak bucket, peak count, intensity (max z) and excess over baseline
+    """
+    scores = rolling_zscores(counts, window)
+    z, baseline = scores["z"], scores["baseline"]
+    hot = (z > threshold) & (counts >= min_count)
+    if not hot.any():
+        return []
+
+    # Run boundaries from the difference of the padded indicator
+    edges = np.diff(np.pad(hot.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    # Per-run reductions over the flattened hot buckets
+    flat_z = z[hot]
+    flat_excess = (counts - baseline)[hot]
+    flat_counts = np.asarray(counts)[hot]
+    flat_cols = np.nonzero(hot)[1]
+    offsets = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+    intensity = np.maximum.reduceat(flat_z, offsets)
+    excess = np.add.reduceat(flat_excess, offsets)
+    peak_count = np.maximum.reduceat(flat_counts, offsets)
+    # Position of the peak z within each run
+    run_id = np.repeat(np.arange(len(offsets)), ends - starts)
+    order = np.lexsort((-flat_z, run_id))
+    first = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+    peak = flat_cols[order[first]]
+
+    return [
+        {
+            "row": int(rows[i]),
+            "start": int(starts[i]),
+            "end": int(ends[i]),
+            "peak": int(peak[i]),
+            "peak_count": float(peak_count[i]),
+            "intensity": float(intensity[i]),
+            "excess": float(excess[i]),
+        }
+        for i in range(len(rows))
+    ]
+
+
+def _dense_rows(codes: np.ndarray, buckets: np.ndarray, n_rows: int, n_buckets: int) -> np.ndarray:
+    """Dense (n_rows x n_buckets) count matrix from per-event row codes and buckets"""
+    cells = np.bincount(codes * n_buckets + buckets, minlength=n_rows * n_buckets)
+    return cells.reshape(n_rows, n_buckets).astype("float64")
+
+
+def _bucket_label(bucket: int, origin: int, seconds: int) -> str:
+    return str(pd.Timestamp((origin + bucket) * seconds, unit="s"))
+
+
+def analyze_bursts(
+    df: pd.DataFrame,
+    name: str,
+    granularity: str = "hour",
+    window: int = 24,
+    threshold: float = 4.0,
+    min_count: int = 5,
+    top_n: int = 20,
+    plots: bool = True,
+) -> Dict[str, Any]:
+    """
+    Detect activity bursts per account category and per hashtag.
+
+    Args:
+        df: DataFrame with publish dates, account_category and hashtags
+        name: Name prefix for output files
+        granularity: Bucket size, "minute", "hour" or "day"
+        window: Trailing baseline window in buckets
+        threshold: Minimum z-score for a burst bucket
+        min_count: Minimum tweets in a burst bucket
+        top_n: Number of bursts of each kind to report
+        plots: Render the figures
+
+    Returns:
+        Dictionary with burst analysis in JSON-compatible format
+    """
+    result, figures = run_analysis(
+        compute_bursts, df,
+        granularity=granularity, window=window, threshold=threshold, min_count=min_count, top_n=top_n,
+    )
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_bursts(
+    df: pd.DataFrame,
+    granularity: str = "hour",
+    window: int = 24,
+    threshold: float = 4.0,
+    min_count: int = 5,
+    top_n: int = 20,
+):
+    """
+    Compute the burst analysis and its figure; see `analyze_bursts`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    result = {"has_burst_data": False, "granularity": granularity}
+    figures = []
+    if "publish_date" not in df.columns or granularity not in BUCKET_SECONDS:
+        return result, figures
+
+    seconds = BUCKET_SECONDS[granularity]
+    epoch = publish_epoch(df)
+    valid = epoch != MISSING_EPOCH
+    if not valid.any():
+        return result, figures
+    bucket = np.floor_divide(epoch, seconds)
+    origin = int(bucket[valid].min())
+    bucket = bucket - origin
+    n_buckets = int(bucket[valid].max()) + 1
+    result["has_burst_data"] = True
+
+    # Hashtag occurrences as (row position, hashtag code) pairs
+    tag_rows = np.empty(0, dtype=np.int64)
+    tag_codes = np.empty(0, dtype=np.int64)
+    tag_labels = np.empty(0, dtype=object)
+    if "hashtags" in df.columns:
+        items = split_list_column(pd.Series(df["hashtags"].to_numpy()))
+        tag_rows = items.index.to_numpy()
+        keep = valid[tag_rows]
+        tag_rows = tag_rows[keep]
+        tag_codes, tag_labels = pd.factorize(items.to_numpy()[keep])
+
+    # Category bursts
+    if "account_category" in df.columns:
+        categories = df["account_category"].astype(object).fillna("Unknown").to_numpy()
+        cat_codes, cat_labels = pd.factorize(categories[valid], sort=True)
+        matrix = _dense_rows(cat_codes, bucket[valid], len(cat_labels), n_buckets)
+        bursts = sorted(
+            find_bursts(matrix, window, threshold, min_count),
+            key=lambda burst: burst["intensity"], reverse=True,
+        )[:top_n]
+
+        # Hashtags driving each burst: occurrences sorted by (category, bucket)
+        row_category = np.full(len(df), -1)
+        row_category[valid] = cat_codes
+        occurrence_key = row_category[tag_rows] * n_buckets + bucket[tag_rows]
+        order = np.argsort(occurrence_key, kind="stable")
+        occurrence_key = occurrence_key[order]
+
+        result["category_bursts"] = []
+        for burst in bursts:
+            lo = np.searchsorted(occurrence_key, burst["row"] * n_buckets + burst["start"])
+            hi = np.searchsorted(occurrence_key, burst["row"] * n_buckets + burst["end"])
+            drivers = pd.Series(tag_codes[order[lo:hi]]).value_counts().head(5)
+            result["category_bursts"].append({
+                "category": str(cat_labels[burst["row"]]),
+                "start": _bucket_label(burst["start"], origin, seconds),
+                "end": _bucket_label(burst["end"], origin, seconds),
+                "peak": _bucket_label(burst["peak"], origin, seconds),
+                "peak_count": int(burst["peak_count"]),
+                "intensity": burst["intensity"],
+                "excess_tweets": burst["excess"],
+                "top_hashtags": [
+                    {"hashtag": str(tag_labels[code]), "count": int(count)}
+                    for code, count in drivers.items()
+                ],
+            })
+
+        if bursts:
+            # Series of the category with the strongest burst, windows shaded
+            top = bursts[0]["row"]
+            times = (origin + np.arange(n_buckets)) * seconds
+            figures.append(figure(
+                "line", "bursts",
+                x=times.tolist(),
+                y=matrix[top].tolist(),
+                spans=[
+                    [int(times[burst["start"]]), int(times[burst["end"] - 1])]
+                    for burst in bursts if burst["row"] == top
+                ],
+                title=f"Activity Bursts: {cat_labels[top]}",
+                xlabel="Time",
+                ylabel=f"Tweets per {granularity}",
+                figsize=(14, 6),
+            ))
+
+    # Hashtag bursts. Only hashtags that reach min_count in some bucket can
+    # burst, so the rest are pruned before any dense series is built
+    if len(tag_codes):
+        tag_bucket = bucket[tag_rows]
+        cells, cell_counts = np.unique(tag_codes * n_buckets + tag_bucket, return_counts=True)
+        peak_per_tag = np.zeros(len(tag_labels), dtype=np.int64)
+        np.maximum.at(peak_per_tag, cells // n_buckets, cell_counts)
+        candidates = np.flatnonzero(peak_per_tag >= min_count)
+
+        # Renumber candidates 0..k-1 and sort their occurrences, so every
+        # batch is one contiguous slice
+        candidate_code = np.full(len(tag_labels), -1)
+        candidate_code[candidates] = np.arange(len(candidates))
+        codes = candidate_code[tag_codes]
+        keep = codes >= 0
+        order = np.argsort(codes[keep], kind="stable")
+        codes, buckets = codes[keep][order], tag_bucket[keep][order]
+
+        batch_rows = max(1, _BATCH_CELLS // n_buckets)
+        hashtag_bursts = []
+        for first in range(0, len(candidates), batch_rows):
+            last = min(first + batch_rows, len(candidates))
+            lo, hi = np.searchsorted(codes, [first, last])
+            matrix = _dense_rows(codes[lo:hi] - first, buckets[lo:hi], last - first, n_buckets)
+            for burst in find_bursts(matrix, window, threshold, min_count):
+                burst["row"] = int(candidates[first + burst["row"]])
+                hashtag_bursts.append(burst)
+        hashtag_bursts.sort(key=lambda burst: burst["intensity"], reverse=True)
+
+        result["hashtags_scanned"] = int(len(tag_labels))
+        result["hashtags_with_bursts"] = len({burst["row"] for burst in hashtag_bursts})
+        result["hashtag_bursts"] = [
+            {
+                "hashtag": str(tag_labels[burst["row"]]),
+                "start": _bucket_label(burst["start"], origin, seconds),
+                "end": _bucket_label(burst["end"], origin, seconds),
+                "peak_count": int(burst["peak_count"]),
+                "intensity": burst["intensity"],
+                "excess_tweets": burst["excess"],
+            }
+            for burst in hashtag_bursts[:top_n]
+        ]
+
+    return result, figures
@@ -0,0 +1,182 @@
+"""
+Result cache for EDA analyses.
+
+Analysis results are keyed by a dataset fingerprint, the analysis name,
+its parameters and a fingerprint of the package source. Results are
+memoized in-process, so each analysis runs once per run however many
+reports ask for it. When the disk layer is enabled, results are also kept
+in the dataset cache and reused on later runs until the dataset or the
+code changes. Stored results live in one directory per code fingerprint,
+and the directories of other code versions are removed on the first
+write, so the disk layer does not grow with every edit.
+
+Frames flagged "memory_only" in their frame cache, such as bootstrap
+resamples and the service's filtered frames, never reach the disk layer.
+Their results are memoized in the frame cache instead of the process-wide
+table, so they are freed with the frame.
+
+The plot-name prefix passed to analyses is not part of the key: the same
+analysis requested under another prefix returns the first result without
+drawing its plots again.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from .. import utils
+from ..tracing import span
+from ..utils import code_fingerprint, read_cache, write_cache, source_fingerprint
+from .eda_helpers import frame_cache
+
+_RESULTS = {}
+_DISK = {"enabled": False, "pruned": False}
+
+# Subdirectory of the dataset cache holding stored results, one per code fingerprint
+RESULTS_DIR = "results"
+
+
+def use_disk_cache(enabled=True):
+    """Enable or disable the on-disk layer of the result cache"""
+    _DISK["enabled"] = enabled
+
+
+def disk_cache_enabled():
+    """Whether the on-disk layer of the result cache is enabled"""
+    return _DISK["enabled"]
+
+
+def result_cache_name(name):
+    """Dataset-cache entry name of a stored result for the current code"""
+    return f"{RESULTS_DIR}/{code_fingerprint()[:16]}/{name}"
+
+
+def prune_result_cache():
+    """Remove the stored results of every other code version"""
+    current = os.path.join(utils.CACHE_DIR, RESULTS_DIR, code_fingerprint()[:16])
+    for path in glob.glob(os.path.join(utils.CACHE_DIR, RESULTS_DIR, "*")):
+        if path != current:
+            # Another process may be pruning the same directory
+            shutil.rmtree(path, ignore_errors=True)
+    # Results stored before they were grouped by code version
+    for path in glob.glob(os.path.join(utils.CACHE_DIR, "result_*.pkl")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    _DISK["pruned"] = True
+
+
+def write_result(name, result):
+    """Store a result for the current code, pruning other code versions first"""
+    if not _DISK["pruned"]:
+        prune_result_cache()
+    # The name already encodes the dataset, so no source files are tracked
+    write_cache(result_cache_name(name), result, [])
+
+
+def clear_result_cache():
+    """Drop the results memoized in this process; memory-only frames keep theirs until they are freed"""
+    _RESULTS.clear()
+
+
+def register_dataset(df, sources, variant=""):
+    """
+    Fingerprint a frame loaded from source files by the files' signature.
+
+    Frames that are not registered are fingerprinted by hashing their
+    contents the first time a cached analysis sees them.
+
+    Args:
+        df: DataFrame loaded from `sources`
+        sources: Files the frame was read from
+        variant: How the frame was derived from the files, e.g. a sample
+    """
+    columns = json.dumps([str(column) for column in df.columns])
+    digest = hashlib.sha1((source_fingerprint(sources) + columns + variant).encode())
+    frame_cache(df)["fingerprint"] = digest.hexdigest()
+
+
+def dataset_fingerprint(df):
+    """
+    Return a hex digest identifying the contents of a DataFrame.
+
+    The fingerprint is computed once per frame, so columns an analysis adds
+    later do not change it.
+    """
+    cache = frame_cache(df)
+    if "fingerprint" not in cache:
+        digest = hashlib.sha1(json.dumps([str(column) for column in df.columns]).encode())
+        digest.update(str(len(df)).encode())
+        for column in df.columns:
+            digest.update(pd.util.hash_pandas_object(df[column], index=False).to_numpy().tobytes())
+        cache["fingerprint"] = digest.hexdigest()
+    return cache["fingerprint"]
+
+
+def _use_disk(df):
+    return _DISK["enabled"] and not frame_cache(df).get("memory_only", False)
+
+
+def _results(df):
+    """Memo table holding the results of a frame"""
+    cache = frame_cache(df)
+    if cache.get("memory_only", False):
+        return cache.setdefault("results", {})
+    return _RESULTS
+
+
+def _result_key(func, df, params):
+    analysis = f"{func.__module__}.{func.__qualname__}"
+    encoded = json.dumps(params, sort_keys=True, default=repr)
+    digest = hashlib.sha1(f"{dataset_fingerprint(df)}:{code_fingerprint()}:{analysis}:{encoded}".encode())
+    return f"result_{func.__name__}_{digest.hexdigest()[:20]}"
+
+
+def cached_result(func, df, **params):
+    """
+    Return the cached result of an analysis without running it.
+
+    Args:
+        func: Analysis function
+        df: DataFrame it would analyze
+        **params: Further analysis parameters
+
+    Returns:
+        The cached result, or None if the analysis has not run on this dataset
+    """
+    key = _result_key(func, df, params)
+    results = _results(df)
+    if key not in results and _use_disk(df):
+        result = read_cache(result_cache_name(key), [])
+        if result is not None:
+            results[key] = result
+    return results.get(key)
+
+
+def run_analysis(func, df, name=None, **params):
+    """
+    Run an analysis once per dataset and parameters, reusing earlier results.
+
+    Args:
+        func: Analysis function, called as func(df, name, **params), or
+            func(df, **params) when `name` is None
+        df: DataFrame to analyze
+        name: Name prefix for output files (not part of the cache key)
+        **params: Further analysis parameters
+
+    Returns:
+        The analysis result
+    """
+    result = cached_result(func, df, **params)
+    if result is None:
+        with span(func.__name__, rows=len(df), category="analysis"):
+            result = func(df, **params) if name is None else func(df, name, **params)
+        if _use_disk(df):
+            write_result(_result_key(func, df, params), result)
+        _results(df)[_result_key(func, df, params)] = result
+    return result
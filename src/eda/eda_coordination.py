@@ -0,0 +1,280 @@
+"""
+Coordinated-posting detection for EDA.
+
+Every account (or account type, when the data has no author identifier) gets
+a binned activity vector built from its publish dates. Comparing all pairs
+would be quadratic, so candidate pairs are first proposed by MinHash
+locality-sensitive hashing over the coarse time bins each account was
+active in. Only the candidates get a lagged cross-correlation of their
+fine-grained activity vectors, computed in batches with the FFT.
+Synchronized pairs are then joined into groups with union-find.
+"""
+
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from ..dates import MISSING_EPOCH
+from .eda_helpers import account_key, publish_epoch
+
+# MinHash signature length and banding (bands x rows per band)
+_NUM_HASHES = 64
+_BANDS = 16
+_MERSENNE = (1 << 31) - 1
+
+# Below this many pairs every pair is correlated and LSH pruning is skipped
+_EXHAUSTIVE_PAIRS = 5_000
+
+# Matrix cells (pairs x FFT length) correlated per batch
+_BATCH_CELLS = 4_000_000
+
+
+def minhash_signatures(owners: np.ndarray, items: np.ndarray, n_owners: int, seed: int = 0) -> np.ndarray:
+    """
+    MinHash signatures of the item sets of many owners.
+
+    Args:
+        owners: Owner code of every (owner, item) pair, in 0..n_owners-1
+        items: Non-negative integer item of every pair
+        n_owners: Number of owners
+        seed: Seed for the hash functions
+
+    Returns:
+        int64 array (n_owners x _NUM_HASHES); owners without items get the maximum value
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE, _NUM_HASHES)
+    b = rng.integers(0, _MERSENNE, _NUM_HASHES)
+    signatures = np.full((n_owners, _NUM_HASHES), _MERSENNE, dtype=np.int64)
+    items = items % _MERSENNE
+    for i in range(_NUM_HASHES):
+        np.minimum.at(signatures[:, i], owners, (a[i] * items + b[i]) % _MERSENNE)
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, max_bucket: int = 100) -> np.ndarray:
+    """
+    Propose owner pairs that share at least one LSH band.
+
+    Buckets larger than `max_bucket` only link consecutive members, which
+    keeps them connected for grouping without enumerating every pair.
+
+    Args:
+        signatures: MinHash signatures (owners x _NUM_HASHES)
+        max_bucket: Largest bucket whose pairs are enumerated in full
+
+    Returns:
+        int64 array (pairs x 2) of unique pairs with the smaller code first
+    """
+    rows = _NUM_HASHES // _BANDS
+    pairs = []
+    for band in range(_BANDS):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        _, bucket = np.unique(block, axis=0, return_inverse=True)
+        order = np.argsort(bucket.ravel(), kind="stable")
+        sizes = np.bincount(bucket.ravel())
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        for start, size in zip(bounds[:-1], sizes):
+            if size < 2:
+                continue
+            members = order[start:start + size]
+            if size <= max_bucket:
+                first, second = np.triu_indices(size, 1)
+                pairs.append(np.column_stack((members[first], members[second])))
+            else:
+                pairs.append(np.column_stack((members[:-1], members[1:])))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def lagged_correlation(
+    owners: np.ndarray, bins: np.ndarray, n_bins: int, pairs: np.ndarray, max_lag: int
+) -> Dict[str, np.ndarray]:
+    """
+    Peak normalized cross-correlation of activity vectors within +-max_lag bins.
+
+    Activity vectors are only materialized for the owners of one batch of
+    pairs at a time, and each owner's spectrum is computed once per batch.
+
+    Args:
+        owners: Owner code of every event
+        bins: Activity bin of every event, in 0..n_bins-1
+        n_bins: Length of the activity vectors
+        pairs: int array (pairs x 2) of owner codes
+        max_lag: Largest lag in bins, in either direction
+
+    Returns:
+        Dictionary with the peak "strength" and its "lag" for every pair; a
+        positive lag means the second owner posts `lag` bins after the first
+    """
+    order = np.argsort(owners, kind="stable")
+    owners, bins = owners[order], bins[order]
+    n_owners = int(owners.max()) + 1 if len(owners) else 0
+    offsets = np.searchsorted(owners, np.arange(n_owners + 1))
+
+    # Mean and norm of every centered vector, from the sparse bin counts
+    cells, counts = np.unique(owners * n_bins + bins, return_counts=True)
+    mean = np.bincount(owners, minlength=n_owners) / n_bins
+    squares = np.bincount(cells // n_bins, counts.astype("float64") ** 2, n_owners)
+    norms = np.sqrt(np.maximum(squares - n_bins * mean * mean, 0.0))
+
+    # Zero padding keeps lags up to max_lag free of circular wrap-around
+    length = 1 << int(np.ceil(np.log2(n_bins + max_lag + 1)))
+    lags = np.concatenate((np.arange(0, max_lag + 1), np.arange(-max_lag, 0)))
+
+    strength = np.zeros(len(pairs))
+    best_lag = np.zeros(len(pairs), dtype=np.int64)
+    batch = max(1, _BATCH_CELLS // (2 * length))
+    for start in range(0, len(pairs), batch):
+        chunk = pairs[start:start + batch]
+        members, local = np.unique(chunk, return_inverse=True)
+        local = local.reshape(chunk.shape)
+        event_rows = [np.arange(offsets[m], offsets[m + 1]) for m in members]
+        row_of_event = np.repeat(np.arange(len(members)), [len(rows) for rows in event_rows])
+        vectors = np.bincount(
+            row_of_event * n_bins + bins[np.concatenate(event_rows)],
+            minlength=len(members) * n_bins,
+        ).reshape(len(members), n_bins) - mean[members][:, None]
+        spectra = np.fft.rfft(vectors, n=length, axis=1)
+
+        # corr[k] = sum_t x[t] * y[t + k]
+        corr = np.fft.irfft(np.conj(spectra[local[:, 0]]) * spectra[local[:, 1]], n=length, axis=1)
+        corr = corr[:, lags]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = corr / (norms[chunk[:, 0]] * norms[chunk[:, 1]])[:, None]
+        corr = np.nan_to_num(corr)
+        peak = corr.argmax(axis=1)
+        strength[start:start + len(chunk)] = corr[np.arange(len(chunk)), peak]
+        best_lag[start:start + len(chunk)] = lags[peak]
+    return {"strength": strength, "lag": best_lag}
+
+
+def _union_find_groups(pairs: np.ndarray, n_owners: int) -> np.ndarray:
+    """Connected-component label of every owner, given edges as pairs"""
+    parent = np.arange(n_owners)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.array([find(x) for x in range(n_owners)])
+
+
+def analyze_coordination(
+    df: pd.DataFrame,
+    name: str,
+    bin_seconds: int = 3600,
+    max_lag: int = 3,
+    min_tweets: int = 20,
+    min_jaccard: float = 0.3,
+    min_strength: float = 0.5,
+    top_n: int = 20,
+) -> Dict[str, Any]:
+    """
+    Find groups of accounts whose posting activity is tightly synchronized.
+
+    Args:
+        df: DataFrame with publish dates and an account identifier column
+        name: Name prefix for output files
+        bin_seconds: Width of the activity bins
+        max_lag: Largest lag, in bins, at which posting still counts as synchronized
+        min_tweets: Minimum tweets for an account to be considered
+        min_jaccard: Minimum estimated overlap of active coarse bins for a candidate pair
+        min_strength: Minimum peak cross-correlation for a synchronized pair
+        top_n: Number of pairs and groups to report
+
+    Returns:
+        Dictionary with coordination analysis in JSON-compatible format
+    """
+    key = account_key(df)
+    result = {"has_coordination_data": False, "account_key": key}
+    if key is None or "publish_date" not in df.columns:
+        return result
+
+    epoch = publish_epoch(df)
+    accounts = df[key].to_numpy()
+    valid = (epoch != MISSING_EPOCH) & pd.notna(accounts)
+    codes, labels = pd.factorize(accounts[valid])
+    tweets = np.bincount(codes, minlength=len(labels))
+    active = np.flatnonzero(tweets >= min_tweets)
+    result["accounts_considered"] = int(len(active))
+    if len(active) < 2:
+        return result
+    result["has_coordination_data"] = True
+
+    # Renumber the active accounts 0..n-1
+    owner = np.full(len(labels), -1)
+    owner[active] = np.arange(len(active))
+    owners = owner[codes]
+    keep = owners >= 0
+    owners, times = owners[keep], epoch[valid][keep]
+
+    if len(active) * (len(active) - 1) // 2 <= _EXHAUSTIVE_PAIRS:
+        pairs = np.column_stack(np.triu_indices(len(active), 1))
+    else:
+        # Candidate pairs from the overlap of active coarse bins, each wide
+        # enough to hold activity shifted by up to max_lag fine bins
+        coarse = times // (bin_seconds * (max_lag + 1))
+        coarse = coarse - coarse.min()
+        n_coarse = int(coarse.max()) + 1
+        owner_bins = np.unique(owners * n_coarse + coarse)
+        signatures = minhash_signatures(owner_bins // n_coarse, owner_bins % n_coarse, len(active))
+        pairs = candidate_pairs(signatures)
+        if len(pairs):
+            jaccard = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+            pairs = pairs[jaccard >= min_jaccard]
+    result["candidate_pairs"] = int(len(pairs))
+    result["all_pairs"] = int(len(active) * (len(active) - 1) // 2)
+
+    # Fine-grained activity vectors over the common time range
+    bins = times // bin_seconds
+    bins = bins - bins.min()
+    correlation = lagged_correlation(owners, bins, int(bins.max()) + 1, pairs, max_lag)
+    synchronized = correlation["strength"] >= min_strength
+    pairs = pairs[synchronized]
+    strength = correlation["strength"][synchronized]
+    lag = correlation["lag"][synchronized]
+    result["synchronized_pairs_found"] = int(len(pairs))
+
+    names = [str(label) for label in labels[active]]
+    order = np.argsort(-strength, kind="stable")[:top_n]
+    result["synchronized_pairs"] = [
+        {
+            "account1": names[pairs[i, 0]],
+            "account2": names[pairs[i, 1]],
+            "lag_bins": int(lag[i]),
+            "lag_seconds": int(lag[i] * bin_seconds),
+            "strength": float(strength[i]),
+        }
+        for i in order
+    ]
+
+    # Groups of accounts connected by synchronized pairs
+    groups: List[Dict[str, Any]] = []
+    if len(pairs):
+        component = _union_find_groups(pairs, len(active))
+        edge_component = component[pairs[:, 0]]
+        for root in np.unique(edge_component):
+            members = np.flatnonzero(component == root)
+            in_group = edge_component == root
+            groups.append({
+                "members": [names[m] for m in members],
+                "size": int(len(members)),
+                "pairs": int(in_group.sum()),
+                "mean_strength": float(strength[in_group].mean()),
+                "median_lag_seconds": float(np.median(lag[in_group]) * bin_seconds),
+                "tweets": int(tweets[active[members]].sum()),
+            })
+        groups.sort(key=lambda group: (group["size"], group["mean_strength"]), reverse=True)
+    result["groups"] = groups[:top_n]
+
+    return result
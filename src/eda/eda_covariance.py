@@ -0,0 +1,169 @@
+"""
+Streaming covariance and correlation for EDA.
+
+`CovarianceAccumulator` keeps running means and centered cross-products of
+a set of features. It is fed chunk by chunk (or shard by shard, then merged)
+and finalizes Pearson and approximate Spearman correlation matrices without
+holding the data in memory.
+"""
+
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rows per chunk when accumulating straight from a DataFrame
+CHUNK_ROWS = 500_000
+
+
+class _Moments:
+    """Count, mean vector and centered cross-product matrix (Chan et al. merge)"""
+
+    def __init__(self, n_features: int):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.comoment = np.zeros((n_features, n_features))
+
+    def update(self, block: np.ndarray) -> None:
+        n = block.shape[0]
+        if n == 0:
+            return
+        mean = block.mean(axis=0)
+        centered = block - mean
+        self.combine(n, mean, centered.T @ centered)
+
+    def combine(self, n: int, mean: np.ndarray, comoment: np.ndarray) -> None:
+        if n == 0:
+            return
+        total = self.count + n
+        delta = mean - self.mean
+        self.comoment += comoment + np.outer(delta, delta) * (self.count * n / total)
+        self.mean += delta * (n / total)
+        self.count = total
+
+    def correlation(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.sqrt(np.diag(self.comoment))
+            corr = np.clip(self.comoment / np.outer(scale, scale), -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(scale > 0, 1.0, np.nan))
+        return corr
+
+
+class CovarianceAccumulator:
+    """
+    Mergeable accumulator for covariance, Pearson and Spearman matrices.
+
+    Rows with a missing value in any feature are skipped (complete-case
+    analysis). Spearman correlation is approximated by ranking each chunk
+    separately, which is exact for a single chunk and converges as chunks
+    grow.
+
+    Args:
+        features: Feature names, in block column order
+        spearman: Also accumulate per-chunk ranks for Spearman correlation
+    """
+
+    def __init__(self, features: Iterable[str], spearman: bool = False):
+        self.features: List[str] = list(features)
+        self.spearman = spearman
+        self._moments = _Moments(len(self.features))
+        self._rank_moments = _Moments(len(self.features)) if spearman else None
+
+    @property
+    def count(self) -> int:
+        """Number of complete rows accumulated"""
+        return self._moments.count
+
+    def update(self, block: np.ndarray) -> "CovarianceAccumulator":
+        """
+        Add a chunk of rows.
+
+        Args:
+            block: 2-D array of shape (rows, features)
+
+        Returns:
+            The accumulator itself
+        """
+        block = np.asarray(block, dtype="float64")
+        block = block[~np.isnan(block).any(axis=1)]
+        self._moments.update(block)
+        if self.spearman and len(block):
+            ranks = pd.DataFrame(block).rank(method="average", pct=True).to_numpy()
+            self._rank_moments.update(ranks)
+        return self
+
+    def update_frame(self, df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> "CovarianceAccumulator":
+        """
+        Add all rows of a DataFrame, converting it to arrays one chunk at a time.
+
+        Args:
+            df: DataFrame with the accumulator's features
+            chunk_rows: Rows converted per chunk
+
+        Returns:
+            The accumulator itself
+        """
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            self.update(chunk[self.features].to_numpy(dtype="float64", na_value=np.nan))
+        return self
+
+    def merge(self, other: "CovarianceAccumulator") -> "CovarianceAccumulator":
+        """Fold an accumulator over the same features into this one"""
+        if other.features != self.features:
+            raise ValueError("Cannot merge accumulators over different features")
+        self._moments.combine(other._moments.count, other._moments.mean, other._moments.comoment)
+        if self.spearman and other.spearman:
+            rank_moments = other._rank_moments
+            self._rank_moments.combine(rank_moments.count, rank_moments.mean, rank_moments.comoment)
+        return self
+
+    def mean(self) -> np.ndarray:
+        """Mean of every feature"""
+        return self._moments.mean.copy()
+
+    def covariance(self, ddof: int = 1) -> np.ndarray:
+        """Covariance matrix"""
+        if self.count <= ddof:
+            return np.full(self._moments.comoment.shape, np.nan)
+        return self._moments.comoment / (self.count - ddof)
+
+    def pearson(self) -> np.ndarray:
+        """Pearson correlation matrix; NaN where a feature is constant"""
+        return self._moments.correlation()
+
+    def spearman_correlation(self) -> np.ndarray:
+        """Approximate Spearman correlation matrix from per-chunk ranks"""
+        if not self.spearman:
+            raise ValueError("Accumulator was created without spearman=True")
+        return self._rank_moments.correlation()
+
+
+def top_correlated_pairs(
+    corr: np.ndarray, features: List[str], threshold: float = 0.3, k: Optional[int] = 10
+) -> List[Dict[str, Any]]:
+    """
+    Extract the strongest feature pairs from the upper triangle of a matrix.
+
+    Args:
+        corr: Square correlation matrix
+        features: Feature names in matrix order
+        threshold: Minimum absolute correlation to report
+        k: Maximum number of pairs (None for all)
+
+    Returns:
+        List of {"feature1", "feature2", "correlation"} sorted by |correlation|
+    """
+    rows, cols = np.triu_indices(len(features), k=1)
+    values = corr[rows, cols]
+    keep = np.abs(values) > threshold
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+    order = np.argsort(-np.abs(values), kind="stable")[:k]
+    return [
+        {
+            "feature1": features[rows[i]],
+            "feature2": features[cols[i]],
+            "correlation": float(values[i]),
+        }
+        for i in order
+    ]
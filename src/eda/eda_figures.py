@@ -0,0 +1,164 @@
+"""
+Plot-ready aggregates for EDA figures.
+
+Analyses describe their figures as small dictionaries ("figure specs") built
+from the helpers here, and `eda_render` draws them. Specs hold only
+aggregates (bin counts, box statistics, group means), never raw rows, so
+rendering cost does not grow with the dataset and analyses never touch
+matplotlib.
+"""
+
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Upper bound on histogram bins, whatever the automatic rule suggests
+MAX_BINS = 100
+
+# Outliers drawn per boxplot; larger sets are thinned evenly by rank
+MAX_FLIERS = 500
+
+# Grid points of a kernel density estimate
+KDE_GRID = 512
+
+
+def figure(kind: str, file: str, **spec) -> Dict[str, Any]:
+    """
+    Build a figure spec.
+
+    Args:
+        kind: Drawing routine in `eda_render` ("bar", "grouped_bar", "pie", "hist",
+            "box", "hist_box", "heatmap", "wordcloud", "line" or "table")
+        file: Output file suffix, appended to the name prefix
+        **spec: Data and labels for the drawing routine
+
+    Returns:
+        Figure spec dictionary
+    """
+    return {"kind": kind, "file": file, **spec}
+
+
+def histogram_data(values: np.ndarray, bins="auto", kde: bool = False) -> Dict[str, Any]:
+    """
+    Bin values for a histogram.
+
+    Args:
+        values: 1-D array; NaNs are ignored
+        bins: Bin count or numpy binning rule; automatic rules are capped at MAX_BINS
+        kde: Add a kernel density estimate scaled to the bin counts
+
+    Returns:
+        Dictionary with "edges" and "counts" lists, and "kde" if requested
+    """
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {"edges": [], "counts": []}
+    if isinstance(bins, str):
+        edges = np.histogram_bin_edges(values, bins)
+        if len(edges) - 1 > MAX_BINS:
+            edges = np.histogram_bin_edges(values, MAX_BINS)
+    else:
+        edges = np.histogram_bin_edges(values, bins)
+    counts, edges = np.histogram(values, edges)
+    result = {"edges": edges.tolist(), "counts": counts.tolist()}
+    if kde:
+        density = kde_data(values)
+        if density is not None:
+            # Density times rows per unit of x matches the height of the bars
+            scale = len(values) * (edges[1] - edges[0])
+            result["kde"] = {"x": density["x"], "y": [y * scale for y in density["y"]]}
+    return result
+
+
+def kde_data(values: np.ndarray, grid_size: int = KDE_GRID) -> Optional[Dict[str, list]]:
+    """
+    Gaussian kernel density estimate on a regular grid, computed with an FFT.
+
+    Values are linearly binned onto the grid and the bin weights are
+    convolved with the kernel, so the cost depends on the grid size rather
+    than on the number of values. The bandwidth follows Scott's rule and the
+    grid extends three bandwidths past the data, as in seaborn.
+
+    Args:
+        values: 1-D array; NaNs are ignored
+        grid_size: Number of grid points
+
+    Returns:
+        Dictionary with "x" grid and "y" density lists, or None for fewer
+        than two distinct values
+    """
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        return None
+    std = values.std(ddof=1)
+    if std == 0:
+        return None
+    bandwidth = std * len(values) ** (-1 / 5)
+    low, high = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    x, step = np.linspace(low, high, grid_size, retstep=True)
+
+    # Linear binning: each value splits its weight between the two nearest points
+    position = (values - low) / step
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    right_share = position - left
+    weights = np.bincount(left, 1 - right_share, grid_size)
+    weights += np.bincount(left + 1, right_share, grid_size)
+
+    offsets = np.arange(-(grid_size - 1), grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(np.ceil(np.log2(3 * grid_size - 2)))
+    smoothed = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = np.maximum(smoothed[grid_size - 1:2 * grid_size - 1], 0) / len(values)
+    return {"x": x.tolist(), "y": density.tolist()}
+
+
+def box_data(values: np.ndarray, whisker: float = 1.5) -> Optional[Dict[str, Any]]:
+    """
+    Box plot statistics in the layout of `matplotlib.axes.Axes.bxp`.
+
+    Args:
+        values: 1-D array; NaNs are ignored
+        whisker: Whisker length as a multiple of the IQR
+
+    Returns:
+        Dictionary with med, q1, q3, whislo, whishi and fliers, or None if empty
+    """
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    low, high = q1 - whisker * (q3 - q1), q3 + whisker * (q3 - q1)
+    inside = (values >= low) & (values <= high)
+    fliers = np.sort(values[~inside])
+    if len(fliers) > MAX_FLIERS:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, MAX_FLIERS).round().astype(int)]
+    return {
+        "med": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "whislo": float(values[inside].min()),
+        "whishi": float(values[inside].max()),
+        "fliers": fliers.tolist(),
+    }
+
+
+def mean_ci(mean, std, count, z: float = 1.96) -> Dict[str, list]:
+    """
+    Normal-approximation confidence intervals for group means.
+
+    Args:
+        mean: Group means
+        std: Group standard deviations (ddof=1)
+        count: Group sizes
+        z: Two-sided critical value (1.96 for 95%)
+
+    Returns:
+        Dictionary with "values" (means) and "errors" (half-widths)
+    """
+    mean = np.asarray(mean, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half = z * np.asarray(std, dtype="float64") / np.sqrt(np.asarray(count, dtype="float64"))
+    return {"values": mean.tolist(), "errors": np.nan_to_num(half).tolist()}
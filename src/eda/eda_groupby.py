@@ -0,0 +1,187 @@
+"""
+Grouped aggregation engine for EDA.
+
+Grouping keys (`account_category`, `region`, `language`, `account_type`) are
+factorized once per DataFrame. The group codes, the permutation that sorts
+rows by group and the group offsets are cached, and every later aggregation
+over those keys is computed with `np.bincount` and `ufunc.reduceat` on the
+cached layout, for many columns and aggregations in one call.
+"""
+
+from typing import Dict, Iterable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .eda_helpers import frame_cache
+
+AGGREGATIONS = ("count", "sum", "mean", "std", "min", "max", "median")
+
+
+class GroupIndex:
+    """
+    Group codes of every row plus the layout of rows sorted by group.
+
+    Rows whose key is missing get code -1 and are left out of every group,
+    as in `DataFrame.groupby`. Groups are ordered by sorted key.
+
+    Args:
+        codes: int64 group code of every row (-1 for missing keys)
+        labels: Index of group labels, one per code
+    """
+
+    def __init__(self, codes: np.ndarray, labels: pd.Index):
+        self.codes = codes
+        self.labels = labels
+        self.n_groups = len(labels)
+        order = np.argsort(codes, kind="stable")
+        # Missing keys sort first; drop them from the grouped layout
+        self.order = order[np.searchsorted(codes[order], 0):]
+        self.counts = np.bincount(codes[self.order], minlength=self.n_groups)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, by: Union[str, Sequence[str]]) -> "GroupIndex":
+        """
+        Factorize the grouping columns of a DataFrame.
+
+        Args:
+            df: DataFrame with the grouping columns
+            by: Column name or sequence of column names
+
+        Returns:
+            GroupIndex
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        codes = np.zeros(len(df), dtype=np.int64)
+        levels = []
+        for column in by:
+            column_codes, uniques = pd.factorize(df[column], sort=True)
+            codes = np.where(
+                (codes < 0) | (column_codes < 0), -1, codes * len(uniques) + column_codes
+            )
+            levels.append(uniques)
+        if len(by) == 1:
+            return cls(codes, pd.Index(levels[0], name=by[0]))
+
+        # Keep only the key combinations that occur, renumbered in sorted order
+        keyed = codes >= 0
+        present, inverse = np.unique(codes[keyed], return_inverse=True)
+        codes[keyed] = inverse
+        level_codes = []
+        for uniques in reversed(levels):
+            present, code = np.divmod(present, len(uniques))
+            level_codes.append(code)
+        labels = pd.MultiIndex(levels=levels, codes=level_codes[::-1], names=by)
+        return cls(codes, labels)
+
+    def size(self) -> pd.Series:
+        """Number of rows in every group"""
+        return pd.Series(self.counts, index=self.labels)
+
+    def _column(self, values, aggs) -> Dict:
+        """All requested aggregations of one column"""
+        values = np.asarray(values, dtype="float64")[self.order]
+        group = np.repeat(np.arange(self.n_groups), self.counts)
+        valid = ~np.isnan(values)
+        count = np.bincount(group[valid], minlength=self.n_groups)
+        total = np.bincount(group[valid], values[valid], self.n_groups)
+        empty = count == 0
+        result = {}
+        sorted_values = None
+        for agg in aggs:
+            if agg == "count":
+                result[agg] = count
+            elif agg == "sum":
+                result[agg] = total
+            elif agg == "mean":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    result[agg] = np.where(empty, np.nan, total / count)
+            elif agg == "std":
+                # Sample standard deviation (ddof=1) from deviations about the group mean
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    mean = total / count
+                    deviation = values[valid] - mean[group[valid]]
+                    squares = np.bincount(group[valid], deviation * deviation, self.n_groups)
+                    result[agg] = np.where(count < 2, np.nan, squares / (count - 1))
+                result[agg] = np.sqrt(result[agg])
+            elif agg in ("min", "max"):
+                if self.n_groups == 0:
+                    # reduceat rejects empty offsets
+                    result[agg] = np.full(0, np.nan)
+                    continue
+                fill = np.inf if agg == "min" else -np.inf
+                ufunc = np.minimum if agg == "min" else np.maximum
+                reduced = ufunc.reduceat(np.where(valid, values, fill), self.offsets)
+                result[agg] = np.where(empty, np.nan, reduced)
+            else:
+                q = 0.5 if agg == "median" else float(agg)
+                if sorted_values is None:
+                    # Sort values within groups; NaNs sort last in every group
+                    sorted_values = values[np.lexsort((values, group))]
+                position = q * np.maximum(count - 1, 0)
+                lower = np.floor(position).astype(np.int64)
+                upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+                low = sorted_values[self.offsets + lower]
+                high = sorted_values[self.offsets + upper]
+                result[agg] = np.where(empty, np.nan, low + (high - low) * (position - lower))
+        return result
+
+    def aggregate(self, df: pd.DataFrame, columns: Iterable[str], aggs: Iterable = ("mean",)) -> pd.DataFrame:
+        """
+        Aggregate many columns with many aggregations in one sweep.
+
+        Args:
+            df: DataFrame the index was built from
+            columns: Numeric columns to aggregate; missing values are skipped
+            aggs: Names from AGGREGATIONS, or floats in [0, 1] for quantiles
+
+        Returns:
+            DataFrame indexed by group with (column, aggregation) columns
+        """
+        aggs = list(aggs)
+        for agg in aggs:
+            if agg not in AGGREGATIONS and not (isinstance(agg, float) and 0.0 <= agg <= 1.0):
+                raise ValueError(f"Unknown aggregation {agg!r}")
+        data = {}
+        for column in columns:
+            values = df[column].to_numpy(dtype="float64", na_value=np.nan)
+            for agg, result in self._column(values, aggs).items():
+                data[(column, agg)] = result
+        return pd.DataFrame(data, index=self.labels)
+
+
+def get_group_index(df: pd.DataFrame, by: Union[str, Sequence[str]]) -> GroupIndex:
+    """
+    Return the GroupIndex of a DataFrame for the given keys, building it once per frame.
+
+    Args:
+        df: DataFrame with the grouping columns
+        by: Column name or sequence of column names
+
+    Returns:
+        GroupIndex
+    """
+    key = ("group_index", by if isinstance(by, str) else tuple(by))
+    cache = frame_cache(df)
+    if key not in cache:
+        cache[key] = GroupIndex.from_frame(df, by)
+    return cache[key]
+
+
+def group_aggregate(
+    df: pd.DataFrame, by: Union[str, Sequence[str]], columns: Iterable[str], aggs: Iterable = ("mean",)
+) -> pd.DataFrame:
+    """
+    Aggregate columns of a DataFrame by the given keys using the cached GroupIndex.
+
+    Args:
+        df: DataFrame to aggregate
+        by: Column name or sequence of column names
+        columns: Numeric columns to aggregate
+        aggs: Names from AGGREGATIONS, or floats in [0, 1] for quantiles
+
+    Returns:
+        DataFrame indexed by group with (column, aggregation) columns
+    """
+    return get_group_index(df, by).aggregate(df, columns, aggs)
@@ -2,14 +2,61 @@
 
 import re
 import string
-from nltk.corpus import stopwords
+import threading
+import weakref
+from ..dates import parse_publish_date
+from .eda_resources import stopword_set
+
+# Columns identifying the posting account, most specific first. The trimmed
+# dataset only keeps `account_type`; the full dataset also has author IDs.
+ACCOUNT_KEY_COLUMNS = ("external_author_id", "author", "account_type")
+
+# Per-DataFrame memo dictionaries, keyed by id() and evicted when the frame dies
+_FRAME_CACHES = {}
+_FRAME_CACHES_LOCK = threading.Lock()
+
+
+def frame_cache(df):
+    """
+    Return a dictionary for memoizing structures derived from a DataFrame.
+
+    The dictionary lives as long as the DataFrame does, so analyses that run
+    on the same frame can share expensive intermediate results.
+    """
+    key = id(df)
+    cache = _FRAME_CACHES.get(key)
+    if cache is None:
+        # Stages running on threads may ask for the same frame at once
+        with _FRAME_CACHES_LOCK:
+            cache = _FRAME_CACHES.get(key)
+            if cache is None:
+                cache = {}
+                _FRAME_CACHES[key] = cache
+                weakref.finalize(df, _FRAME_CACHES.pop, key, None)
+    return cache
+
+def publish_epoch(df):
+    """
+    Return publish dates as int64 epoch seconds without modifying the frame.
+
+    Uses the cached `publish_epoch` column from `load_data` when present and
+    otherwise parses `publish_date` once per DataFrame.
+    """
+    if "publish_epoch" in df.columns:
+        return df["publish_epoch"].to_numpy()
+    cache = frame_cache(df)
+    if "publish_epoch" not in cache:
+        cache["publish_epoch"] = parse_publish_date(df["publish_date"])
+    return cache["publish_epoch"]
+
+
+def account_key(df):
+    """Name of the most specific account identifier column in the frame, or None"""
+    for column in ACCOUNT_KEY_COLUMNS:
+        if column in df.columns:
+            return column
+    return None
 
-def progress_bar(current, total, bar_length=70):
-    """Print a progress bar"""
-    percent = float(current) * 100 / total
-    arrow = "=" * int(percent / 100 * bar_length)
-    spaces = " " * (bar_length - len(arrow))
-    print(f"Progress: [{arrow}{spaces}] {percent:.2f}%", end="\r")
 
 def clean_text(text):
     """Clean text"""
@@ -22,7 +69,7 @@ def clean_text(text):
     text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
     text = re.sub(r"\s+", " ", text).strip()
     text = re.sub(r"\d+", "", text)
-    stop_words = set(stopwords.words("english"))
+    stop_words = stopword_set()
     text = " ".join(
         word
         for word in text.split()
@@ -0,0 +1,190 @@
+"""
+Append-only ingest of new tweet batches, with incremental aggregates.
+
+`ingest_batch` derives the features of a batch of trimmed tweets and
+appends it to the dataset as a new shard: a trimmed and derived CSV pair
+that is never rewritten, listed in the ingest manifest. Every loader picks
+the new shard up through `dataset_shards()`.
+
+The corpus aggregates are the merged partials of INGEST_PARTIALS: category
+and region counts, the rollup cube behind the hourly and daily histograms,
+sentiment sums, co-occurrence counts and quantile sketches. They are kept
+in the dataset cache. Ingesting a batch builds the batch's partials, merges
+them into the stored aggregates and refreshes the reports from the result,
+so it takes time proportional to the batch and the size of the aggregates
+rather than to the corpus. The aggregates are rebuilt shard by shard when
+they are missing, an earlier shard changed or the code changed.
+
+Nothing is written until the batch's partials are merged. The shard files
+come next and the manifest last, and a failure while writing removes the
+shard files again, so a failed ingest can simply be retried.
+"""
+
+import json
+import os
+from io import StringIO
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from ..features import derive_features
+from ..tracing import span
+from ..utils import (
+    INGEST_MANIFEST,
+    INGEST_SHARD_START,
+    RAW_DIR,
+    SHARDS,
+    combine_frames,
+    dataset_shards,
+    ingested_shards,
+    load_data,
+    read_cache,
+    shard_paths,
+    write_cache,
+)
+from .eda_partials import INGEST_PARTIALS, build_partials, merge_partials, partial_report
+from .eda_resources import require_resources
+
+INGEST_DIR = "plots/ingest"
+
+# Dataset cache entry of the corpus aggregates
+AGGREGATES = "ingest_aggregates"
+
+
+def _aggregates_name(partials: Dict[str, type]) -> str:
+    """Dataset cache entry of the aggregates of a partials registry"""
+    if partials is INGEST_PARTIALS:
+        return AGGREGATES
+    return "_".join([AGGREGATES, *partials])
+
+
+def _shard_aggregates(shard: int, partials: Dict[str, type] = INGEST_PARTIALS) -> Dict[str, Any]:
+    """Load one shard and build its ingest partials"""
+    with span(f"shard_{shard}", category="stage"):
+        _, _, combined_df = load_data(use_cache=False, shards=[shard])
+        return build_partials(combined_df, seed=shard, partials=partials)
+
+
+def corpus_aggregates(shards: List[int], partials: Dict[str, type] = INGEST_PARTIALS) -> Dict[str, Any]:
+    """
+    Return the merged ingest partials of the shards, from the dataset cache
+    or rebuilt one shard at a time when the shards' files or the code changed.
+
+    Args:
+        shards: Shard numbers, in dataset order
+        partials: Registry of the aggregated partials
+
+    Returns:
+        Result of `merge_partials`
+    """
+    sources = shard_paths(shards)
+    aggregates = read_cache(_aggregates_name(partials), sources)
+    if aggregates is None:
+        print(f"Rebuilding the aggregates of {len(shards)} shards")
+        aggregates = merge_partials((_shard_aggregates(shard, partials) for shard in shards), partials)
+        write_cache(_aggregates_name(partials), aggregates, sources)
+    return aggregates
+
+
+def _trimmed_columns() -> List[str]:
+    """Columns of the configured shards' trimmed CSVs"""
+    return list(pd.read_csv(shard_paths(SHARDS[:1])[0], nrows=0).columns)
+
+
+def _next_shard() -> int:
+    """Number of the next ingested shard"""
+    shard = max(ingested_shards(), default=INGEST_SHARD_START - 1) + 1
+    if any(os.path.exists(path) for path in shard_paths([shard])):
+        raise FileExistsError(f"Shard {shard} already exists in {RAW_DIR}")
+    return shard
+
+
+def _shard_csvs(trimmed: pd.DataFrame) -> List[str]:
+    """Trimmed and derived CSV text of a batch"""
+    with span("derive_features", rows=len(trimmed)):
+        derived = derive_features(trimmed)
+    return [trimmed.to_csv(index=False), derived.to_csv(index=False)]
+
+
+def _append_shard(
+    shard: int, csvs: List[str], previous: List[int], merged: Dict[str, Any], partials: Dict[str, type]
+) -> None:
+    """
+    Write a batch's files, the merged aggregates and then the manifest, or
+    nothing if any write fails.
+    """
+    paths = shard_paths([shard])
+    try:
+        with span("write_shard"):
+            for path, text in zip(paths, csvs):
+                with open(path, "x", encoding="utf-8", newline="") as f:
+                    f.write(text)
+        write_cache(_aggregates_name(partials), merged, shard_paths(previous + [shard]))
+
+        # The shard joins the dataset only once its files are complete
+        temporary = f"{INGEST_MANIFEST}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"shards": ingested_shards() + [shard]}, f)
+        os.replace(temporary, INGEST_MANIFEST)
+    except BaseException:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+def ingest_batch(
+    path: str, output_dir: str = INGEST_DIR, partials: Optional[Dict[str, type]] = None
+) -> Dict[str, Any]:
+    """
+    Append a batch of trimmed tweets to the dataset and refresh the reports.
+
+    Writes the batch's own report as shard_<n>.json and the refreshed corpus
+    report as corpus.json in `output_dir`.
+
+    Args:
+        path: CSV file with the columns of the `*_trimmed.csv` shards
+        output_dir: Directory of the reports
+        partials: Registry of the aggregated partials; INGEST_PARTIALS by default
+
+    Returns:
+        Dictionary mapping "shard_<n>" and "corpus" to their reports
+
+    Raises:
+        ValueError: If the batch's columns differ from the dataset's
+        RuntimeError: If the VADER lexicon needed for sentiment is missing
+    """
+    partials = INGEST_PARTIALS if partials is None else partials
+    if "sentiment" in partials:
+        require_resources(["vader_lexicon"])
+    columns = _trimmed_columns()
+    with span("read_batch", category="stage"):
+        trimmed = pd.read_csv(path)
+    if set(trimmed.columns) != set(columns):
+        missing = sorted(set(columns) - set(trimmed.columns))
+        extra = sorted(set(trimmed.columns) - set(columns))
+        raise ValueError(f"Batch columns differ from the dataset's: missing {missing}, unexpected {extra}")
+
+    previous = dataset_shards()
+    shard = _next_shard()
+    csvs = _shard_csvs(trimmed[columns])
+    # Parsed back from the CSV text, so the partials match a later rebuild
+    with span(f"shard_{shard}", category="stage"):
+        combined_df = combine_frames(*(pd.read_csv(StringIO(text)) for text in csvs))["combined"]
+        part = build_partials(combined_df, seed=shard, partials=partials)
+    with span("load_aggregates", category="stage"):
+        aggregates = corpus_aggregates(previous, partials)
+    with span("merge_partials", category="stage"):
+        merged = merge_partials([aggregates, part], partials)
+    with span("append_shard", category="stage"):
+        _append_shard(shard, csvs, previous, merged, partials)
+
+    reports = {
+        f"shard_{shard}": {"shards": [shard], **partial_report(part)},
+        "corpus": {"shards": previous + [shard], **partial_report(merged)},
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    for name, report in reports.items():
+        with open(os.path.join(output_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return reports
@@ -9,6 +9,7 @@ addition to generating visualizations.
 """
 
 import json
+import numpy as np
 import pandas as pd
 from typing import Dict, Any
 
@@ -16,12 +17,18 @@ from typing import Dict, Any
 from .eda_network import analyze_networks
 from .eda_nlp import sentiment_analysis, correlation_matrix, analyze_content
 from .eda_basic import (
-    basic_stats, 
+    compute_basic_stats,
     analyze_categorical_features, 
+    analyze_cardinality,
     analyze_numerical_features, 
     analyze_temporal_patterns, 
     analyze_account_behavior
 )
+from .eda_bursts import analyze_bursts
+from .eda_cache import run_analysis
+from .eda_coordination import analyze_coordination
+from .eda_outliers import iqr_outliers
+from .eda_profile import profile_columns
 
 
 def dataset_overview(df: pd.DataFrame) -> Dict[str, Any]:
@@ -34,8 +41,13 @@ def dataset_overview(df: pd.DataFrame) -> Dict[str, Any]:
     Returns:
         Dictionary with dataset overview information
     """
-    # Use the basic_stats function to get comprehensive statistics
-    basic_stats_result = basic_stats(df, "llm_analysis")
+    # Use the basic_stats computation to get comprehensive statistics
+    basic_stats_result, _ = run_analysis(compute_basic_stats, df)
+    # basic_stats has already profiled every column, so this is a cache lookup
+    profile = profile_columns(df)
+    temporal_columns = [
+        col for col in profile if pd.api.types.is_datetime64_any_dtype(df[col])
+    ]
     
     # Create a simplified overview from the comprehensive statistics
     overview = {
@@ -43,16 +55,14 @@ def dataset_overview(df: pd.DataFrame) -> Dict[str, Any]:
         "missing_values": basic_stats_result["missing_values"],
         "column_types": basic_stats_result["data_types"],
         "numerical_columns": [
-            col for col, dtype in basic_stats_result["data_types"].items()
-            if dtype.startswith(("int", "float"))
+            col for col, stats in profile.items()
+            if stats["kind"] == "numeric" and not stats["dtype"].startswith("bool")
         ],
         "categorical_columns": [
-            col for col, dtype in basic_stats_result["data_types"].items()
-            if dtype.startswith(("object", "category"))
-        ],
-        "temporal_columns": [
-            col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])
+            col for col, stats in profile.items()
+            if stats["kind"] == "categorical" and col not in temporal_columns
         ],
+        "temporal_columns": temporal_columns,
         "detailed_stats": basic_stats_result["descriptive_stats"]
     }
     
@@ -64,13 +74,8 @@ def outlier_check(series: pd.Series) -> bool:
     if series.empty or not pd.api.types.is_numeric_dtype(series):
         return False
 
-    q1 = series.quantile(0.25)
-    q3 = series.quantile(0.75)
-    iqr = q3 - q1
-    lower_bound = q1 - 1.5 * iqr
-    upper_bound = q3 + 1.5 * iqr
-
-    return ((series < lower_bound) | (series > upper_bound)).any()
+    block = series.to_numpy(dtype="float64", na_value=np.nan).reshape(-1, 1)
+    return bool(iqr_outliers(block)["count"][0] > 0)
 
 
 def categorical_feature_analysis(df: pd.DataFrame) -> Dict[str, Any]:
@@ -84,8 +89,8 @@ def categorical_feature_analysis(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with categorical feature analysis
     """
     # Use the analyze_categorical_features function from eda_basic.py
-    # This will perform the analysis and generate visualizations
-    categorical_result = analyze_categorical_features(df, "llm_analysis")
+    # The result is reused if the analysis already ran on this dataset
+    categorical_result = analyze_categorical_features(df, "llm_analysis", plots=False)
     
     return categorical_result["categorical_features"]
 
@@ -101,8 +106,8 @@ def numerical_feature_analysis(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with numerical feature analysis
     """
     # Use the analyze_numerical_features function from eda_basic.py
-    # This will perform the analysis and generate visualizations
-    numerical_result = analyze_numerical_features(df, "llm_analysis")
+    # The result is reused if the analysis already ran on this dataset
+    numerical_result = analyze_numerical_features(df, "llm_analysis", plots=False)
     
     return numerical_result["numerical_features"]
 
@@ -118,8 +123,8 @@ def temporal_pattern_analysis(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with temporal pattern analysis
     """
     # Use the analyze_temporal_patterns function from eda_basic.py
-    # This will perform the analysis and generate visualizations
-    temporal_result = analyze_temporal_patterns(df, "llm_analysis")
+    # The result is reused if the analysis already ran on this dataset
+    temporal_result = analyze_temporal_patterns(df, "llm_analysis", plots=False)
     
     return temporal_result
 
@@ -135,10 +140,10 @@ def nlp_feature_analysis(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with NLP feature analysis
     """
     # Get correlation analysis from eda_nlp.py
-    corr_result = correlation_matrix(df, "llm_analysis")
+    corr_result = correlation_matrix(df, "llm_analysis", plots=False)
     
     # Get content analysis from eda_nlp.py
-    content_result = analyze_content(df, "llm_analysis")
+    content_result = analyze_content(df, "llm_analysis", plots=False)
     
     # Set the flag if any NLP features are found
     result = {"has_nlp_features": False}
@@ -184,9 +189,9 @@ def sentiment_analysis_for_llm(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with sentiment analysis results
     """
     # Use the sentiment_analysis function from eda_nlp.py
-    # This will perform the analysis and generate visualizations
+    # The result is reused if the analysis already ran on this dataset
     # The returned result is already in JSON-compatible format
-    result = sentiment_analysis(df, "llm_analysis")
+    result = sentiment_analysis(df, "llm_analysis", plots=False)
     
     return result
 
@@ -202,7 +207,7 @@ def network_analysis_for_llm(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with network analysis results
     """
     # Use the analyze_networks function from eda_network.py
-    network_data = analyze_networks(df)
+    network_data = run_analysis(analyze_networks, df)
     
     # The analyze_networks function has been updated to return JSON-compatible results directly
     return network_data
@@ -219,8 +224,8 @@ def account_behavior_analysis(df: pd.DataFrame) -> Dict[str, Any]:
         Dictionary with account behavior analysis
     """
     # Use the analyze_account_behavior function from eda_basic.py
-    # This will perform the analysis and generate visualizations
-    result = analyze_account_behavior(df, "llm_analysis")
+    # The result is reused if the analysis already ran on this dataset
+    result = analyze_account_behavior(df, "llm_analysis", plots=False)
     
     return result
 
@@ -238,12 +243,15 @@ def generate_llm_summary(df: pd.DataFrame) -> Dict[str, Any]:
     summary = {
         "dataset_overview": dataset_overview(df),
         "categorical_analysis": categorical_feature_analysis(df),
+        "cardinality_analysis": analyze_cardinality(df, "llm_analysis", plots=False),
         "numerical_analysis": numerical_feature_analysis(df),
         "temporal_analysis": temporal_pattern_analysis(df),
+        "burst_analysis": analyze_bursts(df, "llm_analysis", plots=False),
         "nlp_analysis": nlp_feature_analysis(df),
         "sentiment_analysis": sentiment_analysis_for_llm(df),
         "network_analysis": network_analysis_for_llm(df),
         "account_behavior_analysis": account_behavior_analysis(df),
+        "coordination_analysis": run_analysis(analyze_coordination, df, "llm_analysis"),
     }
 
     # Generate metadata
@@ -258,34 +266,42 @@ def generate_llm_summary(df: pd.DataFrame) -> Dict[str, Any]:
 
 
 def save_llm_context(
-    df: pd.DataFrame, output_path: str = "llm_eda_context.json"
-) -> None:
+    df: pd.DataFrame, output_path: str = "llm_eda_context.json", summary: Dict[str, Any] = None
+) -> Dict[str, Any]:
     """
     Generate and save the LLM-interpretable EDA context to a JSON file.
 
     Args:
         df: Dataset DataFrame
         output_path: Path to save the JSON output
+        summary: Precomputed result of `generate_llm_summary`, if available
+
+    Returns:
+        The saved summary
     """
-    summary = generate_llm_summary(df)
+    if summary is None:
+        summary = generate_llm_summary(df)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
 
     print(f"LLM-interpretable EDA context saved to {output_path}")
+    return summary
 
 
-def generate_llm_insights(df: pd.DataFrame) -> Dict[str, Any]:
+def generate_llm_insights(df: pd.DataFrame, summary: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Generate insights from the data in a format suitable for LLMs.
 
     Args:
         df: Dataset DataFrame
+        summary: Precomputed result of `generate_llm_summary`, if available
 
     Returns:
         Dictionary with key insights from the data
     """
-    summary = generate_llm_summary(df)
+    if summary is None:
+        summary = generate_llm_summary(df)
 
     # Extract key patterns and anomalies
     insights = {
@@ -343,6 +359,28 @@ def generate_llm_insights(df: pd.DataFrame) -> Dict[str, Any]:
                 }
             )
 
+    # Report the strongest activity bursts
+    for burst in summary["burst_analysis"].get("category_bursts", [])[:3]:
+        drivers = ", ".join(tag["hashtag"] for tag in burst["top_hashtags"][:3])
+        insights["anomalies"].append(
+            {
+                "feature": "account_category",
+                "description": f"Activity burst in {burst['category']} from {burst['start']} to {burst['end']} "
+                f"(peak {burst['peak_count']} tweets, z={burst['intensity']:.1f}; driven by {drivers or 'no hashtags'})",
+            }
+        )
+
+    # Report the largest groups of synchronized accounts
+    for group in summary["coordination_analysis"].get("groups", [])[:3]:
+        insights["anomalies"].append(
+            {
+                "feature": summary["coordination_analysis"]["account_key"],
+                "description": f"{group['size']} accounts post in sync (mean correlation "
+                f"{group['mean_strength']:.2f}, median lag {group['median_lag_seconds']:.0f}s): "
+                + ", ".join(group["members"][:5]),
+            }
+        )
+
     # Identify sentiment patterns if available
     if summary["sentiment_analysis"]["has_sentiment_data"]:
         sentiment_ratio = summary["sentiment_analysis"]["sentiment_distribution"]
@@ -418,13 +456,24 @@ def generate_llm_insights(df: pd.DataFrame) -> Dict[str, Any]:
     return insights
 
 
-def generate_llm_eda(df, output_path="llm_eda_context.json"):
-    """Generate LLM-interpretable EDA results"""
+def generate_llm_eda(df, output_path="llm_eda_context.json", sampling=None):
+    """
+    Generate LLM-interpretable EDA results.
+
+    Args:
+        df: Dataset DataFrame
+        output_path: Path to save the JSON context
+        sampling: Sampling design and confidence intervals, stored under
+            "sampling" when the frame is a sample
+    """
     print("\nGenerating LLM-interpretable EDA context...")
-    save_llm_context(df, output_path)
+    summary = generate_llm_summary(df)
+    if sampling is not None:
+        summary["sampling"] = sampling
+    summary = save_llm_context(df, output_path, summary)
 
     # Also generate and save insights
-    insights = generate_llm_insights(df)
+    insights = generate_llm_insights(df, summary)
     insights_path = output_path.replace(".json", "_insights.json")
     with open(insights_path, "w", encoding="utf-8") as f:
         json.dump(insights, f, indent=2, ensure_ascii=False)
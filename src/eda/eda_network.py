@@ -5,134 +5,155 @@ such as hashtag co-occurrence networks and mention networks.
 """
 
 import json
-from collections import Counter, defaultdict
+from collections import Counter
 from typing import Dict, Any
 
 import pandas as pd
 import numpy as np
 
+from .eda_cache import run_analysis
 
-def extract_hashtag_network(df: pd.DataFrame) -> Dict[str, Any]:
+
+# Nodes kept in each network, by weight
+NETWORK_NODES = 50
+
+
+def _split_items(items_str):
+    return [item.strip() for item in items_str.split(",")]
+
+
+def count_hashtag_network(df: pd.DataFrame) -> Dict[str, Counter]:
     """
-    Extract hashtag co-occurrence network.
+    Count hashtags and hashtag pairs of tweets with several hashtags.
+
+    Counts of different shards are added with `merge_network_counts`.
 
     Args:
         df: DataFrame with a 'hashtags' column
 
     Returns:
-        Dictionary with hashtag network data
+        Dictionary with "items" (hashtag counts) and "pairs" (co-occurrence
+        counts keyed by sorted tag pairs)
     """
+    counts = {"items": Counter(), "pairs": Counter()}
     if "hashtags" not in df.columns:
-        return {"nodes": [], "edges": [], "has_network": False}
-
-    # Filter rows with hashtags
-    hashtag_rows = df["hashtags"].dropna()
+        return counts
 
-    if hashtag_rows.empty:
-        return {"nodes": [], "edges": [], "has_network": False}
-
-    # Process hashtags
-    all_hashtags = []
-    co_occurrence = defaultdict(int)
-
-    for tags_str in hashtag_rows:
+    for tags_str in df["hashtags"].dropna():
         if not tags_str:
             continue
 
-        tags = [tag.strip() for tag in tags_str.split(",")]
+        tags = _split_items(tags_str)
         if len(tags) > 1:  # Only process rows with multiple hashtags
-            # Add all tags to the list of all hashtags
-            all_hashtags.extend(tags)
+            # Count all tags of the row
+            counts["items"].update(tags)
 
             # Count co-occurrences
             for i, tag1 in enumerate(tags):
                 for tag2 in tags[i + 1 :]:
                     if tag1 and tag2:  # Ensure not empty
                         # Create a sorted tuple of tags to avoid duplicates
-                        edge = tuple(sorted([tag1, tag2]))
-                        co_occurrence[edge] += 1
-
-    # Get top hashtags
-    top_hashtags = [tag for tag, _ in Counter(all_hashtags).most_common(50)]
-
-    # Create nodes and edges for network visualization
-    nodes = [
-        {"id": tag, "weight": count}
-        for tag, count in Counter(all_hashtags).most_common(50)
-    ]
+                        counts["pairs"][tuple(sorted([tag1, tag2]))] += 1
 
-    edges = []
-    for (source, target), weight in co_occurrence.items():
-        if source in top_hashtags and target in top_hashtags:
-            edges.append({"source": source, "target": target, "weight": weight})
-
-    return {"nodes": nodes, "edges": edges, "has_network": len(edges) > 0}
+    return counts
 
 
-def extract_mention_network(df: pd.DataFrame) -> Dict[str, Any]:
+def count_mention_network(df: pd.DataFrame) -> Dict[str, Counter]:
     """
-    Extract mention network.
+    Count mentions, and mention pairs of tweets with several mentions.
 
     Args:
         df: DataFrame with a 'mentions' column
 
     Returns:
-        Dictionary with mention network data
+        Dictionary with "items" (mention counts) and "pairs" (counts of
+        mentions appearing in the same tweet, keyed by sorted pairs)
     """
+    counts = {"items": Counter(), "pairs": Counter()}
     if "mentions" not in df.columns:
-        return {"nodes": [], "edges": [], "has_network": False}
-
-    # Filter rows with mentions
-    mention_rows = df["mentions"].dropna()
-
-    if mention_rows.empty:
-        return {"nodes": [], "edges": [], "has_network": False}
+        return counts
 
-    # Process mentions
-    all_mentions = []
-
-    for mentions_str in mention_rows:
+    for mentions_str in df["mentions"].dropna():
         if not mentions_str:
             continue
 
-        mentions = [mention.strip() for mention in mentions_str.split(",")]
-        all_mentions.extend(mentions)
-
-    # Get mention counts
-    mention_counts = Counter(all_mentions)
-
-    # Create connections between mentions that appear in the same tweet
-    connections = defaultdict(int)
-    for mentions_str in mention_rows:
-        if not mentions_str:
-            continue
-
-        mentions = [mention.strip() for mention in mentions_str.split(",")]
+        mentions = _split_items(mentions_str)
+        counts["items"].update(mentions)
         if len(mentions) > 1:  # Only process rows with multiple mentions
             for i, mention1 in enumerate(mentions):
                 for mention2 in mentions[i + 1 :]:
                     if mention1 and mention2:  # Ensure not empty
                         # Create a sorted tuple of mentions to avoid duplicates
-                        edge = tuple(sorted([mention1, mention2]))
-                        connections[edge] += 1
+                        counts["pairs"][tuple(sorted([mention1, mention2]))] += 1
+
+    return counts
+
+
+def merge_network_counts(counts: Dict[str, Counter], other: Dict[str, Counter]) -> Dict[str, Counter]:
+    """
+    Add the network counts of another shard to `counts`, in place.
+
+    Counters keep keys in first-seen order, so merging shards in order
+    breaks weight ties the same way as counting all of them at once.
+
+    Returns:
+        The merged counts
+    """
+    counts["items"].update(other["items"])
+    counts["pairs"].update(other["pairs"])
+    return counts
 
-    # Select top mentions
-    top_mentions = [mention for mention, _ in mention_counts.most_common(50)]
+
+def network_from_counts(counts: Dict[str, Counter]) -> Dict[str, Any]:
+    """
+    Build a network of the most frequent items and the edges between them.
+
+    Args:
+        counts: Result of `count_hashtag_network` or `count_mention_network`
+
+    Returns:
+        Dictionary with network data
+    """
+    top = counts["items"].most_common(NETWORK_NODES)
+    top_items = {item for item, _ in top}
 
     # Create nodes and edges for network visualization
-    nodes = [
-        {"id": mention, "weight": count}
-        for mention, count in mention_counts.most_common(50)
-    ]
+    nodes = [{"id": item, "weight": count} for item, count in top]
 
     edges = []
-    for (source, target), weight in connections.items():
-        if source in top_mentions and target in top_mentions:
+    for (source, target), weight in counts["pairs"].items():
+        if source in top_items and target in top_items:
             edges.append({"source": source, "target": target, "weight": weight})
 
     return {"nodes": nodes, "edges": edges, "has_network": len(edges) > 0}
 
 
+def extract_hashtag_network(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Extract hashtag co-occurrence network.
+
+    Args:
+        df: DataFrame with a 'hashtags' column
+
+    Returns:
+        Dictionary with hashtag network data
+    """
+    return network_from_counts(count_hashtag_network(df))
+
+
+def extract_mention_network(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Extract mention network.
+
+    Args:
+        df: DataFrame with a 'mentions' column
+
+    Returns:
+        Dictionary with mention network data
+    """
+    return network_from_counts(count_mention_network(df))
+
+
 def analyze_networks(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Analyze network structures in the dataset.
@@ -143,15 +164,21 @@ def analyze_networks(df: pd.DataFrame) -> Dict[str, Any]:
     Returns:
         Dictionary with network analysis results in JSON-compatible format
     """
-    result = {}
+    return summarize_networks(extract_hashtag_network(df), extract_mention_network(df))
 
-    # Extract hashtag network
-    hashtag_network = extract_hashtag_network(df)
-    result["hashtag_network"] = hashtag_network
 
-    # Extract mention network
-    mention_network = extract_mention_network(df)
-    result["mention_network"] = mention_network
+def summarize_networks(hashtag_network: Dict[str, Any], mention_network: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine the hashtag and mention networks with their summary statistics.
+
+    Args:
+        hashtag_network: Result of `network_from_counts` for hashtags
+        mention_network: Result of `network_from_counts` for mentions
+
+    Returns:
+        Dictionary with network analysis results in JSON-compatible format
+    """
+    result = {"hashtag_network": hashtag_network, "mention_network": mention_network}
 
     # Compute summary statistics
     result["summary"] = {
@@ -204,7 +231,7 @@ def save_network_data(df: pd.DataFrame, output_path: str = "network_data.json")
         df: Dataset DataFrame
         output_path: Path to save the JSON output
     """
-    network_data = analyze_networks(df)
+    network_data = run_analysis(analyze_networks, df)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(network_data, f, indent=2, ensure_ascii=False)
@@ -1,183 +1,311 @@
 """NLP EDA functions"""
 
+import re
 from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import numpy as np
-from wordcloud import WordCloud
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from .eda_helpers import clean_text
+import pandas as pd
+from ..tracing import span
+from .eda_cache import run_analysis
+from .eda_covariance import CovarianceAccumulator, top_correlated_pairs
+from .eda_figures import figure, histogram_data, box_data, mean_ci
+from .eda_groupby import get_group_index
+from .eda_helpers import clean_text, frame_cache
+from .eda_render import render_figures
+from .eda_resources import sentiment_analyzer
+
+# Words kept for a word cloud; the cloud itself draws at most 200
+WORDCLOUD_WORDS = 400
+
+# Word tokens as the word cloud library splits them
+_WORD = re.compile(r"\w[\w']+")
 
-def correlation_matrix(df, name):
+NLP_FEATURES = [
+    "count_hashtags",
+    "count_mentions",
+    "word_count",
+    "text_length",
+    "count_emojis",
+    "count_special_characters",
+    "all_words_caps",
+    "starts_with_hashtag",
+    "starts_with_mention",
+]
+
+# Special formats reported by the content analysis
+SPECIAL_FORMATS = ["starts_with_hashtag", "starts_with_mention"]
+
+# Texts cleaned and then scored at a time, so the two steps are traced
+# separately without holding every cleaned text
+SENTIMENT_CHUNK = 100_000
+
+def correlation_matrix(df, name, method="pearson", plots=True):
     """
     Analyze NLP-specific features.
+
+    Correlations are accumulated chunk by chunk with a CovarianceAccumulator,
+    so the feature columns are never copied as a whole. Rows with a missing
+    feature value are skipped.
     
     Args:
         df: DataFrame with NLP features
         name: Name prefix for output files
+        method: "pearson", or "spearman" for per-chunk rank correlation
+        plots: Render the figures
         
     Returns:
         Dictionary with NLP feature correlations in JSON-compatible format
     """
-    nlp_features = [
-        "count_hashtags",
-        "count_mentions",
-        "word_count",
-        "text_length",
-        "count_emojis",
-        "count_special_characters",
-        "all_words_caps",
-        "starts_with_hashtag",
-        "starts_with_mention",
-    ]
-    
+    result, figures = run_analysis(compute_correlation_matrix, df, method=method)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_correlation_matrix(df, method="pearson"):
+    """
+    Compute NLP feature correlations; see `correlation_matrix`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    features = [col for col in NLP_FEATURES if col in df.columns]
+    if len(df) == 0 or len(features) < 2:
+        return {"has_nlp_correlations": False}, []
+
+    accumulator = CovarianceAccumulator(features, spearman=(method == "spearman"))
+    accumulator.update_frame(df)
+    return summarize_correlations(accumulator, method)
+
+
+def summarize_correlations(accumulator, method="pearson"):
+    """
+    Report NLP feature correlations from a covariance accumulator.
+
+    The accumulator may cover one frame or be merged from shards.
+
+    Args:
+        accumulator: CovarianceAccumulator over the NLP features
+        method: "pearson", or "spearman" for an accumulator with ranks
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     # Initialize result dictionary
     result = {"has_nlp_correlations": False}
+    figures = []
 
-    # Create a correlation matrix for NLP features
-    nlp_corr_df = df[[col for col in nlp_features if col in df.columns]].copy()
-
-    if not nlp_corr_df.empty and len(nlp_corr_df.columns) > 1:
-        # Generate the visualization
-        plt.figure(figsize=(12, 10))
-        corr = nlp_corr_df.corr()
-        mask = np.triu(np.ones_like(corr, dtype=bool))
-        sns.heatmap(
-            corr, mask=mask, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5
-        )
-        plt.title("Correlation Matrix of NLP Features")
-        plt.tight_layout()
-        plt.savefig(f"plots/{name}_nlp_feature_correlation.png")
-        plt.close()
-        
-        # Add correlation data to result
-        result["has_nlp_correlations"] = True
-        result["features"] = list(nlp_corr_df.columns)
-        result["correlation_matrix"] = {}
-        
-        # Create a dictionary of correlation values
-        for col1 in nlp_corr_df.columns:
-            result["correlation_matrix"][col1] = {}
-            for col2 in nlp_corr_df.columns:
-                result["correlation_matrix"][col1][col2] = float(corr.loc[col1, col2])
-                
-        # Find top correlations
-        top_correlations = []
-        for i, col1 in enumerate(nlp_corr_df.columns):
-            for j, col2 in enumerate(nlp_corr_df.columns):
-                if i < j:  # Only include each pair once
-                    correlation = float(corr.loc[col1, col2])
-                    if abs(correlation) > 0.3:  # Only include meaningful correlations
-                        top_correlations.append({
-                            "feature1": col1,
-                            "feature2": col2,
-                            "correlation": correlation
-                        })
-        
-        # Sort by absolute correlation value
-        top_correlations.sort(key=lambda x: abs(x["correlation"]), reverse=True)
-        result["top_correlations"] = top_correlations[:10]  # Include top 10 correlations
+    if accumulator.count == 0:
+        return result, figures
+
+    features = accumulator.features
+    matrix = accumulator.spearman_correlation() if method == "spearman" else accumulator.pearson()
+
+    figures.append(figure(
+        "heatmap", "nlp_feature_correlation",
+        labels=features,
+        matrix=matrix.tolist(),
+        title="Correlation Matrix of NLP Features",
+        figsize=(12, 10),
+    ))
+    
+    # Add correlation data to result
+    result["has_nlp_correlations"] = True
+    result["method"] = method
+    result["features"] = features
+    result["correlation_matrix"] = {
+        col1: {col2: float(value) for col2, value in zip(features, row)}
+        for col1, row in zip(features, matrix)
+    }
+            
+    # Top 10 meaningful correlations, each pair once, by absolute value
+    result["top_correlations"] = top_correlated_pairs(matrix, features, threshold=0.3, k=10)
         
-    return result
+    return result, figures
 
 
-def analyze_content(df, name):
+def analyze_content(df, name, plots=True):
     """
     Analyze the textual content of tweets.
     
     Args:
         df: DataFrame with text content
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with content analysis results in JSON-compatible format
     """
+    result, figures = run_analysis(compute_content, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def compute_content(df):
+    """
+    Compute word, hashtag and special-format statistics with word cloud frequencies.
+
+    Args:
+        df: DataFrame with text content
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    return summarize_content_counts(content_counts(df))
+
+
+def content_counts(df):
+    """
+    Count words, hashtags and special formats of tweets.
+
+    The counts of different shards are summed with `merge_content_counts`.
+
+    Args:
+        df: DataFrame with text content
+
+    Returns:
+        Dictionary with the number of "texts" and "hashtag_rows", Counters of
+        "cloud_words", "words" and "hashtags", and per special format the
+        "sum", "zeros", "ones" and "total" of its indicator column
+    """
+    counts = {
+        "texts": 0,
+        "cloud_words": Counter(),
+        "words": Counter(),
+        "hashtag_rows": 0,
+        "hashtags": Counter(),
+        "special_formats": {},
+    }
+
+    if "content" in df.columns:
+        texts = df["content"].dropna()
+        counts["texts"] = len(texts)
+        text = " ".join(texts.astype(str)).lower()
+        counts["cloud_words"].update(_WORD.findall(text))
+        counts["words"].update(text.split())
+
+    if "hashtags" in df.columns:
+        tag_lists = df["hashtags"].dropna()
+        counts["hashtag_rows"] = len(tag_lists)
+        counts["hashtags"].update(tag for tags in tag_lists for tag in tags.split(", ") if tag)
+
+    for feature in SPECIAL_FORMATS:
+        if feature in df.columns:
+            values = df[feature]
+            counts["special_formats"][feature] = {
+                "sum": int(values.sum()),
+                "zeros": int((values == 0).sum()),
+                "ones": int((values == 1).sum()),
+                "total": len(values),
+            }
+
+    return counts
+
+
+def merge_content_counts(counts, other):
+    """Add the content counts of another shard to `counts`, in place, and return them"""
+    for key in ("texts", "hashtag_rows"):
+        counts[key] += other[key]
+    for key in ("cloud_words", "words", "hashtags"):
+        counts[key].update(other[key])
+    for feature, stats in other["special_formats"].items():
+        merged = counts["special_formats"].setdefault(feature, dict.fromkeys(stats, 0))
+        for key, value in stats.items():
+            merged[key] += value
+    return counts
+
+
+def summarize_content_counts(counts):
+    """
+    Report content statistics from the counts of `content_counts`.
+
+    Args:
+        counts: Content counts of one frame or merged over shards
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     # Initialize result dictionary
     result = {
         "has_content_data": False,
         "has_hashtag_data": False,
         "has_special_format_data": False
     }
+    figures = []
 
     # Content analysis
-    if "content" in df.columns and not df["content"].dropna().empty:
+    if counts["texts"] > 0:
         # Analyze text content
         result["has_content_data"] = True
         
-        # Generate word cloud for visualization
-        text = " ".join(df["content"].dropna().astype(str))
-        if len(text.strip().split()) > 0:  # Ensure at least one word
-            plt.figure(figsize=(12, 12))
-            wordcloud = WordCloud(
-                width=800, height=800, background_color="white", min_font_size=10
-            ).generate(text)
-            plt.imshow(wordcloud, interpolation="bilinear")
-            plt.axis("off")
-            plt.tight_layout(pad=0)
-            plt.savefig(f"plots/{name}_content_wordcloud.png")
-            plt.close()
+        # Word frequencies for the word cloud
+        if counts["words"]:  # Ensure at least one word
+            cloud_words = counts["cloud_words"].most_common(WORDCLOUD_WORDS)
+            figures.append(figure(
+                "wordcloud", "content_wordcloud", frequencies=dict(cloud_words), figsize=(12, 12)
+            ))
             
             # Extract common words for JSON
-            words = text.lower().split()
-            word_counts = Counter(words).most_common(20)
+            word_counts = counts["words"].most_common(20)
             result["top_words"] = [{"word": word, "count": count} for word, count in word_counts]
         else:
             print("Skipping word cloud for content: No words to process.")
 
     # Hashtag analysis
-    if "hashtags" in df.columns and not df["hashtags"].dropna().empty:
-        all_hashtags = [
-            tag for tags in df["hashtags"].dropna() for tag in tags.split(", ") if tag
-        ]
-        if all_hashtags:  # Ensure there's data
+    if counts["hashtag_rows"] > 0:
+        hashtag_counts = counts["hashtags"]
+        if hashtag_counts:  # Ensure there's data
             result["has_hashtag_data"] = True
             
-            # Generate visualizations
-            tags_string = ", ".join(all_hashtags).replace("#", "")
-            wordcloud = WordCloud(
-                width=800, height=800, background_color="white", min_font_size=10
-            ).generate(tags_string)
-            plt.imshow(wordcloud, interpolation="bilinear")
-            plt.axis("off")
-            plt.tight_layout(pad=0)
-            plt.savefig(f"plots/{name}_hashtags_wordcloud.png")
-            plt.close()
+            cloud_tags = Counter()
+            for tag, count in hashtag_counts.items():
+                cloud_tags[tag.replace("#", "")] += count
+            figures.append(figure(
+                "wordcloud", "hashtags_wordcloud",
+                frequencies=dict(cloud_tags.most_common(WORDCLOUD_WORDS)),
+            ))
             
             # Add top hashtags to result
-            top_hashtags = Counter(all_hashtags).most_common(20)
+            top_hashtags = hashtag_counts.most_common(20)
             result["top_hashtags"] = [{"hashtag": tag, "count": count} for tag, count in top_hashtags]
             
             if top_hashtags:
-                plt.figure(figsize=(12, 8))
-                hashtag_df = pd.DataFrame(top_hashtags, columns=["Hashtag", "Count"])
-                sns.barplot(x="Count", y="Hashtag", data=hashtag_df)
-                plt.title("Top 20 Hashtags")
-                plt.tight_layout()
-                plt.savefig(f"plots/{name}_top_hashtags.png")
-                plt.close()
+                figures.append(figure(
+                    "bar", "top_hashtags",
+                    labels=[tag for tag, _ in top_hashtags],
+                    values=[count for _, count in top_hashtags],
+                    horizontal=True,
+                    title="Top 20 Hashtags",
+                    xlabel="Count",
+                    ylabel="Hashtag",
+                    figsize=(12, 8),
+                ))
         else:
             print("Skipping hashtags word cloud: No hashtags to process.")
 
     # Analyse hashtag and mention usage
     special_format_stats = {}
-    for feature in ["starts_with_hashtag", "starts_with_mention"]:
-        if feature in df.columns:
+    for feature in SPECIAL_FORMATS:
+        if feature in counts["special_formats"]:
             result["has_special_format_data"] = True
+            stats = counts["special_formats"][feature]
             
-            # Generate visualization
-            plt.figure(figsize=(10, 6))
-            counts = df[feature].map({0: "No", 1: "Yes"}).value_counts()
-            counts.plot(kind="pie", autopct="%1.1f%%")
-            plt.title(f'Proportion of Tweets that {feature.replace("_", " ").title()}')
-            plt.ylabel("")
-            plt.tight_layout()
-            plt.savefig(f"plots/{name}_{feature}_pie.png")
-            plt.close()
+            # Pie slices in descending order, as from value_counts
+            slices = sorted(
+                [(label, stats[key]) for label, key in (("No", "zeros"), ("Yes", "ones")) if stats[key]],
+                key=lambda item: -item[1],
+            )
+            figures.append(figure(
+                "pie", f"{feature}_pie",
+                labels=[label for label, _ in slices],
+                values=[count for _, count in slices],
+                title=f'Proportion of Tweets that {feature.replace("_", " ").title()}',
+                figsize=(10, 6),
+            ))
             
             # Add stats to result
-            yes_count = int(df[feature].sum())
-            total_count = len(df[feature])
+            yes_count = stats["sum"]
+            total_count = stats["total"]
             special_format_stats[feature] = {
                 "yes_count": yes_count,
                 "no_count": total_count - yes_count,
@@ -187,103 +315,166 @@ def analyze_content(df, name):
     if result["has_special_format_data"]:
         result["special_format_stats"] = special_format_stats
 
-    return result
+    return result, figures
 
 
-def sentiment_analysis(df, name):
+def sentiment_analysis(df, name, plots=True):
     """
     Analyze the sentiment of the tweets.
     
     Args:
         df: DataFrame with a 'content' column
         name: Name prefix for output files
+        plots: Render the figures
         
     Returns:
         Dictionary with sentiment analysis results in JSON-compatible format
     """
+    result, figures = run_analysis(compute_sentiment, df)
+    if plots:
+        render_figures(figures, name)
+    return result
+
+
+def score_sentiment(content):
+    """
+    Score texts with the VADER compound polarity of their cleaned text.
+
+    Args:
+        content: Series of tweet texts
+
+    Returns:
+        float64 array of compound scores in [-1, 1]
+    """
+    analyzer = sentiment_analyzer()
+    scores = np.empty(len(content), dtype="float64")
+    for start in range(0, len(content), SENTIMENT_CHUNK):
+        chunk = content.iloc[start:start + SENTIMENT_CHUNK]
+        with span("sentiment_clean", rows=len(chunk)):
+            cleaned = [clean_text(text) for text in chunk]
+        with span("sentiment_score", rows=len(chunk)):
+            scores[start:start + len(chunk)] = [
+                analyzer.polarity_scores(text)["compound"] for text in cleaned
+            ]
+    return scores
+
+
+def attach_sentiment(df, scores):
+    """Attach sentiment scores computed elsewhere to a frame, for `get_sentiment`"""
+    frame_cache(df)["sentiment"] = pd.Series(scores, index=df.index, name="sentiment")
+
+
+def get_sentiment(df):
+    """
+    Return the sentiment score of every tweet, scoring once per frame.
+
+    The frame itself is not modified.
+
+    Args:
+        df: DataFrame with a 'content' column
+
+    Returns:
+        Series of compound scores aligned with the frame
+    """
+    cache = frame_cache(df)
+    if "sentiment" not in cache:
+        attach_sentiment(df, score_sentiment(df["content"]))
+    return cache["sentiment"]
+
+
+def _sentiment_by(df, sentiment, column, file, title, xlabel):
+    """Mean sentiment per group, and its bar figure with 95% confidence intervals"""
+    stats = get_group_index(df, column).aggregate(
+        sentiment.to_frame(), ["sentiment"], ["mean", "std", "count"]
+    )["sentiment"]
+    return stats["mean"], figure(
+        "bar", file,
+        labels=[str(label) for label in stats.index],
+        **mean_ci(stats["mean"], stats["std"], stats["count"]),
+        title=title,
+        xlabel=xlabel,
+        ylabel="Sentiment Score",
+    )
+
+
+def compute_sentiment(df):
+    """
+    Score tweet sentiment and compute its distribution and group means.
+
+    Args:
+        df: DataFrame with a 'content' column
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
     if "content" not in df.columns:
         raise ValueError("DataFrame must have a 'content' column")
     
     # Initialize result dictionary
     result = {"has_sentiment_data": False}
+    figures = []
     
-    analyzer = SentimentIntensityAnalyzer()
-    df["cleaned_text"] = df["content"].apply(clean_text)
-    df["sentiment"] = df["cleaned_text"].apply(
-        lambda x: analyzer.polarity_scores(x)["compound"]
-    )
+    sentiment = get_sentiment(df)
     
-    if not df.empty and not df["sentiment"].dropna().empty:
+    if not df.empty and not sentiment.dropna().empty:
         # Set sentiment data flag to true
         result["has_sentiment_data"] = True
         
         # Add sentiment distribution statistics
         result["sentiment_distribution"] = {
-            "mean": float(df["sentiment"].mean()),
-            "median": float(df["sentiment"].median()),
-            "std": float(df["sentiment"].std()),
-            "positive_ratio": float((df["sentiment"] > 0.05).mean()),
-            "neutral_ratio": float((df["sentiment"].between(-0.05, 0.05)).mean()),
-            "negative_ratio": float((df["sentiment"] < -0.05).mean()),
+            "mean": float(sentiment.mean()),
+            "median": float(sentiment.median()),
+            "std": float(sentiment.std()),
+            "positive_ratio": float((sentiment > 0.05).mean()),
+            "neutral_ratio": float((sentiment.between(-0.05, 0.05)).mean()),
+            "negative_ratio": float((sentiment < -0.05).mean()),
         }
         
+        # Histogram
+        figures.append(figure(
+            "hist", "sentiment_histogram",
+            **histogram_data(sentiment.to_numpy(dtype="float64", na_value=float("nan")), bins=20, kde=True),
+            title="Sentiment Distribution",
+            xlabel="Sentiment Score",
+            ylabel="Frequency",
+            figsize=(10, 6),
+        ))
+
         # Add category-based sentiment if available
         if "account_category" in df.columns:
-            sentiment_by_category = df.groupby("account_category")["sentiment"].mean().to_dict()
+            sentiment_by_category, bar = _sentiment_by(
+                df, sentiment, "account_category", "sentiment_by_category",
+                "Sentiment by Account Category", "Account Category",
+            )
+            figures.append(bar)
             result["sentiment_by_category"] = {
                 str(k): float(v) for k, v in sentiment_by_category.items()
             }
+        else:
+            print("account_category column not found, skipping bar plot.")
         
         # Add region-based sentiment if available
         if "region" in df.columns:
-            sentiment_by_region = df.groupby("region")["sentiment"].mean().to_dict()
+            sentiment_by_region, bar = _sentiment_by(
+                df, sentiment, "region", "sentiment_by_region", "Sentiment by Region", "Region"
+            )
+            figures.append(bar)
             result["sentiment_by_region"] = {
                 str(k): float(v) for k, v in sentiment_by_region.items()
             }
-        
-        # Histogram
-        plt.figure(figsize=(10, 6))
-        sns.histplot(df["sentiment"], bins=20, kde=True)
-        plt.title("Sentiment Distribution")
-        plt.xlabel("Sentiment Score")
-        plt.ylabel("Frequency")
-        plt.savefig(f"plots/{name}_sentiment_histogram.png")
-        plt.close()
-        
-        # Bar plot by account category
-        if "account_category" in df.columns:
-            plt.figure(figsize=(12, 6))
-            sns.barplot(x="account_category", y="sentiment", data=df)
-            plt.title("Sentiment by Account Category")
-            plt.xlabel("Account Category")
-            plt.ylabel("Sentiment Score")
-            plt.savefig(f"plots/{name}_sentiment_by_category.png")
-            plt.close()
-        else:
-            print("account_category column not found, skipping bar plot.")
-            
-        # Bar plot by region
-        if "region" in df.columns:
-            plt.figure(figsize=(12, 6))
-            sns.barplot(x="region", y="sentiment", data=df)
-            plt.title("Sentiment by Region")
-            plt.xlabel("Region")
-            plt.ylabel("Sentiment Score")
-            plt.savefig(f"plots/{name}_sentiment_by_region.png")
-            plt.close()
         else:
             print("region column not found, skipping bar plot.")
-            
+
         # Outlier analysis
-        if "sentiment" in df.columns:
-            plt.figure(figsize=(10, 6))
-            sns.boxplot(x="sentiment", data=df)
-            plt.title("Outlier Analysis")
-            plt.savefig(f"plots/{name}_outlier_analysis.png")
-            plt.close()
-        else:
-            print("sentiment column not found, skipping outlier analysis.")
+        figures.append(figure(
+            "box", "outlier_analysis",
+            stats=box_data(sentiment.to_numpy(dtype="float64", na_value=float("nan"))),
+            title="Outlier Analysis",
+            xlabel="sentiment",
+            figsize=(10, 6),
+        ))
     else:
         print("DataFrame is empty or has no sentiment data, no plots generated.")
     
-    return result
+    return result, figures
+
@@ -0,0 +1,174 @@
+"""
+Batched IQR outlier detection for EDA.
+
+All functions work on a 2-D block of numerical features (rows x features),
+computing quartiles for every column at once and counting outliers with
+vectorized comparisons instead of building filtered sub-DataFrames.
+"""
+
+import warnings
+from typing import Dict, Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rows compared per step when counting, to bound the boolean temporaries
+_COUNT_CHUNK_ROWS = 1_000_000
+
+
+def numeric_block(df: pd.DataFrame, features: Iterable[str]) -> np.ndarray:
+    """
+    Stack numerical columns into one float64 array with NaN for missing values.
+
+    Args:
+        df: DataFrame with the features
+        features: Columns to stack
+
+    Returns:
+        2-D array of shape (rows, features)
+    """
+    return df[list(features)].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def column_quartiles(block: np.ndarray):
+    """
+    Compute the first and third quartile of every column in one call.
+
+    Args:
+        block: 2-D array of shape (rows, features)
+
+    Returns:
+        Tuple of arrays (q1, q3), NaN for columns without values
+    """
+    if block.shape[0] == 0:
+        empty = np.full(block.shape[1], np.nan)
+        return empty, empty.copy()
+    # np.quantile partitions in C; the NaN-aware variant loops per column
+    quantile = np.nanquantile if np.isnan(block).any() else np.quantile
+    with warnings.catch_warnings():
+        # All-NaN columns yield NaN quartiles, which callers treat as "no data"
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q1, q3 = quantile(block, [0.25, 0.75], axis=0)
+    return q1, q3
+
+
+def count_outliers(block: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Count values outside [lower, upper] in every column.
+
+    Args:
+        block: 2-D array of shape (rows, features)
+        lower: Lower bound per column (or per row and column)
+        upper: Upper bound per column (or per row and column)
+
+    Returns:
+        int64 array with one count per column
+    """
+    counts = np.zeros(block.shape[1], dtype=np.int64)
+    for start in range(0, block.shape[0], _COUNT_CHUNK_ROWS):
+        rows = slice(start, start + _COUNT_CHUNK_ROWS)
+        chunk = block[rows]
+        lo = lower[rows] if np.ndim(lower) == 2 else lower
+        hi = upper[rows] if np.ndim(upper) == 2 else upper
+        counts += np.count_nonzero((chunk < lo) | (chunk > hi), axis=0)
+    return counts
+
+
+def iqr_outliers(
+    block: np.ndarray,
+    q1: Optional[np.ndarray] = None,
+    q3: Optional[np.ndarray] = None,
+    whisker: float = 1.5,
+) -> Dict[str, np.ndarray]:
+    """
+    Detect IQR outliers in every column of a block.
+
+    Args:
+        block: 2-D array of shape (rows, features)
+        q1: Precomputed first quartiles, computed if omitted
+        q3: Precomputed third quartiles, computed if omitted
+        whisker: IQR multiplier for the bounds
+
+    Returns:
+        Dictionary of per-column arrays: q1, q3, lower_bound, upper_bound,
+        count (outliers) and valid (non-missing values)
+    """
+    if q1 is None or q3 is None:
+        q1, q3 = column_quartiles(block)
+    q1 = np.asarray(q1, dtype="float64")
+    q3 = np.asarray(q3, dtype="float64")
+    iqr = q3 - q1
+    lower = q1 - whisker * iqr
+    upper = q3 + whisker * iqr
+    return {
+        "q1": q1,
+        "q3": q3,
+        "lower_bound": lower,
+        "upper_bound": upper,
+        "count": count_outliers(block, lower, upper),
+        "valid": np.count_nonzero(~np.isnan(block), axis=0),
+    }
+
+
+def grouped_iqr_outliers(
+    block: np.ndarray, groups, whisker: float = 1.5
+) -> Dict[Any, Dict[str, np.ndarray]]:
+    """
+    Detect IQR outliers with separate bounds for every group.
+
+    Rows are ordered by group once. Each column is then gathered in that
+    order on its own, so every group is a contiguous slice of one column and
+    at most one column is copied at a time.
+
+    Args:
+        block: 2-D array of shape (rows, features)
+        groups: Group label per row (e.g. account_category); missing labels are skipped
+        whisker: IQR multiplier for the bounds
+
+    Returns:
+        Dictionary mapping each group label to the arrays from `iqr_outliers`
+    """
+    codes, labels = pd.factorize(np.asarray(groups, dtype=object), sort=True)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(len(labels)), side="left")
+    ends = np.searchsorted(sorted_codes, np.arange(len(labels)), side="right")
+
+    columns = {label: [] for label in labels}
+    for i in range(block.shape[1]):
+        column = block[order, i]
+        for label, start, end in zip(labels, starts, ends):
+            columns[label].append(iqr_outliers(column[start:end, None], whisker=whisker))
+    return {
+        label: {key: np.concatenate([outliers[key] for outliers in parts]) for key in parts[0]}
+        for label, parts in columns.items()
+        if parts
+    }
+
+
+def outlier_table(
+    features: Iterable[str], outliers: Dict[str, np.ndarray]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert `iqr_outliers` arrays into the JSON layout used by the EDA reports.
+
+    Args:
+        features: Feature names in block column order
+        outliers: Result of `iqr_outliers`
+
+    Returns:
+        Dictionary mapping feature names to count, percentage and bounds
+    """
+    table = {}
+    for i, feature in enumerate(features):
+        valid = int(outliers["valid"][i])
+        if valid == 0:
+            continue
+        count = int(outliers["count"][i])
+        table[feature] = {
+            "count": count,
+            "percentage": float(count / valid * 100),
+            "lower_bound": float(outliers["lower_bound"][i]),
+            "upper_bound": float(outliers["upper_bound"][i]),
+        }
+    return table
@@ -0,0 +1,595 @@
+"""
+Mergeable partial results of the EDA analyses, and per-shard runs.
+
+A partial keeps what an analysis reports from instead of the report: value
+counts, sums, quantile sketches, HyperLogLog registers, covariance moments,
+rollup cubes and co-occurrence counters. Partials built on different shards
+merge, and a merged partial reports on all of their rows. `analyze_shards`
+builds the partials of every shard in worker processes, then writes one
+JSON report per shard and one for the whole corpus from a single run.
+
+Counts, rollups and covariances merge exactly. Quantiles and distinct
+counts come from sketches, so the numerical statistics, the tweet-level
+follower medians and the distinct counts are approximate and flagged as
+such. Bursts and coordination are not covered: they look at whole time
+series, and stay in the full `eda` run. Sentiment is covered by
+INGEST_PARTIALS only, as scoring every shard on each `shards` run is slow.
+"""
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..tracing import add_events, collect_events, span, start_trace, tracing
+from ..utils import dataset_shards, load_data, read_cache, shard_paths, write_cache
+from .eda_accounts import category_totals, get_account_profiles
+from .eda_basic import (
+    CATEGORICAL_FEATURES,
+    LIST_COLUMNS,
+    NUMERICAL_FEATURES,
+    month_key,
+    summarize_account_behavior,
+    summarize_categorical_counts,
+    summarize_numerical_sketches,
+    summarize_temporal_rollup,
+)
+from .eda_covariance import CovarianceAccumulator
+from .eda_groupby import get_group_index
+from .eda_helpers import account_key
+from .eda_network import (
+    count_hashtag_network,
+    count_mention_network,
+    merge_network_counts,
+    network_from_counts,
+    summarize_networks,
+)
+from .eda_nlp import (
+    NLP_FEATURES,
+    content_counts,
+    get_sentiment,
+    merge_content_counts,
+    summarize_content_counts,
+    summarize_correlations,
+)
+from .eda_rollup import TimeRollup, get_rollup
+from .eda_sketch import (
+    GroupedHyperLogLog,
+    HyperLogLog,
+    QuantileSketch,
+    distinct_counts_by_group,
+    split_list_column,
+)
+
+# Default number of worker processes, capped at the CPU count and shard count
+SHARD_WORKERS = 4
+
+SHARD_DIR = "plots/shards"
+
+# Columns counted by the cardinality partial, besides LIST_COLUMNS
+DISTINCT_COLUMNS = ["content", "region", "language", "account_type", "account_category"]
+
+
+class CategoricalPartial:
+    """Value counts of the categorical features"""
+
+    def __init__(self):
+        self.counts: Dict[str, pd.Series] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "CategoricalPartial":
+        partial = cls()
+        for feature in CATEGORICAL_FEATURES:
+            if feature in df.columns:
+                partial.counts[feature] = get_group_index(df, feature).size()
+        return partial
+
+    def merge(self, other: "CategoricalPartial") -> "CategoricalPartial":
+        for feature, counts in other.counts.items():
+            if feature in self.counts:
+                counts = self.counts[feature].add(counts, fill_value=0).astype("int64")
+            self.counts[feature] = counts
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        return summarize_categorical_counts(self.counts)[0]
+
+
+class CardinalityPartial:
+    """HyperLogLog counters of distinct values, overall and per category and month"""
+
+    def __init__(self):
+        self.counters: Dict[str, HyperLogLog] = {}
+        self.by_category_month: Optional[GroupedHyperLogLog] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "CardinalityPartial":
+        partial = cls()
+        for column in DISTINCT_COLUMNS:
+            if column in df.columns:
+                partial.counters[column] = HyperLogLog().update(df[column])
+        for column in LIST_COLUMNS:
+            if column in df.columns:
+                partial.counters[column] = HyperLogLog().update(split_list_column(df[column]))
+
+        month = month_key(df)
+        if "hashtags" in df.columns and "account_category" in df.columns and month is not None:
+            partial.by_category_month = distinct_counts_by_group(
+                df, "hashtags", ["account_category", month], list_column=True
+            )
+        return partial
+
+    def merge(self, other: "CardinalityPartial") -> "CardinalityPartial":
+        for column, counter in other.counters.items():
+            merged = self.counters.setdefault(column, HyperLogLog(counter.precision))
+            merged.merge(counter)
+        if other.by_category_month is not None:
+            if self.by_category_month is None:
+                self.by_category_month = GroupedHyperLogLog(other.by_category_month.precision)
+            self.by_category_month.merge(other.by_category_month)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        result = {
+            "distinct_counts": {column: counter.count() for column, counter in self.counters.items()},
+            "approximate": True,
+        }
+        if self.by_category_month is not None:
+            by_category = {}
+            for (category, period), count in sorted(self.by_category_month.counts().items()):
+                by_category.setdefault(str(category), {})[str(period)] = int(count)
+            result["distinct_hashtags_by_category_month"] = by_category
+        return result
+
+
+def _sketches(df: pd.DataFrame, features: List[str], seed) -> Dict[str, QuantileSketch]:
+    """One sketch per feature; `seed` is None or a tuple extended by the feature position"""
+    return {
+        feature: QuantileSketch(seed=None if seed is None else [*seed, i]).update(
+            df[feature].to_numpy(dtype="float64", na_value=float("nan"))
+        )
+        for i, feature in enumerate(features)
+    }
+
+
+def _merge_sketches(sketches: Dict[str, QuantileSketch], other: Dict[str, QuantileSketch]) -> None:
+    for feature, sketch in other.items():
+        sketches.setdefault(feature, QuantileSketch(k=sketch.k)).merge(sketch)
+
+
+class NumericalPartial:
+    """Quantile sketches of the numerical features, overall and per account category"""
+
+    def __init__(self):
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self.category_sketches: Dict[Any, Dict[str, QuantileSketch]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "NumericalPartial":
+        partial = cls()
+        features = [feature for feature in NUMERICAL_FEATURES if feature in df.columns]
+        partial.sketches = _sketches(df, features, None if seed is None else (seed, 0))
+        if features and "account_category" in df.columns:
+            for i, (category, group) in enumerate(df.groupby("account_category", sort=True)):
+                category_seed = None if seed is None else (seed, 1, i)
+                partial.category_sketches[category] = _sketches(group, features, category_seed)
+        return partial
+
+    def merge(self, other: "NumericalPartial") -> "NumericalPartial":
+        _merge_sketches(self.sketches, other.sketches)
+        for category, sketches in other.category_sketches.items():
+            _merge_sketches(self.category_sketches.setdefault(category, {}), sketches)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        return summarize_numerical_sketches(self.sketches, self.category_sketches)
+
+
+class TemporalPartial:
+    """Rollup cube of the dated tweets"""
+
+    def __init__(self):
+        self.has_dates = False
+        self.cube = TimeRollup()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "TemporalPartial":
+        partial = cls()
+        if "publish_date" in df.columns and not df["publish_date"].dropna().empty:
+            partial.has_dates = True
+            partial.cube = get_rollup(df)
+        return partial
+
+    def merge(self, other: "TemporalPartial") -> "TemporalPartial":
+        if other.has_dates:
+            self.has_dates = True
+            self.cube.merge(other.cube)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        if not self.has_dates:
+            return {"has_temporal_data": False}
+        return summarize_temporal_rollup(self.cube)[0]
+
+
+class AccountBehaviorPartial:
+    """
+    Tweet and retweet totals per account category, with follower sketches
+    per category (tweet level) or each account's latest snapshot (account level)
+    """
+
+    def __init__(self):
+        self.totals: Optional[pd.DataFrame] = None
+        self.level: Optional[str] = None
+        self.follower_sketches: Dict[Any, Dict[str, QuantileSketch]] = {}
+        self.snapshots: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "AccountBehaviorPartial":
+        partial = cls()
+        if "account_category" not in df.columns:
+            return partial
+        profiles = get_account_profiles(df)
+        if "retweet" in df.columns:
+            partial.totals = category_totals(profiles)[["tweets", "retweets"]]
+
+        if "followers" in df.columns and "following" in df.columns:
+            if account_key(df) in (None, "account_type"):
+                partial.level = "tweet"
+                for i, (category, group) in enumerate(df.groupby("account_category", sort=True)):
+                    category_seed = None if seed is None else (seed, 2, i)
+                    partial.follower_sketches[category] = _sketches(
+                        group, ["followers", "following"], category_seed
+                    )
+            else:
+                partial.level = "account"
+                partial.snapshots = profiles[["last_seen", "followers_last", "following_last"]]
+        return partial
+
+    def merge(self, other: "AccountBehaviorPartial") -> "AccountBehaviorPartial":
+        if other.totals is not None:
+            self.totals = other.totals if self.totals is None else (
+                self.totals.add(other.totals, fill_value=0).astype("int64")
+            )
+        self.level = self.level or other.level
+        for category, sketches in other.follower_sketches.items():
+            _merge_sketches(self.follower_sketches.setdefault(category, {}), sketches)
+        if other.snapshots is not None:
+            snapshots = pd.concat([frame for frame in (self.snapshots, other.snapshots) if frame is not None])
+            # An account seen in several shards keeps its latest snapshot
+            self.snapshots = (
+                snapshots.sort_values("last_seen", na_position="first", kind="stable")
+                .groupby(level=list(snapshots.index.names))
+                .tail(1)
+            )
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        retweet_by_category = None
+        if self.totals is not None:
+            retweet_by_category = self.totals["retweets"] / self.totals["tweets"]
+
+        follower_stats = None
+        if self.level == "tweet":
+            follower_stats = pd.DataFrame({
+                column: {
+                    category: sketches[column].quantile(0.5)
+                    for category, sketches in sorted(self.follower_sketches.items())
+                    if sketches[column].count > 0
+                }
+                for column in ("followers", "following")
+            }).dropna()
+        elif self.level == "account":
+            follower_stats = (
+                self.snapshots[["followers_last", "following_last"]]
+                .groupby(level="account_category")
+                .median()
+                .rename(columns=lambda column: column[: -len("_last")])
+                .astype("float64")
+            )
+
+        result = summarize_account_behavior(retweet_by_category, follower_stats, self.level)[0]
+        if self.level == "tweet":
+            result["approximate_medians"] = True
+        return result
+
+
+class CorrelationPartial:
+    """Covariance moments of the NLP features"""
+
+    def __init__(self):
+        self.accumulator: Optional[CovarianceAccumulator] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "CorrelationPartial":
+        partial = cls()
+        features = [feature for feature in NLP_FEATURES if feature in df.columns]
+        if len(features) > 1:
+            partial.accumulator = CovarianceAccumulator(features).update_frame(df)
+        return partial
+
+    def merge(self, other: "CorrelationPartial") -> "CorrelationPartial":
+        if other.accumulator is not None:
+            if self.accumulator is None:
+                self.accumulator = CovarianceAccumulator(other.accumulator.features)
+            self.accumulator.merge(other.accumulator)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        if self.accumulator is None:
+            return {"has_nlp_correlations": False}
+        return summarize_correlations(self.accumulator)[0]
+
+
+class ContentPartial:
+    """Word, hashtag and special-format counts"""
+
+    def __init__(self):
+        self.counts = content_counts(pd.DataFrame())
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "ContentPartial":
+        partial = cls()
+        partial.counts = content_counts(df)
+        return partial
+
+    def merge(self, other: "ContentPartial") -> "ContentPartial":
+        merge_content_counts(self.counts, other.counts)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        return summarize_content_counts(self.counts)[0]
+
+
+class NetworkPartial:
+    """Hashtag and mention counts and co-occurrence counts"""
+
+    def __init__(self):
+        self.hashtags = count_hashtag_network(pd.DataFrame())
+        self.mentions = count_mention_network(pd.DataFrame())
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "NetworkPartial":
+        partial = cls()
+        partial.hashtags = count_hashtag_network(df)
+        partial.mentions = count_mention_network(df)
+        return partial
+
+    def merge(self, other: "NetworkPartial") -> "NetworkPartial":
+        merge_network_counts(self.hashtags, other.hashtags)
+        merge_network_counts(self.mentions, other.mentions)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        return summarize_networks(network_from_counts(self.hashtags), network_from_counts(self.mentions))
+
+
+class SentimentPartial:
+    """Sentiment sums, polarity counts and a quantile sketch, with sums per category and region"""
+
+    GROUPS = ["account_category", "region"]
+
+    def __init__(self):
+        # Count, sum and sum of squares of the scores
+        self.moments = np.zeros(3)
+        # Positive, neutral and negative tweets
+        self.polarity = np.zeros(3, dtype="int64")
+        self.sketch = QuantileSketch()
+        self.group_sums: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, seed=None) -> "SentimentPartial":
+        partial = cls()
+        if "content" not in df.columns or df.empty:
+            return partial
+        sentiment = get_sentiment(df)
+        scores = sentiment.to_numpy(dtype="float64", na_value=np.nan)
+        scores = scores[~np.isnan(scores)]
+        partial.moments = np.array([len(scores), scores.sum(), np.square(scores).sum()])
+        partial.polarity = np.array(
+            [(scores > 0.05).sum(), ((scores >= -0.05) & (scores <= 0.05)).sum(), (scores < -0.05).sum()]
+        )
+        partial.sketch = QuantileSketch(seed=None if seed is None else (seed, 3)).update(scores)
+        for column in cls.GROUPS:
+            if column in df.columns:
+                sums = get_group_index(df, column).aggregate(sentiment.to_frame(), ["sentiment"], ["sum", "count"])
+                partial.group_sums[column] = sums["sentiment"]
+        return partial
+
+    def merge(self, other: "SentimentPartial") -> "SentimentPartial":
+        self.moments = self.moments + other.moments
+        self.polarity = self.polarity + other.polarity
+        self.sketch.merge(other.sketch)
+        for column, sums in other.group_sums.items():
+            if column in self.group_sums:
+                sums = self.group_sums[column].add(sums, fill_value=0)
+            self.group_sums[column] = sums
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        count, total, squares = self.moments
+        if not count:
+            return {"has_sentiment_data": False}
+        variance = (squares - total * total / count) / (count - 1) if count > 1 else float("nan")
+        result = {
+            "has_sentiment_data": True,
+            "sentiment_distribution": {
+                "mean": float(total / count),
+                "median": float(self.sketch.quantile(0.5)),
+                "std": float(np.sqrt(max(variance, 0.0))),
+                "positive_ratio": float(self.polarity[0] / count),
+                "neutral_ratio": float(self.polarity[1] / count),
+                "negative_ratio": float(self.polarity[2] / count),
+            },
+            "approximate_median": True,
+        }
+        for column, sums in self.group_sums.items():
+            means = (sums["sum"] / sums["count"]).sort_index()
+            key = "sentiment_by_category" if column == "account_category" else f"sentiment_by_{column}"
+            result[key] = {str(k): float(v) for k, v in means.items()}
+        return result
+
+
+# Report section -> partial class, in report order
+PARTIALS = {
+    "categorical": CategoricalPartial,
+    "cardinality": CardinalityPartial,
+    "numerical": NumericalPartial,
+    "temporal": TemporalPartial,
+    "account_behavior": AccountBehaviorPartial,
+    "correlation": CorrelationPartial,
+    "content": ContentPartial,
+    "network": NetworkPartial,
+}
+
+# Partials kept by incremental ingest, which scores the sentiment of each batch
+INGEST_PARTIALS = {**PARTIALS, "sentiment": SentimentPartial}
+
+
+def build_partials(
+    df: pd.DataFrame, seed: Optional[int] = None, partials: Dict[str, type] = PARTIALS
+) -> Dict[str, Any]:
+    """
+    Build the partial of every analysis for one shard or chunk.
+
+    Args:
+        df: Combined DataFrame of the shard
+        seed: Seed of the quantile sketches; give every shard its own
+        partials: Registry of report sections and partial classes
+
+    Returns:
+        Dictionary with the number of "rows" and the "partials" by section
+    """
+    registry, partials = partials, {}
+    for name, partial_class in registry.items():
+        with span(f"partial_{name}", rows=len(df), category="analysis"):
+            partials[name] = partial_class.from_frame(df, seed)
+    return {"rows": len(df), "partials": partials}
+
+
+def merge_partials(parts: Iterable[Dict[str, Any]], partials: Dict[str, type] = PARTIALS) -> Dict[str, Any]:
+    """
+    Merge the results of `build_partials` for several shards.
+
+    The inputs are left unchanged; merging happens into fresh partials.
+
+    Args:
+        parts: Results of `build_partials`, in shard order
+        partials: Registry the parts were built with
+
+    Returns:
+        Merged result in the same layout
+    """
+    merged = {"rows": 0, "partials": {name: partial_class() for name, partial_class in partials.items()}}
+    for part in parts:
+        merged["rows"] += part["rows"]
+        for name, partial in part["partials"].items():
+            merged["partials"][name].merge(partial)
+    return merged
+
+
+def partial_report(part: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Report every analysis of a partial from `build_partials` or `merge_partials`.
+
+    Returns:
+        JSON-compatible dictionary with the rows and one result per section
+    """
+    report = {"rows": part["rows"]}
+    for name, partial in part["partials"].items():
+        with span(f"report_{name}", category="analysis"):
+            report[name] = partial.result()
+    return report
+
+
+def shard_partials(shard: int, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Load one shard and build its partials, reusing them from the dataset
+    cache until the shard's files or the code change.
+
+    Args:
+        shard: Shard number
+        use_cache: Read and write the cached partials
+
+    Returns:
+        Result of `build_partials`
+    """
+    sources = shard_paths([shard])
+    name = f"partials_shard_{shard}"
+    part = read_cache(name, sources) if use_cache else None
+    if part is None:
+        _, _, combined_df = load_data(use_cache=False, shards=[shard])
+        part = build_partials(combined_df, seed=shard)
+        if use_cache:
+            write_cache(name, part, sources)
+    return part
+
+
+def _shard_worker(shard: int, use_cache: bool, traced: bool):
+    """Build one shard's partials in a worker process, returning its spans too"""
+    if traced:
+        start_trace()
+    with span(f"shard_{shard}", category="stage"):
+        part = shard_partials(shard, use_cache)
+    return part, collect_events()
+
+
+def analyze_shards(
+    shards: Optional[List[int]] = None,
+    processes: Optional[int] = None,
+    output_dir: str = SHARD_DIR,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Analyze every shard in parallel and write per-shard and corpus reports.
+
+    Each worker loads a single shard, so memory grows with the largest shard
+    rather than with the corpus. The corpus report merges the shard partials.
+
+    Args:
+        shards: Shard numbers; `dataset_shards()` by default
+        processes: Worker processes; defaults to SHARD_WORKERS capped at the
+            CPU count and the number of shards. With fewer than two, shards
+            are analyzed one after another in this process
+        output_dir: Directory for shard_<n>.json and corpus.json
+        use_cache: Reuse shard partials from the dataset cache
+
+    Returns:
+        Dictionary mapping "shard_<n>" and "corpus" to their reports
+    """
+    shards = dataset_shards() if shards is None else list(shards)
+    processes = processes or min(SHARD_WORKERS, os.cpu_count() or 1, len(shards))
+
+    if processes >= 2:
+        # Spawned workers start clean instead of inheriting this process' frames
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [pool.submit(_shard_worker, shard, use_cache, tracing()) for shard in shards]
+            parts = []
+            for future in futures:
+                part, events = future.result()
+                add_events(events)
+                parts.append(part)
+    else:
+        parts = []
+        for shard in shards:
+            with span(f"shard_{shard}", category="stage"):
+                parts.append(shard_partials(shard, use_cache))
+
+    reports = {}
+    for shard, part in zip(shards, parts):
+        reports[f"shard_{shard}"] = {"shards": [shard], **partial_report(part)}
+    with span("merge_partials", category="stage"):
+        corpus = merge_partials(parts)
+    reports["corpus"] = {"shards": shards, **partial_report(corpus)}
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, report in reports.items():
+        with open(os.path.join(output_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return reports
@@ -0,0 +1,140 @@
+"""
+Column profiling engine for EDA.
+
+Computes descriptive statistics for every column in a single pass per column
+and memoizes them on the DataFrame, so that `basic_stats`,
+`analyze_numerical_features` and `dataset_overview` share one set of results.
+"""
+
+from typing import Dict, Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..utils import dataset_columns
+from .eda_helpers import frame_cache
+
+QUANTILES = (0.25, 0.5, 0.75)
+QUANTILE_LABELS = ("25%", "50%", "75%")
+
+
+def _numeric_profile(series: pd.Series) -> Dict[str, Any]:
+    """
+    Profile a numeric column.
+
+    All order statistics (min, quartiles, max) come from a single
+    `np.partition` call on the non-null values.
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    valid = values[~np.isnan(values)]
+    n = valid.size
+
+    profile = {"kind": "numeric", "count": int(n)}
+    if n == 0:
+        profile.update({"mean": None, "std": None, "min": None, "max": None})
+        profile.update({label: None for label in QUANTILE_LABELS})
+        return profile
+
+    # Linear interpolation between the two order statistics around q * (n - 1)
+    positions = np.asarray(QUANTILES) * (n - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.ceil(positions).astype(np.intp)
+    kth = np.unique(np.concatenate(([0, n - 1], lower, upper)))
+    valid.partition(kth)
+
+    fractions = positions - lower
+    quantiles = valid[lower] + (valid[upper] - valid[lower]) * fractions
+
+    mean = valid.mean()
+    std = valid.std(ddof=1) if n > 1 else np.nan
+    profile.update({
+        "mean": float(mean) if not np.isnan(mean) else None,
+        "std": float(std) if not np.isnan(std) else None,
+        "min": float(valid[0]),
+        "max": float(valid[n - 1]),
+    })
+    for label, value in zip(QUANTILE_LABELS, quantiles):
+        profile[label] = float(value) if not np.isnan(value) else None
+    return profile
+
+
+def _categorical_profile(series: pd.Series) -> Dict[str, Any]:
+    """Profile a non-numeric column with a single `value_counts` call"""
+    value_counts = series.value_counts()
+    return {
+        "kind": "categorical",
+        "count": int(value_counts.sum()),
+        "unique": int(len(value_counts)),
+        "top": value_counts.index[0] if not value_counts.empty else None,
+        "top_count": int(value_counts.iloc[0]) if not value_counts.empty else None,
+    }
+
+
+def profile_columns(
+    df: pd.DataFrame, columns: Optional[Iterable[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Profile the columns of a DataFrame, reusing any previously computed results.
+
+    Args:
+        df: DataFrame to profile
+        columns: Columns to profile (defaults to all columns except the
+            internal ones; see `utils.INTERNAL_COLUMNS`)
+
+    Returns:
+        Dictionary mapping column names to their statistics. Every entry has
+        "kind", "count", "missing" and "dtype"; numeric columns add mean, std,
+        min, quartiles and max, categorical columns add unique, top and top_count.
+    """
+    cache = frame_cache(df).setdefault("profile", {})
+    columns = dataset_columns(df) if columns is None else list(columns)
+
+    for col in columns:
+        if col in cache:
+            continue
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series):
+            col_profile = _numeric_profile(series)
+        else:
+            col_profile = _categorical_profile(series)
+        col_profile["missing"] = int(len(series) - col_profile["count"])
+        col_profile["dtype"] = str(series.dtype)
+        cache[col] = col_profile
+
+    return {col: cache[col] for col in columns}
+
+
+def profile_frame(profile: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Lay out a column profile like `df.describe(include="all").T`.
+
+    Args:
+        profile: Result of `profile_columns`
+
+    Returns:
+        DataFrame with one row per column
+    """
+    rows = {}
+    for col, stats in profile.items():
+        if stats["kind"] == "numeric":
+            rows[col] = {
+                "count": stats["count"],
+                "mean": stats["mean"],
+                "std": stats["std"],
+                "min": stats["min"],
+                "25%": stats["25%"],
+                "50%": stats["50%"],
+                "75%": stats["75%"],
+                "max": stats["max"],
+            }
+        else:
+            rows[col] = {
+                "count": stats["count"],
+                "unique": stats["unique"],
+                "top": stats["top"],
+                "freq": stats["top_count"],
+            }
+
+    columns = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    frame = pd.DataFrame.from_dict(rows, orient="index")
+    return frame.reindex(columns=[c for c in columns if c in frame.columns])
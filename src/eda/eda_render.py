@@ -0,0 +1,248 @@
+"""
+Rendering of EDA figure specs.
+
+This is the only EDA module that draws. Every figure is produced from the
+small aggregates in its spec (see `eda_figures`), so rendering never needs
+the tweet rows. Matplotlib is imported on the first render, so runs without
+plots never load it.
+
+Once `start_render_pool` has been called, figures are drawn by a pool of
+worker processes while the analyses carry on; `finish_rendering` waits for
+them. Without a pool, figures are drawn in the calling process.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..tracing import span
+
+PLOT_DIR = "plots"
+
+# Default number of render processes
+RENDER_WORKERS = 4
+
+_PYPLOT = {}
+_POOL = {"executor": None, "pending": []}
+
+# pyplot keeps global state, so in-process drawing is one figure at a time
+_DRAW_LOCK = threading.Lock()
+
+
+def _pyplot():
+    """Import pyplot with the non-interactive Agg backend and set the plot style on first use"""
+    if "plt" not in _PYPLOT:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        plt.style.use("fivethirtyeight")
+        sns.set_theme(font_scale=1.2)
+        sns.set_palette("husl")
+        _PYPLOT["plt"] = plt
+    return _PYPLOT["plt"]
+
+
+def _label(ax, spec):
+    if "title" in spec:
+        ax.set_title(spec["title"])
+    if "xlabel" in spec:
+        ax.set_xlabel(spec["xlabel"])
+    if "ylabel" in spec:
+        ax.set_ylabel(spec["ylabel"])
+
+
+def _draw_bar(ax, spec):
+    positions = np.arange(len(spec["labels"]))
+    errors = spec.get("errors")
+    if spec.get("horizontal"):
+        ax.barh(positions, spec["values"], xerr=errors)
+        ax.set_yticks(positions, spec["labels"])
+        ax.invert_yaxis()
+    else:
+        ax.bar(positions, spec["values"], yerr=errors)
+        ax.set_xticks(positions, spec["labels"], rotation=spec.get("rotation", 0), ha=spec.get("ha", "center"))
+
+
+def _draw_grouped_bar(ax, spec):
+    frame = pd.DataFrame(spec["series"], index=spec["labels"])
+    frame.plot(kind="bar", ax=ax)
+    ax.set_xticks(range(len(frame)), frame.index, rotation=spec.get("rotation", 0), ha=spec.get("ha", "center"))
+
+
+def _draw_pie(ax, spec):
+    ax.pie(spec["values"], labels=spec["labels"], autopct="%1.1f%%")
+
+
+def _draw_hist(ax, spec):
+    edges = np.asarray(spec["edges"])
+    if len(edges) == 0:
+        return
+    ax.stairs(spec["counts"], edges, fill=True, alpha=0.6)
+    if "kde" in spec:
+        ax.plot(spec["kde"]["x"], spec["kde"]["y"], linewidth=1.5)
+
+
+def _draw_box(ax, spec):
+    if spec["stats"] is not None:
+        ax.bxp([spec["stats"]], vert=False, showfliers=True)
+        ax.set_yticks([])
+
+
+def _draw_hist_box(fig, spec):
+    hist_ax = fig.add_subplot(1, 2, 1)
+    _draw_hist(hist_ax, spec["hist"])
+    hist_ax.set_title(spec["titles"][0])
+    box_ax = fig.add_subplot(1, 2, 2)
+    _draw_box(box_ax, {"stats": spec["box"]})
+    box_ax.set_title(spec["titles"][1])
+
+
+def _draw_heatmap(ax, spec):
+    import seaborn as sns
+
+    matrix = np.asarray(spec["matrix"], dtype="float64")
+    mask = np.triu(np.ones_like(matrix, dtype=bool))
+    sns.heatmap(
+        pd.DataFrame(matrix, index=spec["labels"], columns=spec["labels"]),
+        mask=mask, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5, ax=ax,
+    )
+
+
+def _draw_wordcloud(ax, spec):
+    from wordcloud import WordCloud, STOPWORDS
+
+    frequencies = {
+        word: count for word, count in spec["frequencies"].items() if word not in STOPWORDS
+    }
+    if not frequencies:
+        return
+    wordcloud = WordCloud(
+        width=800, height=800, background_color="white", min_font_size=10
+    ).generate_from_frequencies(frequencies)
+    ax.imshow(wordcloud, interpolation="bilinear")
+    ax.axis("off")
+
+
+def _draw_line(ax, spec):
+    x = pd.to_datetime(np.asarray(spec["x"], dtype=np.int64), unit="s")
+    ax.plot(x, spec["y"], linewidth=1)
+    for start, end in spec.get("spans", []):
+        ax.axvspan(pd.Timestamp(start, unit="s"), pd.Timestamp(end, unit="s"), color="red", alpha=0.3)
+
+
+_DRAW = {
+    "bar": _draw_bar,
+    "grouped_bar": _draw_grouped_bar,
+    "pie": _draw_pie,
+    "hist": _draw_hist,
+    "box": _draw_box,
+    "heatmap": _draw_heatmap,
+    "wordcloud": _draw_wordcloud,
+    "line": _draw_line,
+}
+
+
+def render_figure(spec: Dict[str, Any], name: str) -> str:
+    """
+    Draw one figure spec and save it.
+
+    Args:
+        spec: Figure spec from `eda_figures.figure`
+        name: Name prefix for the output file
+
+    Returns:
+        Path of the saved file
+    """
+    os.makedirs(PLOT_DIR, exist_ok=True)
+    if spec["kind"] == "table":
+        path = os.path.join(PLOT_DIR, f"{name}_{spec['file']}.csv")
+        spec["table"].to_csv(path)
+        return path
+
+    path = os.path.join(PLOT_DIR, f"{name}_{spec['file']}.png")
+    with _DRAW_LOCK:
+        plt = _pyplot()
+        fig = plt.figure(figsize=spec.get("figsize", (12, 6)))
+        if spec["kind"] == "hist_box":
+            _draw_hist_box(fig, spec)
+        else:
+            ax = fig.add_subplot()
+            _DRAW[spec["kind"]](ax, spec)
+            _label(ax, spec)
+        fig.tight_layout()
+        fig.savefig(path, bbox_inches="tight")
+        plt.close(fig)
+    return path
+
+
+def render_figures(figures: Iterable[Dict[str, Any]], name: str) -> None:
+    """
+    Draw and save every figure spec of an analysis.
+
+    With a render pool running, the figures are queued and this returns
+    at once.
+
+    Args:
+        figures: Figure specs
+        name: Name prefix for the output files
+    """
+    executor = _POOL["executor"]
+    for spec in figures:
+        if executor is None:
+            with span(f"{name}_{spec['file']}", category="render"):
+                render_figure(spec, name)
+        else:
+            _POOL["pending"].append(executor.submit(render_figure, spec, name))
+
+
+def _init_worker():
+    _pyplot()
+
+
+def start_render_pool(workers: Optional[int] = None) -> None:
+    """
+    Start worker processes that draw the figures passed to `render_figures`.
+
+    Args:
+        workers: Number of processes; defaults to RENDER_WORKERS, capped at
+            the CPU count. With fewer than two, figures are drawn in-process
+    """
+    if _POOL["executor"] is not None:
+        return
+    workers = workers or min(RENDER_WORKERS, os.cpu_count() or 1)
+    if workers < 2:
+        return
+    # Spawned workers start clean instead of inheriting the loaded dataset
+    _POOL["executor"] = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
+def finish_rendering() -> List[str]:
+    """
+    Wait for queued figures and stop the render pool.
+
+    Returns:
+        Paths of the files saved by the pool
+
+    Raises:
+        Exception: The first error raised while drawing a figure
+    """
+    executor, pending = _POOL["executor"], _POOL["pending"]
+    _POOL["executor"], _POOL["pending"] = None, []
+    if executor is None:
+        return []
+    try:
+        return [future.result() for future in pending]
+    finally:
+        executor.shutdown(cancel_futures=True)
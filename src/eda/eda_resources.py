@@ -0,0 +1,168 @@
+"""
+NLTK resources for the text analyses.
+
+Corpora are looked up in the project-local NLTK_DATA_DIR first and then in
+NLTK's usual locations; nothing is downloaded during a run, and a run with
+missing corpora stops before loading any data. `python -m src.main
+fetch-nltk` downloads them into the project directory once.
+
+The parsed stopword set and VADER lexicon are kept in the dataset cache, so
+every run and every worker process loads one pickle instead of re-reading
+and re-parsing the corpora.
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from ..utils import read_cache, write_cache
+
+# Project-local NLTK data directory, searched before NLTK's default paths
+NLTK_DATA_DIR = "data/nltk_data"
+
+# NLTK package name -> resource located with nltk.data.find
+RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+VADER_LEXICON = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+# Parsed resources of this process
+_LOADED = {}
+
+
+def _nltk_data():
+    """Import nltk.data with the project-local directory on its search path"""
+    import nltk.data
+
+    local = os.path.abspath(NLTK_DATA_DIR)
+    if local not in nltk.data.path:
+        nltk.data.path.insert(0, local)
+    return nltk.data
+
+
+def _resource_path(name: str) -> Optional[str]:
+    """File or directory holding an NLTK resource, or None if it is missing"""
+    data = _nltk_data()
+    try:
+        pointer = data.find(RESOURCES[name])
+    except LookupError:
+        return None
+    # Zipped resources point into their archive
+    return pointer.zipfile.filename if hasattr(pointer, "zipfile") else pointer.path
+
+
+def missing_resources(names: Optional[Iterable[str]] = None) -> List[str]:
+    """Names of the NLTK resources that cannot be found locally"""
+    return [name for name in (names or RESOURCES) if _resource_path(name) is None]
+
+
+def require_resources(names: Optional[Iterable[str]] = None) -> None:
+    """
+    Check that NLTK resources are available locally.
+
+    Args:
+        names: Resource names from RESOURCES (all by default)
+
+    Raises:
+        RuntimeError: If any resource is missing, naming the fix
+    """
+    missing = missing_resources(names)
+    if missing:
+        searched = "\n  ".join(_nltk_data().path)
+        raise RuntimeError(
+            f"Missing NLTK resources: {', '.join(missing)}.\n"
+            f"Run `python -m src.main fetch-nltk` to download them into {NLTK_DATA_DIR}, "
+            f"or copy them into one of:\n  {searched}"
+        )
+
+
+def fetch_resources(download_dir: str = NLTK_DATA_DIR, names: Optional[Iterable[str]] = None) -> None:
+    """
+    Download NLTK resources into a data directory. This is the only network access.
+
+    Args:
+        download_dir: Target directory
+        names: Resource names from RESOURCES (all by default)
+
+    Raises:
+        RuntimeError: If a download fails
+    """
+    import nltk
+
+    os.makedirs(download_dir, exist_ok=True)
+    failed = [
+        name for name in (names or RESOURCES)
+        if not nltk.download(name, download_dir=download_dir, raise_on_error=False)
+    ]
+    if failed:
+        raise RuntimeError(f"Could not download NLTK resources: {', '.join(failed)}")
+
+
+def _parse_resources() -> Dict:
+    from nltk.corpus import stopwords
+
+    lexicon = {}
+    for line in _nltk_data().load(VADER_LEXICON).split("\n"):
+        word, measure = line.strip().split("\t")[0:2]
+        lexicon[word] = float(measure)
+    return {"stopwords": frozenset(stopwords.words("english")), "vader_lexicon": lexicon}
+
+
+def load_resources() -> Dict:
+    """
+    Load the parsed stopword set and VADER lexicon, via the dataset cache.
+
+    Returns:
+        Dictionary with a "stopwords" frozenset and a "vader_lexicon" dict
+
+    Raises:
+        RuntimeError: If a resource is missing
+    """
+    if not _LOADED:
+        require_resources()
+        sources = [_resource_path(name) for name in RESOURCES]
+        resources = read_cache("nltk_resources", sources)
+        if resources is None:
+            resources = _parse_resources()
+            write_cache("nltk_resources", resources, sources)
+        _LOADED.update(resources)
+    return _LOADED
+
+
+def stopword_set() -> frozenset:
+    """English stopwords"""
+    return load_resources()["stopwords"]
+
+
+@lru_cache(maxsize=None)
+def _analyzer_class():
+    """SentimentIntensityAnalyzer taking a parsed lexicon; nltk is imported on first use"""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    class ParsedLexiconAnalyzer(SentimentIntensityAnalyzer):
+        """VADER analyzer whose lexicon is parsed already, so no file is read"""
+
+        def __init__(self, lexicon: Dict[str, float]):
+            # The base constructor would load the lexicon text into lexicon_file
+            # and parse it with make_lex_dict; the text is not kept here
+            self.lexicon_file = None
+            self._parsed_lexicon = lexicon
+            self.lexicon = self.make_lex_dict()
+            self.constants = VaderConstants()
+
+        def make_lex_dict(self) -> Dict[str, float]:
+            return self._parsed_lexicon
+
+    return ParsedLexiconAnalyzer
+
+
+def sentiment_analyzer():
+    """
+    VADER analyzer built from the parsed lexicon.
+
+    Returns:
+        nltk SentimentIntensityAnalyzer
+    """
+    return _analyzer_class()(load_resources()["vader_lexicon"])
@@ -0,0 +1,374 @@
+"""
+Time-bucket rollup cube for temporal EDA.
+
+The cube is built once per dataset and holds tweet counts, retweet counts and
+(optionally) sentiment sums per hour (or minute) x account_category x region x
+language. Only non-empty cells are stored, as sorted int64 cell keys with
+aligned measure arrays. Coarser time granularities and slices are answered
+by decoding the keys and summing with `np.bincount`, without touching the
+tweet rows again. Cubes built on different shards merge into one.
+"""
+
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..dates import MISSING_EPOCH, SECONDS_PER_DAY, calendar_fields
+from ..utils import read_cache, write_cache, shard_paths
+from .eda_helpers import frame_cache, publish_epoch
+
+DIMENSIONS = ("account_category", "region", "language")
+
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+GRANULARITIES = (
+    "minute", "hour", "day", "week", "month", "year", "hour_of_day", "day_of_week", "all"
+)
+
+
+class TimeRollup:
+    """
+    Sparse rollup cube of tweet measures by time bucket and dimensions.
+
+    Args:
+        resolution: Finest time bucket, "hour" or "minute"
+    """
+
+    def __init__(self, resolution: str = "hour"):
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {sorted(RESOLUTIONS)}")
+        self.resolution = resolution
+        self.labels: Dict[str, np.ndarray] = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.measures: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, resolution: str = "hour") -> "TimeRollup":
+        """
+        Build the cube from tweet rows.
+
+        Args:
+            df: DataFrame with publish dates, the cube dimensions and optionally
+                `retweet` and `sentiment` columns
+            resolution: Finest time bucket, "hour" or "minute"
+
+        Returns:
+            TimeRollup
+        """
+        cube = cls(resolution)
+        for dim in DIMENSIONS:
+            values = cube._dimension_values(df, dim)
+            cube.labels[dim] = np.asarray(pd.unique(values[pd.notna(values)]), dtype=object)
+            cube.labels[dim].sort()
+
+        key, valid = cube._row_keys(df)
+        cube.keys, inverse = np.unique(key, return_inverse=True)
+        cube.measures["count"] = np.bincount(inverse, minlength=len(cube.keys))
+        if "retweet" in df.columns:
+            retweets = df["retweet"].to_numpy(dtype="float64", na_value=0.0)[valid]
+            cube.measures["retweets"] = np.bincount(inverse, retweets, len(cube.keys))
+        if "sentiment" in df.columns:
+            cube.add_sentiment(df)
+        return cube
+
+    @classmethod
+    def from_cells(
+        cls,
+        buckets,
+        dimensions: Dict[str, Iterable],
+        measures: Dict[str, Iterable],
+        resolution: str = "hour",
+    ) -> "TimeRollup":
+        """
+        Build the cube from pre-aggregated cells, such as the rows of a SQL GROUP BY.
+
+        Args:
+            buckets: Time bucket of every cell, as epoch seconds floor-divided
+                by the resolution
+            dimensions: Cell values of every dimension in DIMENSIONS; missing
+                values become "Unknown" as in `from_frame`
+            measures: Per-cell values of each measure, e.g. "count"
+            resolution: Resolution the buckets were computed at
+
+        Returns:
+            TimeRollup
+        """
+        cube = cls(resolution)
+        key = np.asarray(buckets, dtype=np.int64)
+        for dim in DIMENSIONS:
+            values = pd.Series(list(dimensions[dim]), dtype=object).fillna("Unknown").to_numpy()
+            labels, codes = np.unique(values, return_inverse=True)
+            cube.labels[dim] = labels.astype(object)
+            key = key * len(labels) + codes
+        cube.keys, inverse = np.unique(key, return_inverse=True)
+        for measure, values in measures.items():
+            values = np.asarray(values)
+            cube.measures[measure] = np.bincount(inverse, values, len(cube.keys)).astype(values.dtype)
+        return cube
+
+    @staticmethod
+    def _dimension_values(df: pd.DataFrame, dim: str) -> np.ndarray:
+        if dim not in df.columns:
+            return np.full(len(df), "Unknown", dtype=object)
+        return df[dim].astype(object).fillna("Unknown").to_numpy()
+
+    def _row_keys(self, df: pd.DataFrame):
+        """Cell key of every row with a valid date, plus the validity mask"""
+        epoch = publish_epoch(df)
+        valid = epoch != MISSING_EPOCH
+        key = np.floor_divide(epoch[valid], RESOLUTIONS[self.resolution])
+        for dim in DIMENSIONS:
+            values = self._dimension_values(df, dim)[valid]
+            codes = pd.Categorical(values, categories=self.labels[dim]).codes.astype(np.int64)
+            if (codes < 0).any():
+                raise ValueError(f"Rows contain {dim} values that are not in the cube")
+            key = key * len(self.labels[dim]) + codes
+        return key, valid
+
+    def add_sentiment(self, df: pd.DataFrame, sentiment: Optional[Sequence[float]] = None) -> "TimeRollup":
+        """
+        Add sentiment sums and counts from the scores of the frame the cube was built from.
+
+        Args:
+            df: DataFrame the cube was built from
+            sentiment: Score of every row of `df`; its `sentiment` column by default
+
+        Returns:
+            The cube itself
+        """
+        key, valid = self._row_keys(df)
+        cell = np.searchsorted(self.keys, key)
+        scores = df["sentiment"] if sentiment is None else pd.Series(sentiment)
+        scores = scores.to_numpy(dtype="float64", na_value=np.nan)[valid]
+        scored = ~np.isnan(scores)
+        # Swapped in whole, so stages reading the cube meanwhile see either measure set
+        self.measures = {
+            **self.measures,
+            "sentiment_sum": np.bincount(cell, np.where(scored, scores, 0.0), len(self.keys)),
+            "sentiment_count": np.bincount(cell, scored, len(self.keys)),
+        }
+        return self
+
+    def merge(self, other: "TimeRollup") -> "TimeRollup":
+        """
+        Fold a cube built over other rows, such as another shard, into this one.
+
+        Dimension labels are united and the cell keys of both cubes are
+        re-encoded with them. Measures missing from either cube are dropped.
+
+        Args:
+            other: Cube with the same resolution
+
+        Returns:
+            The cube itself
+        """
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge cubes with different resolutions")
+        empty = np.empty(0, dtype=object)
+        labels = {
+            dim: np.union1d(self.labels.get(dim, empty), other.labels.get(dim, empty))
+            for dim in DIMENSIONS
+        }
+
+        def encode(cube):
+            if not len(cube.keys):
+                return np.empty(0, dtype=np.int64)
+            bucket, codes = cube._decode()
+            key = bucket
+            for dim in DIMENSIONS:
+                remap = np.searchsorted(labels[dim], cube.labels[dim]).astype(np.int64)
+                key = key * len(labels[dim]) + remap[codes[dim]]
+            return key
+
+        keys = np.concatenate((encode(self), encode(other)))
+        merged_keys, inverse = np.unique(keys, return_inverse=True)
+        measures = {}
+        for measure in self.measures.keys() | other.measures.keys():
+            parts = [cube.measures.get(measure) for cube in (self, other)]
+            # A cube without cells cannot be missing a measure
+            if any(part is None and len(cube.keys) for part, cube in zip(parts, (self, other))):
+                continue
+            dtype = next(part.dtype for part in parts if part is not None)
+            values = np.concatenate([part for part in parts if part is not None])
+            measures[measure] = np.bincount(inverse, values, len(merged_keys)).astype(dtype)
+
+        self.labels, self.keys, self.measures = labels, merged_keys, measures
+        return self
+
+    def _decode(self):
+        """Split cell keys into the time bucket and one code array per dimension"""
+        remainder = self.keys
+        codes = {}
+        for dim in reversed(DIMENSIONS):
+            remainder, codes[dim] = np.divmod(remainder, len(self.labels[dim]))
+        return remainder, codes
+
+    def _time_buckets(self, bucket: np.ndarray, granularity: str) -> np.ndarray:
+        seconds = bucket * RESOLUTIONS[self.resolution]
+        if granularity == "minute":
+            return seconds // 60
+        if granularity == "hour":
+            return seconds // 3600
+        if granularity == "day":
+            return seconds // SECONDS_PER_DAY
+        if granularity == "week":
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            return (seconds // SECONDS_PER_DAY + 3) // 7
+        if granularity == "hour_of_day":
+            return (seconds // 3600) % 24
+        if granularity == "day_of_week":
+            return (seconds // SECONDS_PER_DAY + 3) % 7
+        if granularity == "all":
+            return np.zeros(len(bucket), dtype=np.int64)
+        fields = calendar_fields(seconds)
+        return fields["month_index"] if granularity == "month" else fields["year"]
+
+    def _bucket_labels(self, buckets: np.ndarray, granularity: str):
+        if granularity in ("minute", "hour", "day", "week"):
+            unit = {"minute": 60, "hour": 3600, "day": SECONDS_PER_DAY, "week": 7 * SECONDS_PER_DAY}
+            offset = 3 * SECONDS_PER_DAY if granularity == "week" else 0
+            return pd.to_datetime(buckets * unit[granularity] - offset, unit="s")
+        if granularity == "month":
+            return pd.PeriodIndex.from_ordinals(buckets, freq="M")
+        return buckets
+
+    def query(
+        self,
+        granularity: str = "day",
+        by: Sequence[str] = (),
+        filters: Optional[Dict[str, Iterable]] = None,
+        start=None,
+        end=None,
+        measure: str = "count",
+    ) -> pd.DataFrame:
+        """
+        Aggregate a measure over time buckets and dimensions.
+
+        Args:
+            granularity: One of GRANULARITIES (no finer than the cube resolution)
+            by: Dimensions to keep as columns
+            filters: Mapping of dimension to allowed values
+            start: Inclusive lower bound on time (anything `pd.Timestamp` accepts)
+            end: Exclusive upper bound on time
+            measure: "count", "retweets", "sentiment_sum", "sentiment_count" or
+                "sentiment_mean"
+
+        Returns:
+            DataFrame indexed by time bucket with one column per group
+            (a single "value" column when `by` is empty)
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        if granularity == "minute" and self.resolution != "minute":
+            raise ValueError("Minute granularity requires a cube built with resolution='minute'")
+        if measure == "sentiment_mean":
+            sums = self.query(granularity, by, filters, start, end, "sentiment_sum")
+            counts = self.query(granularity, by, filters, start, end, "sentiment_count")
+            return sums / counts.where(counts > 0)
+        if measure not in self.measures:
+            raise ValueError(f"Measure '{measure}' is not available in this cube")
+
+        bucket, codes = self._decode()
+        mask = np.ones(len(self.keys), dtype=bool)
+        for dim, allowed in (filters or {}).items():
+            allowed_codes = np.flatnonzero(np.isin(self.labels[dim], list(allowed)))
+            mask &= np.isin(codes[dim], allowed_codes)
+        seconds = bucket * RESOLUTIONS[self.resolution]
+        if start is not None:
+            mask &= seconds >= pd.Timestamp(start).value // 10**9
+        if end is not None:
+            mask &= seconds < pd.Timestamp(end).value // 10**9
+
+        time_bucket = self._time_buckets(bucket[mask], granularity)
+        group = np.zeros(mask.sum(), dtype=np.int64)
+        for dim in by:
+            group = group * len(self.labels[dim]) + codes[dim][mask]
+
+        times, time_index = np.unique(time_bucket, return_inverse=True)
+        groups, group_index = np.unique(group, return_inverse=True)
+        table = np.bincount(
+            time_index * len(groups) + group_index,
+            self.measures[measure][mask],
+            minlength=len(times) * len(groups),
+        ).reshape(len(times), len(groups))
+
+        if measure != "sentiment_sum":
+            table = table.astype(np.int64)
+
+        if by:
+            columns = []
+            for value in groups:
+                label = []
+                for dim in reversed(by):
+                    value, code = divmod(value, len(self.labels[dim]))
+                    label.append(self.labels[dim][code])
+                label = tuple(reversed(label))
+                columns.append(label if len(by) > 1 else label[0])
+        else:
+            columns = ["value"]
+        return pd.DataFrame(table, index=self._bucket_labels(times, granularity), columns=columns)
+
+    def size(self) -> Dict[str, Any]:
+        """Number of stored cells and bytes held by keys and measures"""
+        nbytes = self.keys.nbytes + sum(values.nbytes for values in self.measures.values())
+        return {"cells": int(len(self.keys)), "bytes": int(nbytes)}
+
+
+def get_rollup(
+    df: pd.DataFrame, resolution: str = "hour", sentiment: Optional[Sequence[float]] = None
+) -> TimeRollup:
+    """
+    Return the rollup cube for a DataFrame, building it once per frame.
+
+    Args:
+        df: DataFrame with tweet rows
+        resolution: Finest time bucket, "hour" or "minute"
+        sentiment: Score of every row; added to a cube without sentiment sums
+
+    Returns:
+        TimeRollup
+    """
+    cache = frame_cache(df)
+    key = ("rollup", resolution)
+    if key not in cache:
+        cache[key] = TimeRollup.from_frame(df, resolution)
+    cube = cache[key]
+    if sentiment is not None and "sentiment_sum" not in cube.measures:
+        cube.add_sentiment(df, sentiment)
+    return cube
+
+
+def load_rollup(
+    df: pd.DataFrame, resolution: str = "hour", sentiment: Optional[Sequence[float]] = None
+) -> TimeRollup:
+    """
+    Attach the dataset's cube to the frame from `load_data`, via the dataset cache.
+
+    The cube is built and written to the cache on the first run and read
+    back on later runs until the source CSVs change. Sentiment scores passed
+    later are added to the cube and the cache. Only call this with the full
+    combined frame; other frames should use `get_rollup`.
+
+    Args:
+        df: Combined DataFrame returned by `load_data`
+        resolution: Finest time bucket, "hour" or "minute"
+        sentiment: Score of every row; added to a cube without sentiment sums
+
+    Returns:
+        TimeRollup
+    """
+    sources = shard_paths()
+    name = f"rollup_{resolution}"
+    cache = frame_cache(df)
+    key = ("rollup", resolution)
+    cube = cache.get(key)
+    if cube is None:
+        cube = read_cache(name, sources)
+    if cube is None:
+        cube = TimeRollup.from_frame(df, resolution)
+        write_cache(name, cube, sources)
+    if sentiment is not None and "sentiment_sum" not in cube.measures:
+        write_cache(name, cube.add_sentiment(df, sentiment), sources)
+    cache[key] = cube
+    return cube
@@ -0,0 +1,258 @@
+"""
+Stratified sampling for fast approximate EDA.
+
+`load_sample` draws a stratified sample over the shards in one pass. Strata
+are account category x publish month. Every row gets a uniform random key
+and a stratum keeps the rows with the smallest keys (bottom-k reservoir
+sampling), so chunks are sampled independently and the candidate sets
+merge. Strata are allocated proportionally with a small minimum, so with
+many small strata the sample is slightly larger than requested; the design
+records both sizes. The sample is kept in the dataset cache per size and
+seed.
+
+`bootstrap_intervals` re-runs an analysis on stratified bootstrap
+resamples of the sample and returns a percentile interval for every
+numeric value in its JSON result.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..dates import calendar_fields
+from ..utils import RAW_DIR, combine_frames, dataset_shards, read_cache, shard_paths, write_cache
+from .eda_cache import dataset_fingerprint, disk_cache_enabled, result_cache_name, write_result
+from .eda_helpers import frame_cache
+
+# Rows read per chunk while sampling
+CHUNK_ROWS = 200_000
+
+# Smallest number of rows drawn from a stratum (or all of it, if smaller)
+MIN_PER_STRATUM = 5
+
+# Candidates kept globally, as a multiple of the sample size, so every
+# proportional allocation is covered by the smallest keys
+CANDIDATE_FACTOR = 2
+
+# Resamples per interval. Percentile endpoints of a 95% interval need a few
+# hundred; fewer make them little more than the extremes of the resamples
+BOOTSTRAP_REPLICATES = 200
+
+
+def stratum_labels(df: pd.DataFrame) -> np.ndarray:
+    """Stratum of every row, "<account_category>|<YYYY-MM>" """
+    if "account_category" in df.columns:
+        category = df["account_category"].astype(object).fillna("Unknown").astype(str).to_numpy()
+    else:
+        category = np.full(len(df), "Unknown", dtype=object)
+    month_index = calendar_fields(df["publish_epoch"].to_numpy())["month_index"]
+    months, inverse = np.unique(month_index, return_inverse=True)
+    labels = np.array([
+        f"{1970 + index // 12:04d}-{index % 12 + 1:02d}" if index >= 0 else "unknown"
+        for index in months
+    ], dtype=object)
+    return category + "|" + labels[inverse]
+
+
+class StratifiedReservoir:
+    """
+    Single-pass stratified sample of a stream of DataFrame chunks.
+
+    Each row gets a uniform key. The candidates kept are the
+    CANDIDATE_FACTOR * size smallest keys overall, plus the
+    MIN_PER_STRATUM smallest keys of every stratum. The final sample takes
+    the smallest keys of each stratum, in proportion to its population.
+
+    Args:
+        size: Target sample size
+        min_per_stratum: Smallest allocation of a stratum
+        seed: Random seed
+    """
+
+    def __init__(self, size: int, min_per_stratum: int = MIN_PER_STRATUM, seed: int = 0):
+        self.size = size
+        self.min_per_stratum = min_per_stratum
+        self.rng = np.random.default_rng(seed)
+        self.population = pd.Series(dtype=np.int64)
+        self.candidates = None
+
+    def _prune(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.sort_values("_key", kind="stable")
+        keep = np.zeros(len(frame), dtype=bool)
+        keep[:CANDIDATE_FACTOR * self.size] = True
+        keep |= frame.groupby("_stratum", sort=False).cumcount().to_numpy() < self.min_per_stratum
+        return frame[keep]
+
+    def update(self, chunk: pd.DataFrame) -> "StratifiedReservoir":
+        """Add a chunk of rows"""
+        chunk = chunk.assign(_key=self.rng.random(len(chunk)), _stratum=stratum_labels(chunk))
+        counts = chunk["_stratum"].value_counts()
+        self.population = self.population.add(counts, fill_value=0).astype(np.int64)
+        frames = [chunk] if self.candidates is None else [self.candidates, chunk]
+        self.candidates = self._prune(pd.concat(frames, ignore_index=True))
+        return self
+
+    def allocation(self) -> pd.Series:
+        """Rows drawn from every stratum"""
+        total = self.population.sum()
+        proportional = np.round(self.size * self.population / max(total, 1)).astype(np.int64)
+        return np.minimum(self.population, np.maximum(proportional, self.min_per_stratum))
+
+    def sample(self) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Draw the sample.
+
+        Returns:
+            Tuple of (sample frame, design dictionary with the "strata"
+            population and sample sizes)
+        """
+        if self.candidates is None:
+            return pd.DataFrame(), {"population_rows": 0, "strata": {}}
+        allocation = self.allocation()
+        frame = self.candidates.sort_values(["_stratum", "_key"], kind="stable")
+        rank = frame.groupby("_stratum", sort=False).cumcount().to_numpy()
+        frame = frame[rank < allocation.reindex(frame["_stratum"]).to_numpy()]
+        drawn = frame["_stratum"].value_counts()
+        design = {
+            "population_rows": int(self.population.sum()),
+            "strata": {
+                str(stratum): {"population": int(population), "sample": int(drawn.get(stratum, 0))}
+                for stratum, population in self.population.sort_index().items()
+            },
+        }
+        frame = frame.drop(columns=["_key", "_stratum"]).reset_index(drop=True)
+        return frame, design
+
+
+def _shard_chunks(shards) -> Iterator[Dict[str, Any]]:
+    """Row-aligned chunks of the trimmed and derived CSVs, combined"""
+    for shard in shards:
+        trimmed = pd.read_csv(f"{RAW_DIR}/{shard}_trimmed.csv", chunksize=CHUNK_ROWS)
+        derived = pd.read_csv(f"{RAW_DIR}/{shard}_derived.csv", chunksize=CHUNK_ROWS)
+        for raw_chunk, derived_chunk in zip(trimmed, derived):
+            yield combine_frames(raw_chunk, derived_chunk)
+
+
+def load_sample(size: int, seed: int = 0):
+    """
+    Load a stratified sample of the dataset, via the dataset cache.
+
+    Args:
+        size: Target number of rows
+        seed: Random seed
+
+    Returns:
+        Tuple of (raw frame, derived frame, combined frame, design), shaped
+        like `load_data` plus the sampling design
+    """
+    sources = shard_paths()
+    name = f"sample_{size}_{seed}"
+    dataset = read_cache(name, sources)
+    if dataset is None:
+        reservoir = StratifiedReservoir(size, seed=seed)
+        columns = None
+        for chunk in _shard_chunks(dataset_shards()):
+            columns = columns or chunk
+            reservoir.update(chunk["combined"])
+        combined_df, design = reservoir.sample()
+        design.update({"size": size, "seed": seed, "sample_rows": len(combined_df)})
+        dataset = {
+            "combined": combined_df,
+            "raw_columns": columns["raw_columns"],
+            "derived_columns": columns["derived_columns"],
+            "design": design,
+        }
+        write_cache(name, dataset, sources)
+
+    combined_df = dataset["combined"]
+    return (
+        combined_df[dataset["raw_columns"]],
+        combined_df[dataset["derived_columns"]],
+        combined_df,
+        dataset["design"],
+    )
+
+
+def _numeric_leaves(value, path: str = "") -> Iterator[Tuple[str, float]]:
+    """JSON-pointer paths and values of the numbers in a JSON-compatible object"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _numeric_leaves(item, f"{path}/{key}")
+    elif isinstance(value, (list, tuple)):
+        for position, item in enumerate(value):
+            yield from _numeric_leaves(item, f"{path}/{position}")
+    elif isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+        yield path, float(value)
+
+
+def bootstrap_resample(df: pd.DataFrame, rng: np.random.Generator) -> np.ndarray:
+    """Row positions of a stratified bootstrap resample: each stratum is resampled within itself"""
+    strata = pd.factorize(stratum_labels(df))[0]
+    order = np.argsort(strata, kind="stable")
+    counts = np.bincount(strata)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return order[starts + np.floor(rng.random(len(df)) * np.repeat(counts, counts)).astype(np.int64)]
+
+
+def bootstrap_intervals(
+    func: Callable[[pd.DataFrame], Dict[str, Any]],
+    df: pd.DataFrame,
+    replicates: int = BOOTSTRAP_REPLICATES,
+    level: float = 0.95,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Percentile bootstrap intervals for every number in an analysis result.
+
+    Resample frames get fingerprints derived from the sample's, and their
+    analysis results are memoized in this process only. Sentiment scores already
+    computed for the sample are carried over instead of being recomputed.
+    The intervals themselves are stored with the other analysis results,
+    per code version, when the disk layer of the result cache is enabled.
+
+    Args:
+        func: Analysis taking a frame and returning a JSON-compatible result
+        df: Sample frame
+        replicates: Number of bootstrap resamples
+        level: Confidence level
+        seed: Random seed
+
+    Returns:
+        Dictionary with "confidence_level", "replicates" and "intervals",
+        mapping the JSON-pointer path of every number present in most
+        replicates to [low, high]
+    """
+    fingerprint = dataset_fingerprint(df)
+    name = f"bootstrap_{func.__name__}_{fingerprint[:20]}_{replicates}_{seed}_{level}"
+    if disk_cache_enabled():
+        cached = read_cache(result_cache_name(name), [])
+        if cached is not None:
+            return cached
+
+    rng = np.random.default_rng(seed)
+    sentiment = frame_cache(df).get("sentiment")
+    values = {}
+    for replicate in range(replicates):
+        positions = bootstrap_resample(df, rng)
+        resample = df.iloc[positions].reset_index(drop=True)
+        digest = hashlib.sha1(f"{fingerprint}:bootstrap:{seed}:{replicate}".encode())
+        cache = frame_cache(resample)
+        cache["fingerprint"] = digest.hexdigest()
+        cache["memory_only"] = True
+        if sentiment is not None:
+            cache["sentiment"] = pd.Series(sentiment.to_numpy()[positions], name="sentiment")
+        for path, value in _numeric_leaves(func(resample)):
+            values.setdefault(path, []).append(value)
+
+    tail = (1 - level) / 2 * 100
+    intervals = {
+        path: [float(np.nanpercentile(samples, tail)), float(np.nanpercentile(samples, 100 - tail))]
+        for path, samples in values.items()
+        if len(samples) * 2 > replicates and not np.all(np.isnan(samples))
+    }
+    result = {"confidence_level": level, "replicates": replicates, "intervals": intervals}
+    if disk_cache_enabled():
+        write_result(name, result)
+    return result
@@ -0,0 +1,379 @@
+"""
+Stage scheduler for the EDA run.
+
+Every stage declares the named values it reads and the values it produces.
+A stage starts as soon as its inputs exist, so independent stages run
+concurrently: numpy/pandas and I/O stages on a thread pool, pure-Python
+CPU stages on a process pool. DataFrame inputs of process stages are copied
+once into shared memory (`SharedColumns`) instead of being pickled per
+stage. After the run the scheduler reports each stage's timing and the
+critical path, the chain of dependent stages that bounded the wall time.
+Every stage is also a span of the run's trace (see `tracing`), including
+the spans a process stage records in its worker.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..tracing import add_events, collect_events, record_span, span, start_trace, tracing
+
+# Threads for thread stages; numpy and pandas release the GIL in most kernels
+THREAD_WORKERS = 4
+
+# Default number of processes for process stages, capped at the CPU count
+PROCESS_WORKERS = 4
+
+STAGE_KINDS = ("thread", "process")
+
+# Leading rows of an object column checked before factorizing all of it
+CODES_SAMPLE_ROWS = 10_000
+
+# Joins the texts of a shared text column; columns whose text contains it are pickled
+TEXT_SEPARATOR = "\0"
+
+# Shared blocks attached by this worker process, kept open while in use
+_ATTACHED = []
+
+
+class Stage:
+    """
+    One unit of work in a scheduled run.
+
+    Args:
+        name: Unique stage name
+        func: Called with the declared inputs as keyword arguments. It
+            returns the value of its single output, a tuple with one value
+            per output, or anything when it declares no outputs
+        inputs: Names of the values the stage reads
+        outputs: Names of the values the stage produces
+        kind: "thread" for numpy/pandas or I/O work, "process" for
+            pure-Python CPU work. Process stages need a module-level `func`
+        columns: For process stages, the DataFrame columns to share with
+            the worker (all columns by default)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        inputs: Iterable[str] = (),
+        outputs: Iterable[str] = (),
+        kind: str = "thread",
+        columns: Optional[Iterable[str]] = None,
+    ):
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind {kind!r}")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.kind = kind
+        self.columns = None if columns is None else list(columns)
+
+
+class SharedColumns:
+    """
+    DataFrame columns copied into shared memory for a process stage.
+
+    Numeric, boolean and datetime columns are shared as they are. Low-cardinality
+    object columns are shared as integer codes with their few labels
+    pickled alongside. Other object columns (free text) are shared as one
+    UTF-8 buffer of the texts joined by NUL, so encoding and decoding are a
+    single join and split rather than a loop over rows; the rare column whose
+    text contains NUL is pickled with the instance instead. Pickling the
+    instance sends only block names and labels; `frame` rebuilds the
+    DataFrame in the worker.
+
+    Args:
+        df: DataFrame to share
+        columns: Columns to share (all columns by default)
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[Iterable[str]] = None):
+        self.index = df.index if not isinstance(df.index, pd.RangeIndex) else None
+        self.length = len(df)
+        self.columns = []
+        self._blocks = []
+        for column in (df.columns if columns is None else columns):
+            series = df[column]
+            if pd.api.types.is_datetime64_dtype(series.dtype):
+                self.columns.append((column, "values", {"values": self._share(series.to_numpy())}))
+                continue
+            if pd.api.types.is_numeric_dtype(series.dtype) and series.dtype != object:
+                # Nullable integer and boolean columns with missing values become float
+                missing = series.isna().to_numpy()
+                values = series.to_numpy(dtype="float64" if missing.any() else None, na_value=np.nan)
+                self.columns.append((column, "values", {"values": self._share(values)}))
+                continue
+            # A sample rules out free text without factorizing the whole column
+            sample = series.iloc[:CODES_SAMPLE_ROWS]
+            if sample.nunique(dropna=False) <= max(1, len(sample) // 4):
+                codes, labels = pd.factorize(series)
+                if len(labels) <= max(1, self.length // 4):
+                    self.columns.append((column, "codes", {
+                        "codes": self._share(codes.astype(np.int32 if len(labels) < 2**31 else np.int64)),
+                        "labels": labels.to_numpy(dtype=object),
+                    }))
+                    continue
+            missing = series.isna().to_numpy()
+            joined = TEXT_SEPARATOR.join(series.fillna("").astype(str).tolist())
+            if joined.count(TEXT_SEPARATOR) != max(self.length - 1, 0):
+                self.columns.append((column, "objects", {"values": series.to_numpy(dtype=object)}))
+                continue
+            encoded = np.frombuffer(joined.encode(), dtype=np.uint8) if joined else np.empty(0, np.uint8)
+            self.columns.append((column, "text", {
+                "buffer": self._share(encoded),
+                "missing": self._share(missing),
+            }))
+
+    def _share(self, array: np.ndarray):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._blocks.append(block)
+        return block.name, array.shape, array.dtype.str
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_blocks"] = []
+        return state
+
+    @staticmethod
+    def _attach(ref) -> np.ndarray:
+        name, shape, dtype = ref
+        block = shared_memory.SharedMemory(name=name)
+        _ATTACHED.append(block)
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    def frame(self) -> pd.DataFrame:
+        """Rebuild the shared columns as a DataFrame, in any process"""
+        data = {}
+        for column, layout, refs in self.columns:
+            if layout == "values":
+                data[column] = self._attach(refs["values"])
+            elif layout == "codes":
+                codes = self._attach(refs["codes"])
+                labels = np.append(refs["labels"], None)
+                data[column] = labels[codes]
+            elif layout == "objects":
+                data[column] = refs["values"]
+            else:
+                texts = np.empty(self.length, dtype=object)
+                if self.length:
+                    texts[:] = self._attach(refs["buffer"]).tobytes().decode().split(TEXT_SEPARATOR)
+                texts[self._attach(refs["missing"])] = None
+                data[column] = texts
+        index = self.index if self.index is not None else pd.RangeIndex(self.length)
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def close(self) -> None:
+        """Release the shared blocks; call once every worker is done"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _release_attached() -> None:
+    """Close the shared blocks this worker no longer references"""
+    in_use = []
+    for block in _ATTACHED:
+        try:
+            block.close()
+        except BufferError:
+            # A returned value still views the block; close it after a later stage
+            in_use.append(block)
+    _ATTACHED[:] = in_use
+
+
+def _input_rows(kwargs: Dict[str, Any]) -> Optional[int]:
+    """Length of the first DataFrame input of a stage"""
+    for value in kwargs.values():
+        if isinstance(value, pd.DataFrame):
+            return len(value)
+        if isinstance(value, SharedColumns):
+            return value.length
+    return None
+
+
+def _call_in_thread(stage: Stage, kwargs: Dict[str, Any]):
+    """Run a thread stage inside its trace span"""
+    with span(stage.name, rows=_input_rows(kwargs), category="stage", kind="thread"):
+        return stage.func(**kwargs)
+
+
+def _call_in_process(func: Callable, kwargs: Dict[str, Any], traced: bool = False):
+    """
+    Run a process stage, rebuilding its shared DataFrame inputs.
+
+    Returns:
+        Tuple of (stage result, spans recorded in this worker when `traced`)
+    """
+    if traced:
+        start_trace()
+    inputs = {
+        key: value.frame() if isinstance(value, SharedColumns) else value
+        for key, value in kwargs.items()
+    }
+    try:
+        return func(**inputs), collect_events()
+    finally:
+        inputs.clear()
+        _release_attached()
+
+
+def _critical_path(stages: List[Stage], timings: Dict[str, Dict[str, float]]) -> List[str]:
+    """Longest chain of dependent stages by duration, in run order"""
+    producer = {output: stage.name for stage in stages for output in stage.outputs}
+    total, previous = {}, {}
+    for stage in sorted(stages, key=lambda stage: timings[stage.name]["start"]):
+        parents = [producer[name] for name in stage.inputs if name in producer]
+        parent = max(parents, key=lambda name: total[name], default=None)
+        previous[stage.name] = parent
+        total[stage.name] = timings[stage.name]["seconds"] + (total[parent] if parent else 0.0)
+    path = []
+    name = max(total, key=total.get, default=None)
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return path[::-1]
+
+
+def run_stages(
+    stages: Iterable[Stage],
+    values: Optional[Dict[str, Any]] = None,
+    processes: Optional[int] = None,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run stages as soon as their inputs are available.
+
+    Args:
+        stages: Stages to run; their inputs must be produced by another
+            stage or given in `values`
+        values: Initial named values
+        processes: Processes for process stages; defaults to
+            PROCESS_WORKERS capped at the CPU count. With fewer than two,
+            process stages run on the thread pool
+        progress: Print a line as each stage finishes
+
+    Returns:
+        Dictionary with the produced "values" and a JSON-compatible
+        "report" of stage timings and the critical path
+
+    Raises:
+        ValueError: If stage names or outputs clash, or an input is never produced
+        Exception: The first error raised by a stage
+    """
+    stages = list(stages)
+    values = dict(values or {})
+    names = [stage.name for stage in stages]
+    outputs = [output for stage in stages for output in stage.outputs]
+    if len(set(names)) != len(names) or len(set(outputs)) != len(outputs):
+        raise ValueError("Stage names and outputs must be unique")
+    available = set(values) | set(outputs)
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in available]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} reads values nothing produces: {missing}")
+
+    processes = processes or min(PROCESS_WORKERS, os.cpu_count() or 1)
+    threads = ThreadPoolExecutor(max_workers=THREAD_WORKERS)
+    pool = None
+    if processes >= 2 and any(stage.kind == "process" for stage in stages):
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+    shared = {}
+    timings = {}
+    running = {}
+    pending = list(stages)
+    started = time.perf_counter()
+    try:
+        while pending or running:
+            for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                pending.remove(stage)
+                kwargs = {name: values[name] for name in stage.inputs}
+                in_process = stage.kind == "process" and pool is not None
+                timings[stage.name] = {
+                    "kind": "process" if in_process else "thread",
+                    "start": time.perf_counter() - started,
+                    "start_ns": time.perf_counter_ns(),
+                    "rows": _input_rows(kwargs),
+                }
+                if in_process:
+                    for key, value in kwargs.items():
+                        if isinstance(value, pd.DataFrame):
+                            share_key = (key, tuple(stage.columns or value.columns))
+                            if share_key not in shared:
+                                shared[share_key] = SharedColumns(value, stage.columns)
+                            kwargs[key] = shared[share_key]
+                    future = pool.submit(_call_in_process, stage.func, kwargs, tracing())
+                else:
+                    # Thread stages see the very same objects, frame caches included
+                    future = threads.submit(_call_in_thread, stage, kwargs)
+                running[future] = stage
+
+            if not running:
+                raise ValueError(f"Stages wait on each other: {[stage.name for stage in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                result = future.result()
+                timing = timings[stage.name]
+                timing["end"] = time.perf_counter() - started
+                timing["seconds"] = timing["end"] - timing["start"]
+                start_ns, rows = timing.pop("start_ns"), timing.pop("rows")
+                if timing["kind"] == "process":
+                    result, events = result
+                    add_events(events)
+                    record_span(stage.name, start_ns, time.perf_counter_ns(), rows=rows, kind="process")
+                if len(stage.outputs) == 1:
+                    values[stage.outputs[0]] = result
+                elif stage.outputs:
+                    values.update(zip(stage.outputs, result))
+                if progress:
+                    finished = sum("end" in timing for timing in timings.values())
+                    print(f"[{finished}/{len(stages)}] {stage.name} done in {timing['seconds']:.2f}s")
+    finally:
+        threads.shutdown(cancel_futures=True)
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        for block in shared.values():
+            block.close()
+
+    wall = time.perf_counter() - started
+    path = _critical_path(stages, timings)
+    report = {
+        "wall_seconds": wall,
+        "stages": [
+            {
+                "name": stage.name,
+                "kind": timings[stage.name]["kind"],
+                "start": timings[stage.name]["start"],
+                "end": timings[stage.name]["end"],
+                "seconds": timings[stage.name]["seconds"],
+            }
+            for stage in sorted(stages, key=lambda stage: timings[stage.name]["start"])
+        ],
+        "critical_path": path,
+        "critical_path_seconds": sum(timings[name]["seconds"] for name in path),
+        "serial_seconds": sum(timing["seconds"] for timing in timings.values()),
+    }
+    return {"values": values, "report": report}
+
+
+def print_schedule_report(report: Dict[str, Any]) -> None:
+    """Print stage timings and the critical path of a run"""
+    print(f"\n=== Stage schedule ({report['wall_seconds']:.2f}s wall, "
+          f"{report['serial_seconds']:.2f}s of stage time) ===")
+    for stage in report["stages"]:
+        print(f"{stage['name']:<24} {stage['kind']:<8} "
+              f"{stage['start']:8.2f}s -> {stage['end']:8.2f}s  ({stage['seconds']:.2f}s)")
+    print(f"Critical path ({report['critical_path_seconds']:.2f}s): "
+          + " -> ".join(report["critical_path"]))
@@ -0,0 +1,388 @@
+"""
+Local HTTP query service over the resident dataset.
+
+`serve` loads the combined dataset once, from the dataset cache, and answers
+analysis queries on it until stopped. Every analysis endpoint takes the
+filters `category`, `region`, `start` and `end`:
+
+    GET /categorical?category=RightTroll&start=2016-01-01&end=2016-12-31
+
+Dates are YYYY-MM-DD and both ends are inclusive. Responses are JSON and
+cached by endpoint and filters, and concurrent identical queries share one
+computation. Light analyses run on one thread next to the event loop, so
+the loop keeps accepting requests. Sentiment scoring and the LLM summary
+run in worker processes that each load their own copy of the dataset, so
+only the query and its result cross the process boundary.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from ..dates import SECONDS_PER_DAY
+from ..utils import load_data, shard_paths
+from .eda_cache import disk_cache_enabled, register_dataset, use_disk_cache
+from .eda_helpers import frame_cache, publish_epoch
+from .eda_llm import (
+    categorical_feature_analysis,
+    generate_llm_summary,
+    network_analysis_for_llm,
+    sentiment_analysis_for_llm,
+    temporal_pattern_analysis,
+)
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+# Default number of worker processes for the heavy analyses, capped at the CPU count
+SERVICE_WORKERS = 2
+
+# Responses and filtered frames kept in memory, least recently used evicted first
+RESPONSE_CACHE_SIZE = 256
+FILTERED_FRAMES = 8
+
+FILTERS = ["category", "region", "start", "end"]
+
+# Endpoint name -> (analysis of a frame, runs in a worker process)
+ENDPOINTS = {
+    "categorical": (categorical_feature_analysis, False),
+    "temporal": (temporal_pattern_analysis, False),
+    "networks": (network_analysis_for_llm, False),
+    "sentiment": (sentiment_analysis_for_llm, True),
+    "llm-summary": (generate_llm_summary, True),
+}
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+# The dataset of this process and the frames filtered from it
+_DATASET = {"combined": None, "filtered": OrderedDict()}
+
+
+def _date_epoch(value: str, name: str) -> int:
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a YYYY-MM-DD date, got '{value}'") from None
+    return (day - date(1970, 1, 1)).days * SECONDS_PER_DAY
+
+
+def parse_filters(query: Dict[str, list]) -> Dict[str, str]:
+    """
+    Validate the filters of a query string.
+
+    Args:
+        query: Query parameters as returned by `urllib.parse.parse_qs`
+
+    Returns:
+        Dictionary of the given filters
+
+    Raises:
+        ValueError: For unknown or repeated parameters and malformed dates
+    """
+    unknown = sorted(set(query) - set(FILTERS))
+    if unknown:
+        raise ValueError(f"Unknown parameters {unknown}; filters are {FILTERS}")
+    filters = {}
+    for name, values in query.items():
+        if len(values) != 1:
+            raise ValueError(f"'{name}' given more than once")
+        filters[name] = values[0]
+    for name in ("start", "end"):
+        if name in filters:
+            _date_epoch(filters[name], name)
+    if "start" in filters and "end" in filters and filters["start"] > filters["end"]:
+        raise ValueError("'start' is after 'end'")
+    return filters
+
+
+def filter_mask(df: pd.DataFrame, filters: Dict[str, str]) -> np.ndarray:
+    """
+    Boolean mask of the rows matching the filters.
+
+    Rows without a publish date never match a date filter.
+
+    Args:
+        df: Combined DataFrame
+        filters: Result of `parse_filters`
+
+    Returns:
+        Boolean array aligned with the frame
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if "category" in filters:
+        mask &= (df["account_category"] == filters["category"]).to_numpy()
+    if "region" in filters:
+        mask &= (df["region"] == filters["region"]).to_numpy()
+    if "start" in filters or "end" in filters:
+        epoch = publish_epoch(df)
+        # MISSING_EPOCH sorts before every real date
+        start = _date_epoch(filters["start"], "start") if "start" in filters else np.iinfo(np.int64).min + 1
+        mask &= epoch >= start
+        if "end" in filters:
+            mask &= epoch < _date_epoch(filters["end"], "end") + SECONDS_PER_DAY
+    return mask
+
+
+def load_service_dataset(df: Optional[pd.DataFrame] = None, disk_cache: bool = True) -> pd.DataFrame:
+    """
+    Make a combined frame the dataset this process answers queries on.
+
+    Args:
+        df: Combined frame; loaded with `load_data` and registered with the
+            result cache when None
+        disk_cache: Use the on-disk result cache when loading the frame
+
+    Returns:
+        The combined frame
+    """
+    if df is None:
+        _, _, df = load_data()
+        use_disk_cache(disk_cache)
+        register_dataset(df, shard_paths())
+    _DATASET["combined"] = df
+    _DATASET["filtered"].clear()
+    return df
+
+
+def filtered_frame(filters: Dict[str, str]) -> pd.DataFrame:
+    """
+    Rows of the dataset matching the filters, kept for later queries.
+
+    Filtered frames are fingerprinted by their filters, and their results
+    stay out of the on-disk result cache. Sentiment scores already computed
+    for the whole dataset are sliced rather than scored again.
+
+    Args:
+        filters: Result of `parse_filters`
+
+    Returns:
+        DataFrame; the whole dataset when there are no filters
+    """
+    combined = _DATASET["combined"]
+    if not filters:
+        return combined
+    frames = _DATASET["filtered"]
+    key = tuple(sorted(filters.items()))
+    if key in frames:
+        frames.move_to_end(key)
+        return frames[key]
+
+    mask = filter_mask(combined, filters)
+    df = combined[mask]
+    register_dataset(df, shard_paths(), variant=f"filter_{json.dumps(key)}")
+    frame_cache(df)["memory_only"] = True
+    sentiment = frame_cache(combined).get("sentiment")
+    if sentiment is not None:
+        frame_cache(df)["sentiment"] = sentiment[mask]
+
+    frames[key] = df
+    if len(frames) > FILTERED_FRAMES:
+        frames.popitem(last=False)
+    return df
+
+
+def run_query(endpoint: str, filters: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Run one endpoint's analysis on the filtered dataset.
+
+    Args:
+        endpoint: Key of ENDPOINTS
+        filters: Result of `parse_filters`
+
+    Returns:
+        JSON-compatible response body
+    """
+    analysis, _ = ENDPOINTS[endpoint]
+    df = filtered_frame(filters)
+    return {"endpoint": endpoint, "filters": filters, "rows": len(df), "result": analysis(df)}
+
+
+class QueryService:
+    """
+    Answers analysis queries on the resident dataset with cached responses.
+
+    Args:
+        workers: Worker processes for the heavy analyses. With 0, they run
+            on the analysis thread of this process instead
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.responses = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        # One thread, as the analyses share per-frame caches
+        self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        self.pool = None
+        if workers:
+            # Spawned workers start clean and load the dataset from its cache
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_service_dataset,
+                initargs=(None, disk_cache_enabled()),
+            )
+
+    def close(self) -> None:
+        """Shut down the analysis thread and worker processes"""
+        self.thread.shutdown(cancel_futures=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def status(self) -> Dict[str, Any]:
+        """Dataset size, worker count and response-cache statistics"""
+        return {
+            "rows": len(_DATASET["combined"]),
+            "workers": self.workers,
+            "cached_responses": len(self.responses),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+        }
+
+    async def query(self, endpoint: str, filters: Dict[str, str]) -> Tuple[bytes, bool]:
+        """
+        Answer a query from the response cache, or compute it once.
+
+        Args:
+            endpoint: Key of ENDPOINTS
+            filters: Result of `parse_filters`
+
+        Returns:
+            Tuple of (JSON body, whether it came from the cache)
+        """
+        key = (endpoint, tuple(sorted(filters.items())))
+        if key in self.responses:
+            self.responses.move_to_end(key)
+            self.hits += 1
+            return self.responses[key], True
+
+        self.misses += 1
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(self._compute(key, endpoint, filters))
+        # Shielded, so a client hanging up does not cancel it for the others
+        return await asyncio.shield(self.pending[key]), False
+
+    async def _compute(self, key, endpoint: str, filters: Dict[str, str]) -> bytes:
+        loop = asyncio.get_running_loop()
+        heavy = ENDPOINTS[endpoint][1] and self.pool is not None
+        try:
+            result = await loop.run_in_executor(
+                self.pool if heavy else self.thread, run_query, endpoint, filters
+            )
+            body = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+        finally:
+            del self.pending[key]
+        self.responses[key] = body
+        if len(self.responses) > RESPONSE_CACHE_SIZE:
+            self.responses.popitem(last=False)
+        return body
+
+    async def respond(self, method: str, target: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Route one request.
+
+        Args:
+            method: HTTP method
+            target: Request target, path and query string
+
+        Returns:
+            Tuple of (status code, JSON body, extra headers)
+        """
+        url = urlsplit(target)
+        path = url.path.strip("/")
+        if method != "GET":
+            return 405, _error("Only GET is supported"), {"Allow": "GET"}
+        if path == "":
+            index = {"endpoints": ["health"] + list(ENDPOINTS), "filters": FILTERS}
+            return 200, json.dumps(index).encode("utf-8"), {}
+        if path == "health":
+            return 200, json.dumps(self.status()).encode("utf-8"), {}
+        if path not in ENDPOINTS:
+            return 404, _error(f"Unknown endpoint '/{path}'"), {}
+        try:
+            filters = parse_filters(parse_qs(url.query, keep_blank_values=True))
+        except ValueError as error:
+            return 400, _error(str(error)), {}
+        try:
+            body, hit = await self.query(path, filters)
+        except Exception as error:
+            return 500, _error(f"{type(error).__name__}: {error}"), {}
+        return 200, body, {"X-Cache": "hit" if hit else "miss"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one connection, keeping it alive between them"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    status, body, extra = 400, _error("Malformed request line"), {}
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, body, extra = await self.respond(method, target)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+                head = [f"HTTP/1.1 {status} {_REASONS[status]}",
+                        "Content-Type: application/json; charset=utf-8",
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+async def run_service(
+    host: str = SERVICE_HOST, port: int = SERVICE_PORT, workers: Optional[int] = None
+) -> None:
+    """
+    Serve queries on the dataset loaded by `load_service_dataset` until cancelled.
+
+    Args:
+        host: Interface to listen on
+        port: TCP port
+        workers: Worker processes for the heavy analyses; defaults to
+            SERVICE_WORKERS capped at the CPU count
+    """
+    workers = min(SERVICE_WORKERS, os.cpu_count() or 1) if workers is None else workers
+    service = QueryService(workers)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving {len(_DATASET['combined'])} rows on http://{host}:{port}/ "
+          f"with {workers} worker processes")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -0,0 +1,503 @@
+"""
+Mergeable sketches for EDA over shards and streams.
+
+A sketch summarizes one column of one chunk of data in bounded memory.
+Sketches built on different chunks, shards or worker processes can be
+merged, and the merged sketch answers the same questions as a sketch built
+over all of the data at once.
+"""
+
+import math
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch with exact count, min, max, mean and variance.
+
+    Values are kept in a stack of compactors; an item in compactor h stands
+    for 2**h original values. When a compactor overflows it is sorted and
+    every other item is promoted to the next level, so memory stays around
+    3k items regardless of how many values are added. Rank queries have a
+    normalized error of roughly 1.7 / k.
+
+    Args:
+        k: Accuracy parameter, larger is more accurate
+        seed: Seed for the random compaction offsets; sketches that will be
+            merged should not share a seed
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = int(k)
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, epsilon: float, seed: Optional[int] = None) -> "QuantileSketch":
+        """Create a sketch whose normalized rank error is about `epsilon`"""
+        return cls(k=max(8, math.ceil(1.7 / epsilon)), seed=seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # An odd item out stays behind so total weight is preserved
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[: len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            level += 1
+
+    def update(self, values) -> "QuantileSketch":
+        """
+        Add a batch of values. NaNs are ignored.
+
+        Args:
+            values: Array-like of numbers
+
+        Returns:
+            The sketch itself
+        """
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        n = values.size
+        if n == 0:
+            return self
+
+        # Chan et al. parallel update of the running mean and sum of squares
+        batch_mean = values.mean()
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: Sketch built over a different part of the data
+
+        Returns:
+            The sketch itself
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.mean, self.m2 = other.mean, other.m2
+        else:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.k = min(self.k, other.k)
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2 ** h, dtype="float64") for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Estimate one or more quantiles.
+
+        Args:
+            q: Quantile or array of quantiles in [0, 1]
+
+        Returns:
+            Float for a scalar `q`, otherwise a NumPy array
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype="float64"))
+        if self.count == 0:
+            result = np.full(qs.shape, np.nan)
+        else:
+            items, weights = self._weighted_items()
+            # Compaction preserves weight, so the last entry equals `count`
+            cumulative = np.cumsum(weights)
+            targets = qs * cumulative[-1]
+            index = np.clip(np.searchsorted(cumulative, targets, side="left"), 0, len(items) - 1)
+            result = items[index]
+            result[qs <= 0] = self.min
+            result[qs >= 1] = self.max
+        return float(result[0]) if np.ndim(q) == 0 else result
+
+    def rank(self, x, inclusive: bool = False):
+        """
+        Estimate how many values are below `x` (or at most `x` if inclusive).
+
+        Args:
+            x: Threshold or array of thresholds
+            inclusive: Count values equal to `x` as well
+
+        Returns:
+            Estimated count as a float, or an array for array input
+        """
+        xs = np.atleast_1d(np.asarray(x, dtype="float64"))
+        if self.count == 0:
+            result = np.zeros(xs.shape)
+        else:
+            items, weights = self._weighted_items()
+            cumulative = np.concatenate(([0.0], np.cumsum(weights)))
+            side = "right" if inclusive else "left"
+            position = np.searchsorted(items, xs, side=side)
+            result = cumulative[position] * self.count / cumulative[-1]
+        return float(result[0]) if np.ndim(x) == 0 else result
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1) or None with fewer than two values"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+    @property
+    def size(self) -> int:
+        """Number of retained items"""
+        return int(sum(len(level) for level in self.levels))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the sketch to a JSON-compatible dictionary"""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "mean": self.mean,
+            "m2": self.m2,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], seed: Optional[int] = None) -> "QuantileSketch":
+        """Rebuild a sketch serialized with `to_dict`"""
+        sketch = cls(k=data["k"], seed=seed)
+        sketch.count = int(data["count"])
+        sketch.min = data["min"] if data["min"] is not None else math.inf
+        sketch.max = data["max"] if data["max"] is not None else -math.inf
+        sketch.mean = float(data["mean"])
+        sketch.m2 = float(data["m2"])
+        sketch.levels = [np.asarray(level, dtype="float64") for level in data["levels"]]
+        return sketch
+
+
+def build_quantile_sketches(
+    df: pd.DataFrame, features: Iterable[str], k: int = 200
+) -> Dict[str, QuantileSketch]:
+    """
+    Build one quantile sketch per numerical feature of a DataFrame or chunk.
+
+    Args:
+        df: DataFrame (or chunk of one) with the features
+        features: Numerical columns to sketch
+        k: Accuracy parameter passed to each sketch
+
+    Returns:
+        Dictionary mapping feature names to sketches
+    """
+    return {
+        feature: QuantileSketch(k=k).update(df[feature].to_numpy(dtype="float64", na_value=np.nan))
+        for feature in features
+        if feature in df.columns
+    }
+
+
+def merge_quantile_sketches(
+    sketch_sets: Iterable[Dict[str, QuantileSketch]]
+) -> Dict[str, QuantileSketch]:
+    """
+    Merge per-chunk sketch dictionaries into one sketch per feature.
+
+    Args:
+        sketch_sets: Iterable of dictionaries from `build_quantile_sketches`
+
+    Returns:
+        Dictionary mapping feature names to merged sketches
+    """
+    merged: Dict[str, QuantileSketch] = {}
+    for sketches in sketch_sets:
+        for feature, sketch in sketches.items():
+            if feature in merged:
+                merged[feature].merge(sketch)
+            else:
+                merged[feature] = QuantileSketch(k=sketch.k).merge(sketch)
+    return merged
+
+
+def sketch_chunks(
+    chunks: Iterable[pd.DataFrame], features: Iterable[str], k: int = 200
+) -> Dict[str, QuantileSketch]:
+    """
+    Stream chunks (e.g. from `pd.read_csv(..., chunksize=...)`) into sketches.
+
+    Args:
+        chunks: Iterable of DataFrames
+        features: Numerical columns to sketch
+        k: Accuracy parameter passed to each sketch
+
+    Returns:
+        Dictionary mapping feature names to sketches covering all chunks
+    """
+    features = list(features)
+    return merge_quantile_sketches(
+        build_quantile_sketches(chunk, features, k) for chunk in chunks
+    )
+
+
+# Columns with at most this many values are counted exactly by default
+EXACT_DISTINCT_LIMIT = 100_000
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    Hash values to 64-bit integers, stably across processes and runs.
+
+    Args:
+        values: Array-like of hashable values
+
+    Returns:
+        uint64 NumPy array
+    """
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of uint64 values with a branch-free binary search"""
+    x = x.copy()
+    zeros = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        top_clear = (x >> np.uint64(64 - shift)) == 0
+        zeros += top_clear.astype(np.uint8) * np.uint8(shift)
+        x = np.where(top_clear, x << np.uint64(shift), x)
+    zeros += (x == 0).astype(np.uint8)
+    return zeros
+
+
+def _register_updates(hashes: np.ndarray, precision: int):
+    """Split hashes into register indices and the rank stored in each register"""
+    index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    remainder = hashes << np.uint64(precision)
+    rank = np.minimum(_leading_zeros(remainder), 64 - precision) + 1
+    return index, rank.astype(np.uint8)
+
+
+def _estimate(registers: np.ndarray) -> np.ndarray:
+    """HyperLogLog estimate with linear counting for small cardinalities"""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.power(2.0, -registers.astype("float64")).sum(axis=1)
+    empty = (registers == 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(empty, 1))
+    return np.where((raw <= 2.5 * m) & (empty > 0), linear, raw)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with mergeable registers.
+
+    Uses 2**precision one-byte registers; the relative standard error is
+    about 1.04 / sqrt(2**precision), e.g. 0.8% at the default precision 14.
+
+    Args:
+        precision: Number of index bits, between 4 and 18
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values) -> "HyperLogLog":
+        """
+        Add a batch of values. Missing values are ignored.
+
+        Args:
+            values: Array-like of hashable values
+
+        Returns:
+            The counter itself
+        """
+        values = pd.Series(values, dtype=object).dropna().to_numpy()
+        if len(values):
+            index, rank = _register_updates(hash_values(values), self.precision)
+            np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another counter with the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog counters with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values"""
+        return int(round(_estimate(self.registers)[0]))
+
+
+class GroupedHyperLogLog:
+    """
+    One HyperLogLog counter per group, updated in a single vectorized pass.
+
+    Groups are arbitrary tuples of key values (e.g. account category and
+    month) and are added as they are first seen.
+
+    Args:
+        precision: Number of index bits per group counter
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.groups: Dict[tuple, int] = {}
+        self.registers = np.zeros((0, 2 ** precision), dtype=np.uint8)
+
+    def _group_ids(self, keys: List[tuple]) -> np.ndarray:
+        for key in keys:
+            if key not in self.groups:
+                self.groups[key] = len(self.groups)
+        if len(self.groups) > self.registers.shape[0]:
+            grown = np.zeros((len(self.groups), self.registers.shape[1]), dtype=np.uint8)
+            grown[: self.registers.shape[0]] = self.registers
+            self.registers = grown
+        return np.array([self.groups[key] for key in keys], dtype=np.intp)
+
+    def update(self, values, keys) -> "GroupedHyperLogLog":
+        """
+        Add a batch of values with their group keys.
+
+        Args:
+            values: Array-like of hashable values
+            keys: List of array-likes, one per key level, aligned with `values`
+
+        Returns:
+            The counter itself
+        """
+        frame = pd.DataFrame({f"key_{i}": np.asarray(key, dtype=object) for i, key in enumerate(keys)})
+        frame["value"] = np.asarray(values, dtype=object)
+        frame = frame.dropna()
+        if frame.empty:
+            return self
+
+        key_columns = [col for col in frame.columns if col != "value"]
+        codes, uniques = pd.MultiIndex.from_frame(frame[key_columns]).factorize()
+        group_ids = self._group_ids(list(uniques))[codes]
+        index, rank = _register_updates(hash_values(frame["value"].to_numpy()), self.precision)
+        np.maximum.at(self.registers, (group_ids, index), rank)
+        return self
+
+    def merge(self, other: "GroupedHyperLogLog") -> "GroupedHyperLogLog":
+        """Fold another grouped counter with the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog counters with different precision")
+        ids = self._group_ids(list(other.groups))
+        np.maximum.at(self.registers, ids, other.registers[list(other.groups.values())])
+        return self
+
+    def counts(self) -> Dict[tuple, int]:
+        """Estimated number of distinct values for every group"""
+        estimates = _estimate(self.registers) if self.groups else []
+        return {key: int(round(estimates[i])) for key, i in self.groups.items()}
+
+
+def split_list_column(series: pd.Series, sep: str = ",") -> pd.Series:
+    """
+    Explode a comma-separated column such as `hashtags` into one entry per item.
+
+    Args:
+        series: Column of delimited strings
+        sep: Item separator
+
+    Returns:
+        Series of stripped, non-empty items indexed by their original row
+    """
+    items = series.dropna().astype(str).str.split(sep).explode().str.strip()
+    return items[items.notna() & (items != "")]
+
+
+def distinct_count(values, exact: Optional[bool] = None, precision: int = 14) -> int:
+    """
+    Count distinct non-missing values, exactly or with HyperLogLog.
+
+    Args:
+        values: Array-like of hashable values
+        exact: Force exact (True) or approximate (False) counting; by default
+            columns with at most EXACT_DISTINCT_LIMIT values are counted exactly
+        precision: HyperLogLog precision used in approximate mode
+
+    Returns:
+        Number of distinct values
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if exact is None:
+        exact = len(values) <= EXACT_DISTINCT_LIMIT or isinstance(values.dtype, pd.CategoricalDtype)
+    if exact:
+        return int(values.nunique())
+    return HyperLogLog(precision).update(values).count()
+
+
+def distinct_counts_by_group(
+    df: pd.DataFrame, column: str, by: List, list_column: bool = False, precision: int = 12
+) -> GroupedHyperLogLog:
+    """
+    Build grouped distinct counters, e.g. distinct hashtags per category per month.
+
+    Args:
+        df: DataFrame with the value and key columns
+        column: Column whose distinct values are counted
+        by: Key column names or aligned arrays (such as a month key)
+        list_column: Whether `column` holds comma-separated items
+        precision: HyperLogLog precision per group
+
+    Returns:
+        GroupedHyperLogLog that can be merged with counters from other shards
+    """
+    keys = [df[key].to_numpy() if isinstance(key, str) else np.asarray(key) for key in by]
+    counter = GroupedHyperLogLog(precision)
+    if list_column:
+        # Exploding the bare values indexes the items by row position, whatever the frame's index
+        items = split_list_column(pd.Series(df[column].to_numpy()))
+        positions = items.index.to_numpy()
+        return counter.update(items.to_numpy(), [key[positions] for key in keys])
+    return counter.update(df[column].to_numpy(), keys)
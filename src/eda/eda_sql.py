@@ -0,0 +1,373 @@
+"""
+Embedded SQL backend for aggregate EDA queries.
+
+`TweetDatabase` ingests the trimmed and derived CSVs, chunk by chunk, into
+one `tweets` table of a local SQLite file, or of a DuckDB file when the
+`duckdb` package is installed. The table has indexes on account_category,
+region, language and date. It is rebuilt when the source files change.
+
+The categorical, temporal and account-behavior analyses are pushed down as
+GROUP BY queries. Only their aggregated rows reach Python, and those rows
+go through the same `summarize_*` reporting as the DataFrame analyses. No
+DataFrame of tweets is built, so memory stays flat as the data grows.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from ..dates import MISSING_EPOCH
+from ..tracing import span
+from ..utils import RAW_DIR, combine_frames, dataset_shards, shard_paths, source_fingerprint
+from .eda_basic import (
+    CATEGORICAL_FEATURES,
+    summarize_account_behavior,
+    summarize_categorical_counts,
+    summarize_temporal_rollup,
+)
+from .eda_helpers import ACCOUNT_KEY_COLUMNS
+from .eda_rollup import DIMENSIONS, RESOLUTIONS, TimeRollup
+
+try:
+    import duckdb
+except ImportError:  # optional; SQLite is always available
+    duckdb = None
+
+ENGINES = ("sqlite", "duckdb")
+
+DATABASE_PATHS = {"sqlite": "data/processed/tweets.sqlite", "duckdb": "data/processed/tweets.duckdb"}
+
+# CSV rows read and inserted at a time
+INGEST_CHUNK_ROWS = 100_000
+
+INDEXED_COLUMNS = ["account_category", "region", "language", "date"]
+
+# Integer division per dialect; DuckDB's `/` always returns a float
+_INTEGER_DIVISION = {"sqlite": "{} / {}", "duckdb": "{} // {}"}
+
+
+def default_engine() -> str:
+    """DuckDB when it is installed, otherwise SQLite"""
+    return "duckdb" if duckdb is not None else "sqlite"
+
+
+class TweetDatabase:
+    """
+    Connection to the embedded tweet database.
+
+    Args:
+        path: Database file
+        engine: "sqlite" or "duckdb"
+
+    Raises:
+        ValueError: If the engine is unknown or not installed
+    """
+
+    def __init__(self, path: str, engine: str = "sqlite"):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}")
+        if engine == "duckdb" and duckdb is None:
+            raise ValueError("The duckdb engine needs the duckdb package")
+        self.path = path
+        self.engine = engine
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = duckdb.connect(path) if engine == "duckdb" else sqlite3.connect(path)
+
+    @classmethod
+    def open(
+        cls,
+        path: Optional[str] = None,
+        engine: Optional[str] = None,
+        shards: Optional[List[int]] = None,
+        rebuild: bool = False,
+    ) -> "TweetDatabase":
+        """
+        Open the database, ingesting the shards first if they changed.
+
+        Args:
+            path: Database file; DATABASE_PATHS[engine] by default
+            engine: "sqlite" or "duckdb"; `default_engine()` by default
+            shards: Shard numbers; `dataset_shards()` by default
+            rebuild: Ingest even if the database is up to date
+
+        Returns:
+            TweetDatabase
+        """
+        engine = engine or default_engine()
+        database = cls(path or DATABASE_PATHS[engine], engine)
+        shards = dataset_shards() if shards is None else list(shards)
+        fingerprint = source_fingerprint(shard_paths(shards))
+        if rebuild or database.fingerprint() != fingerprint:
+            database.ingest(shards, fingerprint)
+        return database
+
+    def close(self) -> None:
+        """Close the connection"""
+        self.connection.close()
+
+    def execute(self, sql: str, params=()):
+        """Run a statement with `?` parameters and return the cursor"""
+        return self.connection.execute(sql, params)
+
+    def query(self, sql: str, params=()) -> pd.DataFrame:
+        """Run a query and return its (aggregated) rows as a DataFrame"""
+        cursor = self.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+    def tables(self) -> List[str]:
+        """Names of the tables in the database"""
+        if self.engine == "duckdb":
+            rows = self.execute("SELECT table_name FROM information_schema.tables").fetchall()
+        else:
+            rows = self.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return [row[0] for row in rows]
+
+    def columns(self) -> List[str]:
+        """Columns of the tweets table"""
+        return [column[0] for column in self.execute("SELECT * FROM tweets LIMIT 0").description]
+
+    def fingerprint(self) -> Optional[str]:
+        """Source fingerprint of the ingested data, or None before the first ingest"""
+        if "meta" not in self.tables():
+            return None
+        row = self.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        return row[0] if row else None
+
+    def _insert(self, chunk: pd.DataFrame, create: bool) -> None:
+        if self.engine == "duckdb":
+            self.connection.register("chunk", chunk)
+            statement = "CREATE TABLE tweets AS SELECT * FROM chunk" if create else (
+                "INSERT INTO tweets SELECT * FROM chunk"
+            )
+            self.execute(statement)
+            self.connection.unregister("chunk")
+        else:
+            chunk.to_sql("tweets", self.connection, if_exists="replace" if create else "append", index=False)
+
+    def ingest(self, shards: List[int], fingerprint: str, chunk_rows: int = INGEST_CHUNK_ROWS) -> None:
+        """
+        Replace the tweets table with the trimmed and derived CSVs of the shards.
+
+        Args:
+            shards: Shard numbers
+            fingerprint: Source fingerprint stored with the data
+            chunk_rows: CSV rows read and inserted at a time
+        """
+        for table in ("tweets", "meta"):
+            self.execute(f"DROP TABLE IF EXISTS {table}")
+        rows = 0
+        with span("sql_ingest", category="stage"):
+            for shard in shards:
+                trimmed = pd.read_csv(f"{RAW_DIR}/{shard}_trimmed.csv", chunksize=chunk_rows)
+                derived = pd.read_csv(f"{RAW_DIR}/{shard}_derived.csv", chunksize=chunk_rows)
+                for raw_chunk, derived_chunk in zip(trimmed, derived):
+                    chunk = combine_frames(raw_chunk, derived_chunk)["combined"]
+                    # Missing dates are stored as NULL rather than the sentinel
+                    epoch = chunk["publish_epoch"].to_numpy()
+                    chunk["publish_epoch"] = pd.Series(
+                        epoch, index=chunk.index, dtype="Int64"
+                    ).mask(epoch == MISSING_EPOCH)
+                    self._insert(chunk, create=rows == 0)
+                    rows += len(chunk)
+
+            for column in INDEXED_COLUMNS:
+                if column in self.columns():
+                    self.execute(f'CREATE INDEX idx_tweets_{column} ON tweets ("{column}")')
+            self.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+            if self.engine == "sqlite":
+                # DuckDB commits every statement on its own
+                self.connection.commit()
+        print(f"Ingested {rows} rows into {self.path}")
+
+    def integer_division(self, numerator: str, denominator: str) -> str:
+        """SQL expression for integer division in this engine's dialect"""
+        return _INTEGER_DIVISION[self.engine].format(numerator, denominator)
+
+    def median_by(self, group: str, column: str, source: str = "tweets") -> pd.Series:
+        """
+        Median of a column per group, skipping missing values of both.
+
+        Args:
+            group: Grouping column
+            column: Numeric column
+            source: Table or parenthesized subquery to read from
+
+        Returns:
+            Series of medians indexed by group value
+        """
+        if self.engine == "duckdb":
+            sql = (f'SELECT "{group}" AS grp, MEDIAN("{column}") AS value FROM {source} '
+                   f'WHERE "{group}" IS NOT NULL AND "{column}" IS NOT NULL GROUP BY 1')
+        else:
+            # Middle one or two values of every group, by window position
+            sql = f"""
+                SELECT grp, AVG(value) AS value FROM (
+                    SELECT "{group}" AS grp, "{column}" AS value,
+                        ROW_NUMBER() OVER (PARTITION BY "{group}" ORDER BY "{column}") AS position,
+                        COUNT(*) OVER (PARTITION BY "{group}") AS n
+                    FROM {source}
+                    WHERE "{group}" IS NOT NULL AND "{column}" IS NOT NULL
+                )
+                WHERE position IN ((n + 1) / 2, (n + 2) / 2)
+                GROUP BY grp
+            """
+        rows = self.query(sql)
+        return pd.Series(rows["value"].to_numpy(dtype="float64"), index=rows["grp"].to_numpy()).sort_index()
+
+
+def _counts(database: TweetDatabase, column: str) -> pd.Series:
+    """Row count per non-missing value, indexed in sorted value order"""
+    rows = database.query(
+        f'SELECT "{column}" AS value, COUNT(*) AS count FROM tweets '
+        f'WHERE "{column}" IS NOT NULL GROUP BY 1'
+    )
+    return pd.Series(rows["count"].to_numpy(dtype="int64"), index=rows["value"].to_numpy()).sort_index()
+
+
+def sql_categorical_features(database: TweetDatabase):
+    """
+    Categorical feature statistics as SQL aggregates; see `analyze_categorical_features`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    columns = database.columns()
+    counts = {feature: _counts(database, feature) for feature in CATEGORICAL_FEATURES if feature in columns}
+    return summarize_categorical_counts(counts)
+
+
+def sql_temporal_patterns(database: TweetDatabase, resolution: str = "hour"):
+    """
+    Temporal distributions from a rollup cube aggregated in SQL; see
+    `analyze_temporal_patterns`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    columns = database.columns()
+    if "publish_date" not in columns:
+        return {"has_temporal_data": False}, []
+    dated = database.execute("SELECT COUNT(publish_date) FROM tweets").fetchone()[0]
+    if not dated:
+        return {"has_temporal_data": False}, []
+
+    bucket = database.integer_division("publish_epoch", str(RESOLUTIONS[resolution]))
+    dimensions = [f'"{dim}"' if dim in columns else "NULL" for dim in DIMENSIONS]
+    retweets = ', SUM(retweet) AS retweets' if "retweet" in columns else ""
+    cells = database.query(
+        f"SELECT {bucket} AS bucket, {', '.join(f'{dim} AS d{i}' for i, dim in enumerate(dimensions))}, "
+        f"COUNT(*) AS count{retweets} FROM tweets WHERE publish_epoch IS NOT NULL "
+        f"GROUP BY {', '.join(str(i + 1) for i in range(len(DIMENSIONS) + 1))}"
+    )
+    measures = {"count": cells["count"].to_numpy(dtype="int64")}
+    if retweets:
+        measures["retweets"] = cells["retweets"].to_numpy(dtype="float64", na_value=0.0)
+    cube = TimeRollup.from_cells(
+        cells["bucket"].to_numpy(dtype="int64"),
+        {dim: cells[f"d{i}"] for i, dim in enumerate(DIMENSIONS)},
+        measures,
+        resolution,
+    )
+    return summarize_temporal_rollup(cube)
+
+
+def sql_account_behavior(database: TweetDatabase):
+    """
+    Account behavior statistics as SQL aggregates; see `analyze_account_behavior`.
+
+    Returns:
+        Tuple of (JSON-compatible result, figure specs)
+    """
+    columns = database.columns()
+    retweet_by_category = None
+    follower_stats = None
+    level = None
+    if "account_category" not in columns:
+        return summarize_account_behavior(retweet_by_category, follower_stats, level)
+
+    if "retweet" in columns:
+        # Missing categories count as "Unknown", as in the account profiles
+        rows = database.query(
+            "SELECT COALESCE(account_category, 'Unknown') AS category, "
+            "SUM(COALESCE(retweet, 0)) AS retweets, COUNT(*) AS tweets FROM tweets GROUP BY 1"
+        )
+        retweet_by_category = pd.Series(
+            rows["retweets"].to_numpy(dtype="float64") / rows["tweets"].to_numpy(dtype="float64"),
+            index=rows["category"].to_numpy(),
+        ).sort_index()
+
+    if "followers" in columns and "following" in columns:
+        key = next((column for column in ACCOUNT_KEY_COLUMNS if column in columns), None)
+        if key in (None, "account_type"):
+            # Account types are not accounts, so take medians over tweets
+            source = "tweets"
+            level = "tweet"
+        else:
+            # Medians over accounts, using each account's latest snapshot
+            source = f"""(
+                SELECT account_category, followers, following FROM (
+                    SELECT COALESCE(account_category, 'Unknown') AS account_category, followers, following,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY "{key}", account_category
+                            ORDER BY publish_epoch IS NULL, publish_epoch DESC
+                        ) AS latest
+                    FROM tweets
+                ) WHERE latest = 1
+            )"""
+            level = "account"
+        follower_stats = pd.DataFrame({
+            column: database.median_by("account_category", column, source)
+            for column in ("followers", "following")
+        })
+
+    return summarize_account_behavior(retweet_by_category, follower_stats, level)
+
+
+# Report section -> pushed-down analysis
+SQL_ANALYSES = {
+    "categorical": sql_categorical_features,
+    "temporal": sql_temporal_patterns,
+    "account_behavior": sql_account_behavior,
+}
+
+
+def sql_report(
+    path: Optional[str] = None,
+    engine: Optional[str] = None,
+    rebuild: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the pushed-down analyses on the embedded database.
+
+    Args:
+        path: Database file; see `TweetDatabase.open`
+        engine: "sqlite" or "duckdb"
+        rebuild: Re-ingest the CSVs even if they are unchanged
+
+    Returns:
+        JSON-compatible dictionary with the engine and one result per analysis
+    """
+    database = TweetDatabase.open(path, engine, rebuild=rebuild)
+    try:
+        report = {"engine": database.engine}
+        for name, analysis in SQL_ANALYSES.items():
+            with span(f"sql_{name}", category="analysis"):
+                report[name] = analysis(database)[0]
+    finally:
+        database.close()
+    return report
+
+
+def save_sql_report(output_path: str = "plots/sql_eda.json", **options) -> Dict[str, Any]:
+    """Run `sql_report` and save it as JSON"""
+    report = sql_report(**options)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"SQL EDA results saved to {output_path}")
+    return report
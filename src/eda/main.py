@@ -2,77 +2,333 @@
 This module performs exploratory data analysis on the third trolls dataset.
 """
 
+import asyncio
+import json
 import os
 
-import nltk
-import matplotlib.pyplot as plt
-import seaborn as sns
-from ..utils import load_data
+from ..tracing import print_trace_summary, span, start_trace, write_trace
+from ..utils import load_data, shard_paths
 from .eda_basic import (
     basic_stats,
     analyze_categorical_features,
+    analyze_cardinality,
     analyze_numerical_features,
     analyze_temporal_patterns,
     analyze_account_behavior,
 )
-from .eda_nlp import correlation_matrix, analyze_content, sentiment_analysis
+from .eda_bursts import analyze_bursts
+from .eda_cache import cached_result, register_dataset, run_analysis, use_disk_cache
+from .eda_coordination import analyze_coordination
+from .eda_nlp import (
+    correlation_matrix,
+    analyze_content,
+    sentiment_analysis,
+    compute_sentiment,
+    score_sentiment,
+    attach_sentiment,
+)
+from .eda_render import start_render_pool, finish_rendering
 from .eda_network import save_network_data
-from .eda_helpers import progress_bar
-from .eda_llm import generate_llm_eda
+from .eda_resources import load_resources
+from .eda_rollup import get_rollup, load_rollup
+from .eda_accounts import get_account_profiles, load_account_profiles
+from .eda_scheduler import Stage, run_stages, print_schedule_report
+from .eda_llm import generate_llm_eda, generate_llm_summary
+from .eda_ingest import INGEST_DIR, ingest_batch
+from .eda_partials import SHARD_DIR, analyze_shards
+from .eda_sample import BOOTSTRAP_REPLICATES, MIN_PER_STRATUM, bootstrap_intervals, load_sample
+from .eda_service import SERVICE_HOST, SERVICE_PORT, load_service_dataset, run_service
+from .eda_sql import save_sql_report
+
+# Analyses of the combined frame that need nothing but the frame itself
+COMBINED_ANALYSES = {
+    "categorical": analyze_categorical_features,
+    "cardinality": analyze_cardinality,
+    "numerical": analyze_numerical_features,
+    "bursts": analyze_bursts,
+    "correlation": correlation_matrix,
+    "content": analyze_content,
+}
+
+
+def _score_sentiment(combined):
+    return score_sentiment(combined["content"])
+
+
+def eda_stages(plots=True, score_in_process=True, sampling=None, replicates=BOOTSTRAP_REPLICATES):
+    """
+    Declare the stages of the EDA run.
+
+    Stages read the "raw", "derived" and "combined" frames and never modify
+    them; anything one stage derives for another is a declared output.
+
+    Args:
+        plots: Render figures
+        score_in_process: Score sentiment in a process stage; pass False
+            when the sentiment result is already cached
+        sampling: Sampling design when the frames are a sample; adds
+            bootstrap intervals of the LLM summary
+        replicates: Bootstrap resamples of the intervals
+
+    Returns:
+        List of Stage
+    """
+    def analysis(func):
+        return lambda combined: func(combined, "combined", plots=plots)
+
+    # The cached rollup and profiles describe the whole dataset, so a sample
+    # builds its own
+    rollup = get_rollup if sampling else load_rollup
+    profiles = get_account_profiles if sampling else load_account_profiles
+
+    def add_sentiment(combined, scores):
+        """Add the scores to the rollup and account profiles, and to their cache entries"""
+        rollup(combined, sentiment=scores)
+        profiles(combined, sentiment=scores)
+
+    stages = [
+        Stage("basic_raw", lambda raw: basic_stats(raw, "raw", plots=plots),
+              inputs=["raw"], outputs=["basic_raw"]),
+        Stage("basic_derived", lambda derived: basic_stats(derived, "derived", plots=plots),
+              inputs=["derived"], outputs=["basic_derived"]),
+        # Temporal rollups and account profiles are built once per dataset
+        # and reused from the cache
+        Stage("rollup", lambda combined: rollup(combined), inputs=["combined"], outputs=["rollup"]),
+        Stage("account_profiles", lambda combined: profiles(combined),
+              inputs=["combined"], outputs=["account_profiles"]),
+        Stage("temporal", lambda combined, rollup: analyze_temporal_patterns(combined, "combined", plots=plots),
+              inputs=["combined", "rollup"], outputs=["temporal"]),
+        Stage("account_behavior",
+              lambda combined, account_profiles: analyze_account_behavior(combined, "combined", plots=plots),
+              inputs=["combined", "account_profiles"], outputs=["account_behavior"]),
+        Stage("coordination", lambda combined: run_analysis(analyze_coordination, combined, "combined"),
+              inputs=["combined"], outputs=["coordination"]),
+        Stage("network", lambda combined: save_network_data(combined, "plots/network_data.json"),
+              inputs=["combined"], outputs=["network"]),
+    ]
+    stages += [
+        Stage(name, analysis(func), inputs=["combined"], outputs=[name])
+        for name, func in COMBINED_ANALYSES.items()
+    ]
+
+    if score_in_process:
+        # VADER scoring is pure Python, so it gets its own process
+        def sentiment(combined, sentiment_scores, rollup, account_profiles):
+            attach_sentiment(combined, sentiment_scores)
+            add_sentiment(combined, sentiment_scores)
+            return sentiment_analysis(combined, "combined", plots=plots)
+
+        stages.append(Stage("sentiment_scores", _score_sentiment, inputs=["combined"],
+                            outputs=["sentiment_scores"], kind="process", columns=["content"]))
+        stages.append(Stage("sentiment", sentiment,
+                            inputs=["combined", "sentiment_scores", "rollup", "account_profiles"],
+                            outputs=["sentiment"]))
+    else:
+        stages.append(Stage("sentiment", analysis(sentiment_analysis), inputs=["combined"],
+                            outputs=["sentiment"]))
+
+    # The LLM summary reuses every cached result, so it runs last
+    analyses = [output for stage in stages for output in stage.outputs if output != "sentiment_scores"]
+    if sampling is None:
+        stages.append(Stage("llm", lambda combined, **results: generate_llm_eda(combined),
+                            inputs=["combined"] + analyses))
+        return stages
+
+    stages.append(Stage("intervals",
+                        lambda combined, **results: bootstrap_intervals(
+                            generate_llm_summary, combined, replicates),
+                        inputs=["combined"] + analyses, outputs=["intervals"]))
+    stages.append(Stage("llm", lambda combined, intervals: generate_llm_eda(
+                            combined, sampling={"mode": "sample", **sampling, **intervals}),
+                        inputs=["combined", "intervals"]))
+    return stages
+
+
+def _load_registered(sample=None, seed=0, disk_cache=True):
+    """
+    Load the dataset, or a stratified sample of it, and enable the result
+    cache for its frames.
+
+    Args:
+        sample: Sample size; None loads every row
+        seed: Random seed of the sample
+        disk_cache: Reuse analysis results stored by earlier runs
+
+    Returns:
+        Tuple of (raw frame, derived frame, combined frame, sampling design
+        or None)
+    """
+    with span("load_data", category="stage"):
+        if sample is None:
+            raw_df, derived_df, combined_df = load_data()
+            design, variant = None, ""
+        else:
+            raw_df, derived_df, combined_df, design = load_sample(sample, seed)
+            variant = f"sample_{sample}_{seed}"
+    # Analysis results are reused within the run and, with the disk cache,
+    # across runs until the source files or the code change
+    use_disk_cache(disk_cache)
+    for frame in (raw_df, derived_df, combined_df):
+        register_dataset(frame, shard_paths(), variant)
+    return raw_df, derived_df, combined_df, design
 
-# Set style for visualizations
-os.makedirs("plots", exist_ok=True)
-plt.style.use("fivethirtyeight")
-sns.set_theme(font_scale=1.2)
-sns.set_palette("husl")
 
+def stats(disk_cache=True):
+    """Print basic statistics of the raw and derived data, without plots or NLP"""
+    raw_df, derived_df, _, _ = _load_registered(disk_cache=disk_cache)
+    basic_stats(raw_df, "raw", plots=False)
+    basic_stats(derived_df, "derived", plots=False)
 
-def eda():
-    """Run the full EDA process"""
+
+def network(output_path="plots/network_data.json", disk_cache=True):
+    """Extract the hashtag and mention networks, without plots or NLP"""
+    _, _, combined_df, _ = _load_registered(disk_cache=disk_cache)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    save_network_data(combined_df, output_path)
+
+
+def sql(engine=None, db_path=None, rebuild=False, output_path="plots/sql_eda.json"):
+    """
+    Run the categorical, temporal and account-behavior analyses as SQL
+    aggregates on the embedded database, without loading the dataset.
+
+    Args:
+        engine: "sqlite" or "duckdb"; DuckDB when installed by default
+        db_path: Database file; see `eda_sql.DATABASE_PATHS`
+        rebuild: Re-ingest the CSVs even if they are unchanged
+        output_path: Path of the JSON results
+    """
+    start_trace()
+    save_sql_report(output_path, path=db_path, engine=engine, rebuild=rebuild)
+    print_trace_summary()
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, workers=None, disk_cache=True):
+    """
+    Load the dataset once and answer analysis queries over HTTP until
+    interrupted; see `eda_service` for the endpoints and filters.
+
+    Args:
+        host: Interface to listen on
+        port: TCP port
+        workers: Worker processes for sentiment and the LLM summary; 0 runs
+            them in this process
+        disk_cache: Reuse analysis results stored by earlier runs
+    """
+    _, _, combined_df, _ = _load_registered(disk_cache=disk_cache)
+    load_service_dataset(combined_df)
+    try:
+        asyncio.run(run_service(host, port, workers))
+    except KeyboardInterrupt:
+        print("Service stopped")
+
+
+def ingest(path, output_dir=INGEST_DIR):
+    """
+    Append a batch of new tweets to the dataset and refresh the corpus
+    report from the stored aggregates, without a full EDA run.
+
+    Args:
+        path: CSV file of trimmed tweets
+        output_dir: Directory of the batch and corpus reports
+    """
+    start_trace()
+    reports = ingest_batch(path, output_dir)
+    print_trace_summary()
+    batch = next(name for name in reports if name != "corpus")
+    print(f"Ingested {reports[batch]['rows']} rows as {batch}; "
+          f"the corpus now has {reports['corpus']['rows']} rows")
+    print(f"Batch and corpus reports saved to '{output_dir}'")
+
+
+def shards(shard_numbers=None, processes=None, output_dir=SHARD_DIR, use_cache=True):
+    """
+    Analyze every shard in parallel worker processes, without plots or NLP.
+
+    Writes one JSON report per shard and one for the whole corpus, merged
+    from the shards' partial results; see `eda_partials`.
+
+    Args:
+        shard_numbers: Shards to analyze; all configured shards by default
+        processes: Worker processes; see `analyze_shards`
+        output_dir: Directory of the reports
+        use_cache: Reuse shard partials built by earlier runs
+    """
+    start_trace()
+    reports = analyze_shards(shard_numbers, processes, output_dir, use_cache)
+    print_trace_summary()
+    for name, report in reports.items():
+        print(f"{name}: {report['rows']} rows")
+    print(f"Shard and corpus reports saved to '{output_dir}'")
+
+
+def eda(plots=True, sample=None, seed=0, profile=None, profiler="cprofile", disk_cache=True,
+        replicates=BOOTSTRAP_REPLICATES):
+    """
+    Run the full EDA process.
+
+    Args:
+        plots: Render figures; when False only the JSON outputs are written
+            and matplotlib is never loaded
+        sample: Analyze a stratified sample of this many rows instead of the
+            whole dataset. The LLM context then carries a bootstrap interval
+            for every number; keep exact runs for final reports
+        seed: Random seed of the sample
+        replicates: Bootstrap resamples of the sample's intervals; each one
+            re-runs the LLM summary on a resample
+        profile: Stage names to profile, or ["all"]; see `tracing`
+        profiler: "cprofile" or "sampling"
+        disk_cache: Reuse analysis results stored by earlier runs; results
+            are always recomputed after the dataset or the code changes
+    """
     print("Starting Exploratory Data Analysis...")
+    # Every stage, analysis and step is recorded in plots/eda_trace.json
+    start_trace(profile, profiler)
+    # Fail before any data is loaded if the NLTK corpora are missing
+    load_resources()
+    os.makedirs("plots", exist_ok=True)
+
+    if plots:
+        # Figures are drawn in worker processes while the analyses run
+        start_render_pool()
+
+    raw_df, derived_df, combined_df, design = _load_registered(sample, seed, disk_cache)
+    if design is not None:
+        print(f"Sampled {design['sample_rows']} rows (requested {design['size']}) of "
+              f"{design['population_rows']} from {len(design['strata'])} strata")
+        if design["sample_rows"] > design["size"]:
+            print(f"Every stratum keeps at least {MIN_PER_STRATUM} rows, so the sample is "
+                  f"larger than requested")
+
+    stages = eda_stages(
+        plots,
+        score_in_process=cached_result(compute_sentiment, combined_df) is None,
+        sampling=design,
+        replicates=replicates,
+    )
+    run = run_stages(stages, {
+        "raw": raw_df,
+        "derived": derived_df,
+        "combined": combined_df,
+    })
+    with span("finish_rendering", category="stage"):
+        finish_rendering()
+    print_schedule_report(run["report"])
+    print_trace_summary()
+    with open("plots/eda_schedule.json", "w") as f:
+        json.dump(run["report"], f, indent=2)
+    write_trace("plots/eda_trace.json")
 
-    nltk.download("stopwords")
-    nltk.download("vader_lexicon")
-    nltk.download("punkt")
-
-    raw_df, derived_df, combined_df = load_data()
-
-    # Basic statistics
-    basic_stats(raw_df, "raw")
-    basic_stats(derived_df, "derived")
-    progress_bar(0, 8)  # Updated total steps from 7 to 8
-    # Analyze categorical features
-    analyze_categorical_features(combined_df, "combined")
-    progress_bar(1, 8)
-    # Analyze numerical features
-    analyze_numerical_features(combined_df, "combined")
-    progress_bar(2, 8)
-    # Analyze temporal patterns
-    analyze_temporal_patterns(combined_df, "combined")
-    progress_bar(3, 8)
-    # Analyze account behavior
-    analyze_account_behavior(combined_df, "combined")
-    progress_bar(4, 8)
-    # Analyze correlation matrix
-    correlation_matrix(combined_df, "combined")
-    progress_bar(5, 8)
-    # Analyze content
-    analyze_content(combined_df, "combined")
-    progress_bar(6, 8)
-    # Analyze sentiment
-    sentiment_analysis(combined_df, "combined")
-    # Analyze network structures
-    save_network_data(combined_df, "plots/network_data.json")
-    progress_bar(7, 8)
-
-    # Generate LLM-interpretable EDA context
-    print("\nGenerating LLM-interpretable EDA outputs...")
-    generate_llm_eda(combined_df)
-    progress_bar(8, 8)
-
-    print("EDA completed. Visualizations saved to 'plots' directory.")
+    if plots:
+        print("EDA completed. Visualizations saved to 'plots' directory.")
+    else:
+        print("EDA completed without visualizations.")
     print("LLM-interpretable EDA context saved to 'llm_eda_context.json'")
     print("LLM-interpretable insights saved to 'llm_eda_context_insights.json'")
+    print("Stage timings and critical path saved to 'plots/eda_schedule.json'")
+    print("Trace of every stage and step saved to 'plots/eda_trace.json'")
+    if profile:
+        print("Stage profiles saved to 'plots/profiles'")
     print("\nNote: Each EDA function now returns JSON-compatible results in addition")
     print("to generating visualizations, making it easier to use them with LLMs.")
 
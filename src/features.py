@@ -0,0 +1,89 @@
+"""
+Derived features of the trimmed dataset.
+
+`derive_features` builds the `*_derived.csv` columns from a `*_trimmed.csv`
+frame. It follows `notebooks/feature_extraction.ipynb`, which produced the
+shipped derived files, with the per-tweet regex calls replaced by pandas
+string methods and the dates parsed once by `dates.parse_publish_date`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .dates import MISSING_EPOCH, calendar_fields, epoch_to_datetime, parse_publish_date
+
+HASHTAG = r"#\w+"
+MENTION = r"@\w+"
+EMOJI = r"[^\x00-\x7F]+"
+SPECIAL_CHARACTER = r"[^a-zA-Z0-9\s]"
+LINK = r"https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+"
+QUOTE = r"[\"'].*[\"']"
+# Leading patterns after stripping whitespace, as in the notebook
+STARTS_WITH_MENTION = r"(?:@|RT @|MT @|'@)"
+STARTS_WITH_HASHTAG = r"'?#"
+
+DERIVED_COLUMNS = [
+    "followers_to_following_ratio",
+    "date",
+    "hour_of_day",
+    "day_of_week",
+    "day_of_month",
+    "hashtags",
+    "mentions",
+    "count_hashtags",
+    "count_mentions",
+    "count_emojis",
+    "count_special_characters",
+    "word_count",
+    "count_links",
+    "text_length",
+    "all_words_caps",
+    "has_quote",
+    "starts_with_mention",
+    "starts_with_hashtag",
+]
+
+
+def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the features of `*_derived.csv` from trimmed tweets.
+
+    Args:
+        df: DataFrame with the `*_trimmed.csv` columns
+
+    Returns:
+        DataFrame with DERIVED_COLUMNS, row-aligned with `df`
+    """
+    content = df["content"].fillna("").astype(str)
+    epoch = parse_publish_date(df["publish_date"])
+    missing = epoch == MISSING_EPOCH
+    fields = calendar_fields(epoch)
+    hashtags = content.str.findall(HASHTAG)
+    mentions = content.str.findall(MENTION)
+    stripped = content.str.lstrip()
+
+    def calendar(field):
+        # Missing dates stay missing instead of becoming -1
+        return pd.Series(fields[field], index=df.index, dtype="Int64").mask(missing)
+
+    derived = pd.DataFrame({
+        "followers_to_following_ratio": df["followers"].div(df["following"].replace(0, np.nan)),
+        "date": epoch_to_datetime(epoch),
+        "hour_of_day": calendar("hour_of_day"),
+        "day_of_week": calendar("day_of_week"),
+        "day_of_month": calendar("day_of_month"),
+        "hashtags": hashtags.str.join(", "),
+        "mentions": mentions.str.join(", "),
+        "count_hashtags": hashtags.str.len(),
+        "count_mentions": mentions.str.len(),
+        "count_emojis": content.str.count(EMOJI),
+        "count_special_characters": content.str.count(SPECIAL_CHARACTER),
+        "word_count": content.str.split().str.len(),
+        "count_links": content.str.count(LINK),
+        "text_length": content.str.len(),
+        "all_words_caps": [int(all(word.isupper() for word in text.split())) for text in content],
+        "has_quote": content.str.contains(QUOTE).astype(int),
+        "starts_with_mention": stripped.str.match(STARTS_WITH_MENTION).astype(int),
+        "starts_with_hashtag": stripped.str.match(STARTS_WITH_HASHTAG).astype(int),
+    }, index=df.index)
+    return derived[DERIVED_COLUMNS]
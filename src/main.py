@@ -1,7 +1,137 @@
 """Main entry point for the application."""
 
 import argparse
-from .eda import eda
+import os
+import subprocess
+import sys
+import time
+
+# Budget for `python -m src.main --help`, in milliseconds. Subcommands import
+# their dependencies when they run, so the CLI itself stays within it.
+STARTUP_BUDGET_MS = 200
+
+
+def run_eda(args):
+    from .eda import eda
+
+    profile = args.profile.split(",") if args.profile else None
+    eda(plots=not args.no_plots, sample=args.sample, seed=args.seed,
+        profile=profile, profiler=args.profiler, disk_cache=not args.no_cache,
+        replicates=args.replicates)
+
+
+def run_stats(args):
+    from .eda import stats
+
+    stats(disk_cache=not args.no_cache)
+
+
+def run_network(args):
+    from .eda import network
+
+    network(args.output, disk_cache=not args.no_cache)
+
+
+def run_sql(args):
+    from .eda import sql
+
+    sql(args.engine, args.db, args.rebuild, args.output)
+
+
+def run_serve(args):
+    from .eda import serve
+
+    serve(args.host, args.port, args.workers, disk_cache=not args.no_cache)
+
+
+def run_ingest(args):
+    from .eda import ingest
+
+    ingest(args.path, args.output_dir)
+
+
+def run_shards(args):
+    from .eda import shards
+
+    shard_numbers = [int(shard) for shard in args.shards.split(",")] if args.shards else None
+    shards(shard_numbers, args.processes, args.output_dir, use_cache=not args.no_cache)
+
+
+def run_train(args):
+    from .classifier import train_model
+
+    metrics = train_model(args.epochs, args.holdout, args.seed, args.model)
+    holdout = metrics["holdout"]
+    print(f"Trained on {metrics['training_rows']} rows in {metrics['training_seconds']:.1f}s; "
+          f"held-out accuracy {holdout['accuracy']:.3f}, macro F1 {holdout['macro_f1']:.3f}")
+    print(f"Scoring throughput: {metrics['throughput']['rows_per_second']:,.0f} rows/s")
+    print(f"Model saved to {args.model}; metrics saved to plots/classifier_metrics.json")
+
+
+def run_predict(args):
+    from .classifier import predict_file
+
+    rows = predict_file(args.path, args.output, args.model, args.chunk_rows)
+    print(f"Predictions for {rows} rows saved to {args.output}")
+
+
+def run_fetch_nltk(args):
+    from .eda.eda_resources import fetch_resources
+
+    fetch_resources(args.dir)
+
+
+def run_synth(args):
+    from .synthetic import write_dataset
+
+    write_dataset(args.rows, args.seed, args.dir, args.shard)
+
+
+def run_bench(args):
+    from .benchmark import (
+        compare_results,
+        load_results,
+        print_comparison,
+        run_benchmarks,
+        save_results,
+    )
+
+    only = args.only.split(",") if args.only else None
+    # Load the baseline first, as saving may overwrite it
+    baseline = load_results(args.compare, args.rows) if args.compare else None
+    report = run_benchmarks(args.rows, args.repeat, args.seed, only)
+    print(f"Results saved to {save_results(report)}")
+    if baseline is not None:
+        print_comparison(compare_results(baseline, report), args.compare)
+
+
+def run_startup_time(args):
+    """Time `--help` in fresh interpreters and compare the median with the budget"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "src.main", "--help"],
+            env=env, stdout=subprocess.DEVNULL, check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    median = sorted(timings)[len(timings) // 2]
+    print(f"`--help` startup: median {median:.0f} ms over {args.runs} runs "
+          f"(budget {args.budget} ms)")
+    if median > args.budget:
+        sys.exit(1)
+
+
+def _add_no_cache(parser):
+    """Add --no-cache to a subcommand that reuses results stored in data/processed/cache"""
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every analysis instead of reusing results stored by earlier runs",
+    )
+
 
 def main():
     """Main entry point for the application."""
@@ -11,11 +141,155 @@ def main():
 
     # EDA subcommand
     eda_parser = subparsers.add_parser("eda", help="Run exploratory data analysis")
-    eda_parser.set_defaults(func=eda)
+    eda_parser.add_argument(
+        "--no-plots",
+        action="store_true",
+        help="Write only the JSON outputs, without rendering any figures",
+    )
+    eda_parser.add_argument(
+        "--sample",
+        type=int,
+        metavar="ROWS",
+        help="Analyze a stratified sample of this many rows, with bootstrap intervals",
+    )
+    eda_parser.add_argument("--seed", type=int, default=0, help="Random seed of the sample")
+    eda_parser.add_argument(
+        "--replicates",
+        type=int,
+        default=200,
+        help="Bootstrap resamples of the --sample intervals; each re-runs the LLM summary",
+    )
+    eda_parser.add_argument(
+        "--profile",
+        metavar="STAGES",
+        help="Comma-separated stage names to profile, or 'all'; profiles go to plots/profiles",
+    )
+    eda_parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "sampling"],
+        default="cprofile",
+        help="Profiler used for --profile",
+    )
+    _add_no_cache(eda_parser)
+    eda_parser.set_defaults(func=run_eda)
+
+    # Quick subcommands that skip the plotting and NLP stacks
+    stats_parser = subparsers.add_parser("stats", help="Print basic dataset statistics")
+    _add_no_cache(stats_parser)
+    stats_parser.set_defaults(func=run_stats)
+
+    network_parser = subparsers.add_parser("network", help="Extract hashtag and mention networks")
+    network_parser.add_argument(
+        "--output", default="plots/network_data.json", help="Path of the network JSON file"
+    )
+    _add_no_cache(network_parser)
+    network_parser.set_defaults(func=run_network)
+
+    sql_parser = subparsers.add_parser(
+        "sql", help="Run aggregate analyses as SQL queries on an embedded database"
+    )
+    sql_parser.add_argument(
+        "--engine", choices=["sqlite", "duckdb"], help="Database engine (DuckDB when installed)"
+    )
+    sql_parser.add_argument("--db", help="Database file")
+    sql_parser.add_argument("--rebuild", action="store_true", help="Re-ingest the CSVs")
+    sql_parser.add_argument("--output", default="plots/sql_eda.json", help="Path of the JSON results")
+    sql_parser.set_defaults(func=run_sql)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep the dataset in memory and answer analysis queries over HTTP"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    serve_parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    serve_parser.add_argument(
+        "--workers", type=int, help="Worker processes for sentiment and the LLM summary"
+    )
+    _add_no_cache(serve_parser)
+    serve_parser.set_defaults(func=run_serve)
+
+    shards_parser = subparsers.add_parser(
+        "shards", help="Analyze shards in parallel and merge them into a corpus report"
+    )
+    shards_parser.add_argument("--shards", help="Comma-separated shard numbers (all by default)")
+    shards_parser.add_argument("--processes", type=int, help="Worker processes")
+    shards_parser.add_argument(
+        "--output-dir", default="plots/shards", help="Directory of the per-shard and corpus reports"
+    )
+    _add_no_cache(shards_parser)
+    shards_parser.set_defaults(func=run_shards)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="Append a batch of new tweets and update the aggregates incrementally"
+    )
+    ingest_parser.add_argument("path", help="CSV file with the columns of the trimmed shards")
+    ingest_parser.add_argument(
+        "--output-dir", default="plots/ingest", help="Directory of the batch and corpus reports"
+    )
+    ingest_parser.set_defaults(func=run_ingest)
+
+    train_parser = subparsers.add_parser(
+        "train", help="Train the account-category classifier and evaluate it on held-out rows"
+    )
+    train_parser.add_argument("--epochs", type=int, default=5, help="Passes over the training rows")
+    train_parser.add_argument("--holdout", type=float, default=0.2, help="Share of rows held out")
+    train_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    train_parser.add_argument(
+        "--model", default="data/processed/models/classifier.npz", help="Path of the saved model"
+    )
+    train_parser.set_defaults(func=run_train)
+
+    predict_parser = subparsers.add_parser(
+        "predict", help="Predict the account category of every tweet in a CSV"
+    )
+    predict_parser.add_argument("path", help="CSV with the trimmed (and optionally derived) columns")
+    predict_parser.add_argument("--output", default="plots/predictions.csv", help="Path of the predictions CSV")
+    predict_parser.add_argument(
+        "--model", default="data/processed/models/classifier.npz", help="Model saved by `train`"
+    )
+    predict_parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows scored at a time")
+    predict_parser.set_defaults(func=run_predict)
+
+    fetch_parser = subparsers.add_parser(
+        "fetch-nltk", help="Download the NLTK corpora used by the text analyses"
+    )
+    fetch_parser.add_argument(
+        "--dir", default="data/nltk_data", help="Directory to download the corpora into"
+    )
+    fetch_parser.set_defaults(func=run_fetch_nltk)
+
+    synth_parser = subparsers.add_parser(
+        "synth", help="Write a synthetic dataset with the trimmed/derived schema"
+    )
+    synth_parser.add_argument("--rows", type=int, default=100_000, help="Number of tweets")
+    synth_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    synth_parser.add_argument("--dir", default="data/raw", help="Directory to write the CSVs into")
+    synth_parser.add_argument("--shard", type=int, default=1, help="Shard number of the file names")
+    synth_parser.set_defaults(func=run_synth)
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Time and memory-profile every EDA stage on synthetic data"
+    )
+    bench_parser.add_argument("--rows", type=int, default=100_000, help="Rows of synthetic data")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    bench_parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    bench_parser.add_argument("--only", help="Comma-separated stage names to run")
+    bench_parser.add_argument(
+        "--compare", metavar="COMMIT", help="Compare with the saved results of a commit or file"
+    )
+    bench_parser.set_defaults(func=run_bench)
+
+    startup_parser = subparsers.add_parser(
+        "startup-time", help="Check CLI startup time against its budget"
+    )
+    startup_parser.add_argument("--runs", type=int, default=5, help="Number of timed runs")
+    startup_parser.add_argument(
+        "--budget", type=float, default=STARTUP_BUDGET_MS, help="Budget in milliseconds"
+    )
+    startup_parser.set_defaults(func=run_startup_time)
 
     args = parser.parse_args()
     if args.command:
-        args.func()
+        args.func(args)
     else:
         parser.print_help()
 
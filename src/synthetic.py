@@ -0,0 +1,327 @@
+"""
+Synthetic troll tweets for benchmarks.
+
+`generate_dataset` builds trimmed and derived frames with the schema of
+`1_trimmed.csv`/`1_derived.csv`. Accounts have a category, a Zipf-like share
+of the tweets and an activity window concentrated in 2015-2017. Hashtags,
+mentions and words follow Zipf distributions. A fraction of tweets belong
+to posting bursts that share a hashtag. The output depends only on the
+number of rows and the seed, and `write_dataset` streams it to CSV in chunks
+so 3M+ rows fit in memory.
+"""
+
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dates import calendar_fields
+from .features import derive_features
+from .utils import RAW_DIR
+
+# Rows generated and written per chunk
+CHUNK_ROWS = 250_000
+
+# account_category -> (share of tweets, retweet rate, account types)
+CATEGORIES = {
+    "NonEnglish": (0.28, 0.65, ["Russian", "German", "Ukranian", "Arabic", "Italian"]),
+    "RightTroll": (0.24, 0.40, ["Right"]),
+    "NewsFeed": (0.20, 0.05, ["local", "news"]),
+    "LeftTroll": (0.14, 0.45, ["Left", "left"]),
+    "HashtagGamer": (0.08, 0.30, ["Hashtager"]),
+    "Commercial": (0.04, 0.30, ["Commercial"]),
+    "Fearmonger": (0.005, 0.10, ["Koch", "?"]),
+    "Unknown": (0.005, 0.50, ["?"]),
+}
+
+# Language -> (share among English-category tweets, share among NonEnglish tweets)
+LANGUAGES = {
+    "English": (0.97, 0.08),
+    "Russian": (0.01, 0.72),
+    "German": (0.01, 0.10),
+    "Ukrainian": (0.0, 0.05),
+    "Arabic": (0.0, 0.03),
+    "Italian": (0.01, 0.02),
+}
+
+REGIONS = ["United States", "Unknown", "Russian Federation", "United Kingdom", "Germany", "Ukraine"]
+# Region shares for English and non-English tweets
+REGION_SHARES = {
+    "English": [0.86, 0.08, 0.02, 0.02, 0.01, 0.01],
+    "other": [0.10, 0.15, 0.55, 0.02, 0.10, 0.08],
+}
+
+# Activity windows: 2012-02 to 2018-05, mostly 2015-2017
+FIRST_TWEET = pd.Timestamp("2012-02-01").value // 10**9
+LAST_TWEET = pd.Timestamp("2018-05-31").value // 10**9
+BUSY_START = pd.Timestamp("2015-01-01").value // 10**9
+BUSY_END = pd.Timestamp("2017-12-31").value // 10**9
+
+# Posting activity by hour of day (UTC), peaking in US daytime
+HOURLY_PROFILE = np.array([
+    5, 5, 4, 3, 2, 2, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9, 8, 8, 7, 7, 6, 6, 5,
+], dtype=float)
+
+# Share of tweets posted in bursts, and tweets per burst
+BURST_SHARE = 0.05
+BURST_SIZE = 200
+
+# Accounts per tweet in the real data (2,848 handles, 2,973,371 tweets)
+ACCOUNTS_PER_ROW = 2_848 / 2_973_371
+MIN_ACCOUNTS = 100
+
+WORDS = (
+    "the to a of and in is for on you that it with this be at are we not have "
+    "trump hillary obama clinton america news police president new people world "
+    "great good bad love hate war black white vote election russia media fake "
+    "breaking today watch live best happy sad angry wrong right free win lose "
+    "god gun law death attack killed shooting protest city state school health "
+    "money tax job jobs border wall immigration islam terror crime family life "
+    "thanks thank please help stop never always everyone nothing why how"
+).split()
+CYRILLIC_WORDS = "россия новости путин украина москва сша война мир сегодня".split()
+EMOJIS = ["\U0001F602", "\U0001F44D", "\U0001F621", "\U0001F1FA\U0001F1F8", "❤️"]
+
+
+def _zipf_probabilities(n: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _vocabulary(rows: int) -> Dict[str, np.ndarray]:
+    """Word, hashtag and mention vocabularies, growing sublinearly with the rows (Heaps' law)"""
+    tail_words = int(20 * rows ** 0.5)
+    words = np.array(WORDS + [f"word{i}" for i in range(tail_words)], dtype=object)
+    hashtags = np.array([f"#tag{i}" for i in range(int(5 * rows ** 0.5) + 10)], dtype=object)
+    mentions = np.array([f"@user{i}" for i in range(int(10 * rows ** 0.5) + 10)], dtype=object)
+    return {"words": words, "hashtags": hashtags, "mentions": mentions}
+
+
+def generate_accounts(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Draw the accounts of a synthetic dataset.
+
+    Args:
+        rows: Number of tweets in the dataset
+        seed: Random seed
+
+    Returns:
+        DataFrame with one row per account: category, type, language,
+        tweet weight, activity window and follower/following/update bases
+    """
+    rng = np.random.default_rng([seed, 0])
+    count = max(MIN_ACCOUNTS, int(rows * ACCOUNTS_PER_ROW))
+    names = list(CATEGORIES)
+    shares = np.array([CATEGORIES[name][0] for name in names])
+    shares = shares / shares.sum()
+    # Heavy-tailed activity, normalized per category so tweet shares match CATEGORIES
+    category = rng.choice(len(names), size=count, p=shares)
+    category[:len(names)] = np.arange(len(names))
+    weight = rng.lognormal(0, 1.5, size=count)
+    totals = np.bincount(category, weights=weight, minlength=len(names))
+    weight = weight / totals[category] * shares[category]
+
+    account_type = np.array([rng.choice(CATEGORIES[names[c]][2]) for c in category], dtype=object)
+    languages = list(LANGUAGES)
+    english = np.array([LANGUAGES[name][0] for name in languages])
+    foreign = np.array([LANGUAGES[name][1] for name in languages])
+    is_foreign = np.array([names[c] == "NonEnglish" for c in category])
+    language = np.where(
+        is_foreign,
+        rng.choice(languages, size=count, p=foreign / foreign.sum()),
+        rng.choice(languages, size=count, p=english / english.sum()),
+    )
+
+    # Most accounts are active within the busy years
+    busy = rng.random(count) < 0.85
+    start = np.where(
+        busy,
+        rng.integers(BUSY_START, BUSY_END - 90 * 86_400, size=count),
+        rng.integers(FIRST_TWEET, LAST_TWEET - 90 * 86_400, size=count),
+    )
+    length = rng.integers(90 * 86_400, 900 * 86_400, size=count)
+    end = np.minimum(start + length, LAST_TWEET)
+
+    return pd.DataFrame({
+        "account_category": np.array(names, dtype=object)[category],
+        "account_type": account_type,
+        "language": language,
+        "weight": weight,
+        "retweet_rate": np.array([CATEGORIES[names[c]][1] for c in category]),
+        "start": start,
+        "end": end,
+        "followers": rng.lognormal(7, 1.8, size=count),
+        "following": rng.lognormal(6.5, 1.2, size=count),
+        "updates": rng.lognormal(8, 1.3, size=count),
+    })
+
+
+def _timestamps(rng, accounts, owner) -> np.ndarray:
+    """Tweet times within each account's window, following the hourly profile"""
+    start = accounts["start"].to_numpy()[owner]
+    end = accounts["end"].to_numpy()[owner]
+    days = (start // 86_400 + rng.random(len(owner)) * ((end - start) // 86_400)).astype(np.int64)
+    hours = rng.choice(24, size=len(owner), p=HOURLY_PROFILE / HOURLY_PROFILE.sum())
+    return days * 86_400 + hours * 3600 + rng.integers(0, 3600, size=len(owner))
+
+
+def _format_dates(epoch: np.ndarray) -> np.ndarray:
+    """Format epoch seconds as `M/D/YYYY H:MM`, like the source data"""
+    fields = calendar_fields(epoch)
+    minute = (epoch // 60) % 60
+    return np.array([
+        f"{month}/{day}/{year} {hour}:{minute:02d}"
+        for month, day, year, hour, minute in zip(
+            fields["month"], fields["day_of_month"], fields["year"], fields["hour_of_day"], minute
+        )
+    ], dtype=object)
+
+
+def _content(rng, vocabulary, language, retweet, burst_tags) -> list:
+    """Tweet texts with Zipf-distributed words, hashtags and mentions"""
+    n = len(language)
+    words = vocabulary["words"]
+    lengths = np.clip(rng.poisson(11, size=n), 1, 40)
+    tokens = words[rng.choice(len(words), size=lengths.sum(), p=_zipf_probabilities(len(words)))].tolist()
+    ends = np.cumsum(lengths)
+
+    hashtags = vocabulary["hashtags"]
+    hashtag_count = rng.choice(4, size=n, p=[0.55, 0.30, 0.10, 0.05])
+    drawn_tags = hashtags[rng.choice(len(hashtags), size=hashtag_count.sum(), p=_zipf_probabilities(len(hashtags)))]
+    tag_ends = np.cumsum(hashtag_count)
+
+    mentions = vocabulary["mentions"]
+    mention_count = rng.choice(3, size=n, p=[0.70, 0.25, 0.05])
+    drawn_mentions = mentions[rng.choice(len(mentions), size=mention_count.sum() + n, p=_zipf_probabilities(len(mentions)))]
+    mention_ends = np.cumsum(mention_count)
+
+    style = rng.random((n, 6))
+    texts = []
+    for i in range(n):
+        body = tokens[ends[i] - lengths[i]:ends[i]]
+        if language[i] == "Russian":
+            body = [CYRILLIC_WORDS[int(len(CYRILLIC_WORDS) * style[i, 0])]] + body[1:]
+        body = " ".join(body)
+        if style[i, 1] < 0.02:
+            body = body.upper()
+        elif style[i, 1] < 0.07:
+            body = f'"{body}"'
+        tags = list(drawn_tags[tag_ends[i] - hashtag_count[i]:tag_ends[i]])
+        if burst_tags[i]:
+            tags.append(burst_tags[i])
+        users = list(drawn_mentions[mention_ends[i] - mention_count[i]:mention_ends[i]])
+        parts = []
+        if retweet[i]:
+            parts.append(f"RT {drawn_mentions[-1 - i]}:")
+        elif users and style[i, 2] < 0.3:
+            parts.append(users.pop(0))
+        if tags and style[i, 3] < 0.1:
+            parts.append(tags.pop(0))
+        parts.append(body)
+        parts.extend(users)
+        parts.extend(tags)
+        if style[i, 4] < 0.35:
+            parts.append(f"https://t.co/{int(style[i, 4] * 1e12):x}")
+        if style[i, 5] < 0.04:
+            parts.append(EMOJIS[int(style[i, 5] * 1000) % len(EMOJIS)])
+        texts.append(" ".join(parts))
+    return texts
+
+
+def _generate_chunk(rows: int, seed: int, chunk: int, accounts: pd.DataFrame, vocabulary) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, chunk + 1])
+    owner = rng.choice(len(accounts), size=rows, p=accounts["weight"].to_numpy())
+    epoch = _timestamps(rng, accounts, owner)
+
+    # Bursts: many accounts of a category posting one hashtag within an hour
+    burst_tags = np.full(rows, None, dtype=object)
+    bursts = max(1, int(rows * BURST_SHARE / BURST_SIZE))
+    burst_rows = rng.choice(rows, size=min(rows, bursts * BURST_SIZE), replace=False)
+    burst_id = rng.integers(0, bursts, size=len(burst_rows))
+    burst_time = rng.integers(BUSY_START, BUSY_END, size=bursts)
+    epoch[burst_rows] = burst_time[burst_id] + rng.integers(0, 3600, size=len(burst_rows))
+    burst_tags[burst_rows] = [f"#burst{chunk}_{b}" for b in burst_id]
+
+    start = accounts["start"].to_numpy()[owner]
+    end = accounts["end"].to_numpy()[owner]
+    progress = np.clip((epoch - start) / np.maximum(end - start, 1), 0, 1)
+    growth = 0.2 + 0.8 * progress
+    retweet = (rng.random(rows) < accounts["retweet_rate"].to_numpy()[owner]).astype(np.int64)
+    language = accounts["language"].to_numpy()[owner]
+    region_choice = {
+        key: rng.choice(len(REGIONS), size=rows, p=shares) for key, shares in REGION_SHARES.items()
+    }
+    region = np.array(REGIONS, dtype=object)[
+        np.where(language == "English", region_choice["English"], region_choice["other"])
+    ]
+
+    return pd.DataFrame({
+        "content": _content(rng, vocabulary, language, retweet, burst_tags),
+        "region": region,
+        "language": language,
+        "publish_date": _format_dates(epoch),
+        "following": np.round(accounts["following"].to_numpy()[owner] * growth).astype(np.int64),
+        "followers": np.round(accounts["followers"].to_numpy()[owner] * growth).astype(np.int64),
+        "updates": np.round(accounts["updates"].to_numpy()[owner] * growth).astype(np.int64),
+        "account_type": accounts["account_type"].to_numpy()[owner],
+        "retweet": retweet,
+        "account_category": accounts["account_category"].to_numpy()[owner],
+    })
+
+
+def generate_chunks(rows: int, seed: int = 0):
+    """
+    Generate a synthetic dataset chunk by chunk.
+
+    Args:
+        rows: Number of tweets
+        seed: Random seed
+
+    Yields:
+        Tuples of (trimmed frame, derived frame) of up to CHUNK_ROWS rows
+    """
+    accounts = generate_accounts(rows, seed)
+    vocabulary = _vocabulary(rows)
+    for chunk, offset in enumerate(range(0, rows, CHUNK_ROWS)):
+        trimmed = _generate_chunk(min(CHUNK_ROWS, rows - offset), seed, chunk, accounts, vocabulary)
+        trimmed.index = pd.RangeIndex(offset, offset + len(trimmed))
+        yield trimmed, derive_features(trimmed)
+
+
+def generate_dataset(rows: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate a synthetic dataset in memory.
+
+    Args:
+        rows: Number of tweets
+        seed: Random seed
+
+    Returns:
+        Tuple of (trimmed frame, derived frame)
+    """
+    chunks = list(generate_chunks(rows, seed))
+    return pd.concat([t for t, _ in chunks]), pd.concat([d for _, d in chunks])
+
+
+def write_dataset(rows: int, seed: int = 0, raw_dir: str = RAW_DIR, shard: int = 1) -> list:
+    """
+    Write a synthetic dataset as a trimmed and a derived CSV shard.
+
+    Args:
+        rows: Number of tweets
+        seed: Random seed
+        raw_dir: Directory to write into
+        shard: Shard number of the file names
+
+    Returns:
+        Paths of the trimmed and derived CSVs
+    """
+    os.makedirs(raw_dir, exist_ok=True)
+    paths = [os.path.join(raw_dir, f"{shard}_trimmed.csv"), os.path.join(raw_dir, f"{shard}_derived.csv")]
+    for chunk, frames in enumerate(generate_chunks(rows, seed)):
+        for path, frame in zip(paths, frames):
+            frame.to_csv(path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False)
+        print(f"Wrote {min((chunk + 1) * CHUNK_ROWS, rows)} of {rows} rows", end="\r")
+    print()
+    return paths
@@ -0,0 +1,282 @@
+"""
+Tracing and profiling of runs.
+
+`span` records the wall time, the CPU time of its thread, the resident
+memory and the rows processed of a block of work. Spans nest: scheduler
+stages, analyses run through the result cache, and steps inside them such
+as cleaning and scoring in the sentiment analysis. `write_trace` saves the
+spans in the Chrome trace format (chrome://tracing or ui.perfetto.dev).
+
+Stages named in `start_trace(profile=...)` are also profiled, one file per
+stage in PROFILE_DIR: a cProfile `.prof` file, or collapsed stacks
+(`.folded`, for flame graph tools) from a sampling profiler that reads the
+stage's thread stack every SAMPLE_INTERVAL seconds.
+
+Tracing is off until `start_trace`, and spans are then no-ops.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_DIR = "plots/profiles"
+PROFILERS = ("cprofile", "sampling")
+
+# Seconds between stack samples of the sampling profiler
+SAMPLE_INTERVAL = 0.005
+
+_TRACE = {"enabled": False, "events": [], "profile": (), "profiler": "cprofile", "origin": 0}
+_LOCK = threading.Lock()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process, or the peak where unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def start_trace(profile: Optional[Iterable[str]] = None, profiler: str = "cprofile") -> None:
+    """
+    Start recording spans, discarding earlier ones.
+
+    Args:
+        profile: Stage names to profile, or ["all"]
+        profiler: "cprofile" or "sampling"
+
+    Raises:
+        ValueError: If the profiler is unknown
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler {profiler!r}; expected one of {PROFILERS}")
+    with _LOCK:
+        _TRACE.update({
+            "enabled": True,
+            "events": [],
+            "profile": tuple(profile or ()),
+            "profiler": profiler,
+            "origin": time.perf_counter_ns(),
+        })
+
+
+def stop_trace() -> None:
+    """Stop recording spans"""
+    _TRACE["enabled"] = False
+
+
+def tracing() -> bool:
+    """Whether spans are being recorded"""
+    return _TRACE["enabled"]
+
+
+class _Sampler:
+    """Counts the stacks of one thread, sampled from a background thread"""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self, path: str) -> None:
+        self._stop.set()
+        self._thread.join()
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _start_profiler(name: str):
+    if _TRACE["profiler"] == "sampling":
+        return _Sampler(threading.get_ident())
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Only one cProfile can be active at a time on Python 3.12+
+        print(f"Could not profile {name}: another profiler is active")
+        return None
+    return profile
+
+
+def _stop_profiler(profiler, name: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if isinstance(profiler, _Sampler):
+        profiler.stop(os.path.join(PROFILE_DIR, f"{name}.folded"))
+    else:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+
+
+@contextmanager
+def span(name: str, rows: Optional[int] = None, category: str = "step", **args):
+    """
+    Record a block of work in the trace.
+
+    Args:
+        name: Span name
+        rows: Rows the block processes
+        category: "stage", "analysis", "step" or "render"
+        **args: Further JSON-compatible values stored with the span
+    """
+    if not _TRACE["enabled"]:
+        yield
+        return
+
+    profile = _TRACE["profile"]
+    profiler = None
+    if category == "stage" and ("all" in profile or name in profile):
+        profiler = _start_profiler(name)
+    start, cpu, rss = time.perf_counter_ns(), time.thread_time_ns(), rss_bytes()
+    try:
+        yield
+    finally:
+        end, cpu_end = time.perf_counter_ns(), time.thread_time_ns()
+        if profiler is not None:
+            _stop_profiler(profiler, name)
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": end - start,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "args": {
+                "cpu_ms": (cpu_end - cpu) / 1e6,
+                "rss_start_mb": rss / 2**20,
+                "rss_end_mb": rss_bytes() / 2**20,
+                "peak_rss_mb": peak_rss_bytes() / 2**20,
+                "rows": rows,
+                **args,
+            },
+        }
+        with _LOCK:
+            _TRACE["events"].append(event)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, category: str = "stage", **args) -> None:
+    """Record a span timed elsewhere, such as a stage run in another process"""
+    if not _TRACE["enabled"]:
+        return
+    event = {
+        "name": name, "cat": category, "ph": "X", "ts": start_ns, "dur": end_ns - start_ns,
+        "pid": os.getpid(), "tid": threading.get_ident(), "thread": threading.current_thread().name,
+        "args": args,
+    }
+    with _LOCK:
+        _TRACE["events"].append(event)
+
+
+def collect_events() -> List[Dict[str, Any]]:
+    """Return and clear the recorded spans, e.g. to send them from a worker process"""
+    with _LOCK:
+        events, _TRACE["events"] = _TRACE["events"], []
+    return events
+
+
+def add_events(events: Iterable[Dict[str, Any]]) -> None:
+    """Add spans recorded by a worker process; its clock is the same monotonic clock"""
+    if _TRACE["enabled"]:
+        with _LOCK:
+            _TRACE["events"].extend(events)
+
+
+def trace_summary() -> List[Dict[str, Any]]:
+    """Spans aggregated by category and name, slowest first"""
+    totals = {}
+    with _LOCK:
+        events = list(_TRACE["events"])
+    for event in events:
+        key = (event["cat"], event["name"])
+        total = totals.setdefault(key, {
+            "category": event["cat"], "name": event["name"], "count": 0,
+            "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows": 0, "peak_rss_mb": 0.0,
+        })
+        args = event["args"]
+        total["count"] += 1
+        total["wall_seconds"] += event["dur"] / 1e9
+        total["cpu_seconds"] += args.get("cpu_ms", 0.0) / 1e3
+        total["rows"] += args.get("rows") or 0
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], args.get("peak_rss_mb", 0.0))
+    return sorted(totals.values(), key=lambda total: total["wall_seconds"], reverse=True)
+
+
+def write_trace(path: str) -> None:
+    """
+    Write the recorded spans as a Chrome trace.
+
+    Args:
+        path: Output JSON path
+    """
+    origin = _TRACE["origin"]
+    with _LOCK:
+        events = list(_TRACE["events"])
+    trace_events = []
+    threads = {}
+    for event in events:
+        threads[(event["pid"], event["tid"])] = event["thread"]
+        trace_events.append({
+            **{key: value for key, value in event.items() if key != "thread"},
+            "ts": (event["ts"] - origin) / 1e3,
+            "dur": event["dur"] / 1e3,
+        })
+    trace_events += [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for (pid, tid), name in threads.items()
+    ]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {"summary": trace_summary()},
+        }, f)
+
+
+def print_trace_summary(top: int = 15) -> None:
+    """Print the slowest analyses and steps of the trace"""
+    rows = [total for total in trace_summary() if total["category"] != "stage"][:top]
+    if not rows:
+        return
+    print("\n=== Slowest analyses and steps ===")
+    for total in rows:
+        print(f"{total['name']:<32} {total['category']:<9} x{total['count']:<4} "
+              f"{total['wall_seconds']:8.2f}s wall {total['cpu_seconds']:8.2f}s cpu "
+              f"{total['peak_rss_mb']:8.0f} MB peak RSS")
@@ -1,32 +1,211 @@
 """Utility functions for the project"""
 
+import hashlib
+import json
+import os
+import pickle
+
 import pandas as pd
 
+from .dates import parse_publish_date
+from .tracing import span
+
+RAW_DIR = "data/raw"
+CACHE_DIR = "data/processed/cache"
+
+# Shards 2 to 5 are added here once they are available in data/raw
+SHARDS = [1]
+
+# Shards appended by `ingest`, numbered from INGEST_SHARD_START so they never
+# collide with the configured ones
+INGEST_MANIFEST = f"{RAW_DIR}/ingested.json"
+INGEST_SHARD_START = 100
+
+# Columns `combine_frames` adds for the analyses; they are not part of the
+# dataset and are left out of its reported statistics
+INTERNAL_COLUMNS = ("publish_epoch",)
+
+# Bump when the layout of cache files changes, to invalidate old caches
+CACHE_VERSION = 2
+
+# Package whose source is part of every cache entry
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_CODE = {}
+
+
+def code_fingerprint():
+    """
+    Hex digest of every Python source file of the package.
+
+    Cached objects are built by code across modules, so any source change
+    invalidates every cache entry rather than only those of the edited class.
+    """
+    if "fingerprint" not in _CODE:
+        digest = hashlib.sha1()
+        for root, dirs, files in os.walk(PACKAGE_DIR):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith(".py"):
+                    path = os.path.join(root, file)
+                    digest.update(os.path.relpath(path, PACKAGE_DIR).encode())
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+        _CODE["fingerprint"] = digest.hexdigest()
+    return _CODE["fingerprint"]
+
+
+def _source_signature(paths):
+    """Size and modification time of every source file"""
+    return {path: [os.path.getsize(path), os.path.getmtime(path)] for path in paths}
+
+
+def source_fingerprint(sources):
+    """Hex digest identifying the current contents of the source files"""
+    signature = {"version": CACHE_VERSION, "sources": _source_signature(sources)}
+    return hashlib.sha1(json.dumps(signature, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_header(sources):
+    """What a cache entry must have been built from to be reused"""
+    return {"version": CACHE_VERSION, "code": code_fingerprint(), "sources": _source_signature(sources)}
+
+
+def read_cache(name, sources):
+    """
+    Read an object from the dataset cache.
+
+    The entry's header is checked before its data is unpickled, so objects
+    of classes that changed since are never loaded.
+
+    Args:
+        name: Cache entry name, optionally with a subdirectory
+        sources: Files the entry was built from
+
+    Returns:
+        The cached object, or None if it is missing, unreadable, or any
+        source or the code changed
+    """
+    path = os.path.join(CACHE_DIR, f"{name}.pkl")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            if pickle.load(f) != _cache_header(sources):
+                return None
+            return pickle.load(f)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Written by an older layout, or by another process's interrupted run
+        return None
+
 
-def load_data():
-    """Load both the trimmed and derived datasets"""
-    # fetch 1 to 5 from data/raw
-    trimmed_df1 = pd.read_csv("data/raw/1_trimmed.csv")
-    # trimmed_df2 = pd.read_csv("data/raw/2_trimmed.csv")
-    # trimmed_df3 = pd.read_csv("data/raw/3_trimmed.csv")
-    # trimmed_df4 = pd.read_csv("data/raw/4_trimmed.csv")
-    # trimmed_df5 = pd.read_csv("data/raw/5_trimmed.csv")
-
-    derived_df1 = pd.read_csv("data/raw/1_derived.csv")
-    # derived_df2 = pd.read_csv("data/raw/2_derived.csv")
-    # derived_df3 = pd.read_csv("data/raw/3_derived.csv")
-    # derived_df4 = pd.read_csv("data/raw/4_derived.csv")
-    # derived_df5 = pd.read_csv("data/raw/5_derived.csv")
-
-    combined_raw_df = pd.concat(
-        [trimmed_df1], axis=0
-    )
-    combined_derived_df = pd.concat(
-        [derived_df1], axis=0
-    )
-    combined_df = pd.concat([combined_raw_df, combined_derived_df], axis=1)
+def write_cache(name, data, sources):
+    """
+    Write an object to the dataset cache.
+
+    The entry is written to a temporary file and renamed into place, so an
+    interrupted run never leaves a truncated entry.
+
+    Args:
+        name: Cache entry name, optionally with a subdirectory
+        data: Object to cache
+        sources: Files the object was built from
+    """
+    path = os.path.join(CACHE_DIR, f"{name}.pkl")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            pickle.dump(_cache_header(sources), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def ingested_shards():
+    """Shards appended by `ingest`, in the order they were appended"""
+    if not os.path.exists(INGEST_MANIFEST):
+        return []
+    with open(INGEST_MANIFEST) as f:
+        return json.load(f)["shards"]
+
+
+def dataset_shards():
+    """Every shard of the dataset: SHARDS, then the ingested shards"""
+    return SHARDS + ingested_shards()
+
+
+def shard_paths(shards=None):
+    """Trimmed and derived CSV paths for the given shards"""
+    shards = dataset_shards() if shards is None else shards
+    return [
+        path
+        for shard in shards
+        for path in (f"{RAW_DIR}/{shard}_trimmed.csv", f"{RAW_DIR}/{shard}_derived.csv")
+    ]
+
+
+def combine_frames(raw_df, derived_df):
+    """
+    Combine row-aligned trimmed and derived frames into one dataset frame.
+
+    Returns:
+        Dictionary with the "combined" frame and the "raw_columns" and
+        "derived_columns" lists
+    """
+    combined_df = pd.concat([raw_df, derived_df], axis=1)
 
     # Handle duplicated columns (if any)
     combined_df = combined_df.loc[:, ~combined_df.columns.duplicated()]
 
+    # Parse publish_date once; analyses derive calendar fields from the epoch
+    combined_df["publish_epoch"] = parse_publish_date(combined_df["publish_date"])
+
+    return {
+        "combined": combined_df,
+        "raw_columns": list(raw_df.columns),
+        "derived_columns": list(derived_df.columns),
+    }
+
+
+def dataset_columns(df):
+    """Columns of a frame without the INTERNAL_COLUMNS"""
+    return [col for col in df.columns if col not in INTERNAL_COLUMNS]
+
+
+def _read_combined(shards):
+    """Read and combine the trimmed and derived CSVs of the given shards"""
+    trimmed = [pd.read_csv(f"{RAW_DIR}/{shard}_trimmed.csv") for shard in shards]
+    derived = [pd.read_csv(f"{RAW_DIR}/{shard}_derived.csv") for shard in shards]
+    return combine_frames(pd.concat(trimmed, axis=0), pd.concat(derived, axis=0))
+
+
+def load_data(use_cache=True, shards=None):
+    """
+    Load both the trimmed and derived datasets
+
+    The combined frame, including the parsed `publish_epoch` column, is kept
+    in the dataset cache and reused until the source CSVs change.
+
+    Args:
+        use_cache: Read and write the dataset cache
+        shards: Shard numbers to load; all of `dataset_shards()` by default
+    """
+    sources = shard_paths(shards)
+    name = "dataset" if shards is None else "dataset_" + "_".join(str(shard) for shard in shards)
+    with span("read_dataset_cache"):
+        dataset = read_cache(name, sources) if use_cache else None
+    if dataset is None:
+        with span("read_csv_shards"):
+            dataset = _read_combined(dataset_shards() if shards is None else shards)
+        if use_cache:
+            with span("write_dataset_cache", rows=len(dataset["combined"])):
+                write_cache(name, dataset, sources)
+
+    combined_df = dataset["combined"]
+    combined_raw_df = combined_df[dataset["raw_columns"]]
+    combined_derived_df = combined_df[dataset["derived_columns"]]
+
     return combined_raw_df, combined_derived_df, combined_df
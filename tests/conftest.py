@@ -0,0 +1,12 @@
+import pytest
+
+from src.synthetic import write_dataset
+from src.utils import RAW_DIR
+
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    """Working directory whose data/raw holds a small synthetic shard 1"""
+    monkeypatch.chdir(tmp_path)
+    write_dataset(3000, 0, RAW_DIR)
+    return tmp_path
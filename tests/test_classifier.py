@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import classifier
+from src.classifier import HASH_BITS, _hash_word_chunk, _hash_words, _slice_rows, _take_rows
+
+TEXTS = [
+    "Hello world",
+    "",
+    "   \t\n ",
+    "  leading and trailing  ",
+    "nul\x00inside\x00\x00tweet",
+    None,
+    "#MAGA @user http://t.co/x",
+    "HELLO again",
+    "ПРИВЕТ привет",
+    "",
+]
+
+
+def _words(text):
+    if not isinstance(text, str):
+        return []
+    return text.replace("\x00", " ").lower().split()
+
+
+def _bucket(word):
+    buckets, rows = _hash_word_chunk([word], HASH_BITS)
+    assert rows.tolist() == [0]
+    return int(buckets[0])
+
+
+@pytest.mark.parametrize("chunk_rows", [3, 10_000])
+def test_words_land_in_their_rows(monkeypatch, chunk_rows):
+    monkeypatch.setattr(classifier, "_WORD_CHUNK_ROWS", chunk_rows)
+    buckets, rows = _hash_words(pd.Series(TEXTS, dtype=object), HASH_BITS)
+
+    expected = [(row, word) for row, text in enumerate(TEXTS) for word in _words(text)]
+    assert rows.tolist() == [row for row, _ in expected]
+    assert buckets.tolist() == [_bucket(word) for _, word in expected]
+
+
+def test_hashes_ignore_case_and_context():
+    assert _bucket("Hello") == _bucket("hello")
+    assert _bucket("ПРИВЕТ") == _bucket("привет")
+    assert _bucket("hello") != _bucket("world")
+    buckets, rows = _hash_word_chunk(["a hello", "hello"], HASH_BITS)
+    assert buckets[1] == buckets[2] == _bucket("hello")
+    assert rows.tolist() == [0, 0, 1]
+
+
+def test_no_words():
+    for texts in ([], [""], ["", " ", None]):
+        buckets, rows = _hash_words(pd.Series(texts, dtype=object), HASH_BITS)
+        assert len(buckets) == len(rows) == 0
+
+
+@pytest.fixture
+def encoded():
+    rng = np.random.default_rng(0)
+    lengths = np.array([2, 0, 3, 1, 0, 0, 4, 1])
+    return {
+        "dense": rng.random((len(lengths), 3)).astype(np.float32),
+        "fields": rng.integers(0, 100, (len(lengths), 2)),
+        "norm": rng.random(len(lengths)),
+        "indptr": np.concatenate(([0], np.cumsum(lengths))),
+        "buckets": rng.integers(0, 1 << HASH_BITS, lengths.sum()),
+    }
+
+
+def _rows(encoded):
+    """Per-row view of an encoded batch, for comparisons"""
+    indptr = encoded["indptr"]
+    return [
+        (encoded["dense"][i].tolist(), encoded["fields"][i].tolist(), encoded["norm"][i],
+         encoded["buckets"][indptr[i]:indptr[i + 1]].tolist())
+        for i in range(len(indptr) - 1)
+    ]
+
+
+def test_take_rows_round_trips(encoded):
+    order = np.random.default_rng(1).permutation(len(encoded["norm"]))
+    taken = _take_rows(encoded, order)
+    assert _rows(taken) == [_rows(encoded)[i] for i in order]
+    back = _take_rows(taken, np.argsort(order))
+    for key, values in encoded.items():
+        np.testing.assert_array_equal(back[key], values)
+
+
+@pytest.mark.parametrize("start, stop", [(0, 8), (1, 2), (2, 7), (4, 6), (3, 3)])
+def test_slice_rows_matches_take_rows(encoded, start, stop):
+    order = np.random.default_rng(2).permutation(len(encoded["norm"]))
+    taken = _take_rows(encoded, order)
+    assert _rows(_slice_rows(taken, start, stop)) == _rows(_take_rows(encoded, order[start:stop]))
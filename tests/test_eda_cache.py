@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import utils
+from src.eda import eda_cache
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_CODE", {})
+    monkeypatch.setitem(eda_cache._DISK, "pruned", False)
+    eda_cache.clear_result_cache()
+    eda_cache.use_disk_cache()
+    yield tmp_path
+    eda_cache.use_disk_cache(False)
+    eda_cache.clear_result_cache()
+
+
+def _counting_analysis(calls):
+    def count_rows(df):
+        calls.append(len(df))
+        return {"rows": len(df)}
+    return count_rows
+
+
+def test_disk_results_are_reused_until_the_code_changes(disk_cache, monkeypatch):
+    df = pd.DataFrame({"value": [1, 2, 3]})
+    calls = []
+    analysis = _counting_analysis(calls)
+
+    assert eda_cache.run_analysis(analysis, df) == {"rows": 3}
+    eda_cache.clear_result_cache()
+    assert eda_cache.run_analysis(analysis, df) == {"rows": 3}
+    assert len(calls) == 1
+
+    monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+    eda_cache.clear_result_cache()
+    eda_cache.run_analysis(analysis, df)
+    assert len(calls) == 2
+
+
+def test_disabled_disk_cache_writes_nothing(disk_cache):
+    eda_cache.use_disk_cache(False)
+    eda_cache.run_analysis(_counting_analysis([]), pd.DataFrame({"value": [1]}))
+    assert os.listdir(disk_cache) == []
+
+
+def test_other_code_versions_are_pruned(disk_cache, monkeypatch):
+    df = pd.DataFrame({"value": [1, 2, 3]})
+    analysis = _counting_analysis([])
+    (disk_cache / "result_count_rows_0123.pkl").write_bytes(b"stored before versioning")
+
+    eda_cache.run_analysis(analysis, df)
+    results = disk_cache / eda_cache.RESULTS_DIR
+    first = os.listdir(results)
+    assert len(first) == 1
+    assert not (disk_cache / "result_count_rows_0123.pkl").exists()
+
+    # A later run of edited code
+    monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+    monkeypatch.setitem(eda_cache._DISK, "pruned", False)
+    eda_cache.clear_result_cache()
+    eda_cache.run_analysis(analysis, df)
+    second = os.listdir(results)
+    assert len(second) == 1 and second != first
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.eda.eda_groupby import AGGREGATIONS, GroupIndex
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "region": ["a", "b", "a", None, "c", "b"],
+        "account_category": ["x", "x", "y", "y", "x", None],
+        "value": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+    })
+
+
+@pytest.mark.parametrize("by", ["region", ["region", "account_category"]])
+def test_aggregate_matches_groupby(frame, by):
+    index = GroupIndex.from_frame(frame, by)
+    result = index.aggregate(frame, ["value"], AGGREGATIONS)
+    expected = frame.groupby(by)["value"].agg(["count", "sum", "mean", "std", "min", "max", "median"])
+    for agg in AGGREGATIONS:
+        np.testing.assert_allclose(result[("value", agg)].to_numpy(dtype=float),
+                                   expected[agg].to_numpy(dtype=float), equal_nan=True)
+
+
+@pytest.mark.parametrize("keys", [[], [None, None]])
+def test_aggregate_without_groups(keys):
+    frame = pd.DataFrame({"region": pd.Series(keys, dtype=object), "value": [1.0] * len(keys)})
+    result = GroupIndex.from_frame(frame, "region").aggregate(frame, ["value"], AGGREGATIONS)
+    assert len(result) == 0
+    assert list(result.columns) == [("value", agg) for agg in AGGREGATIONS]
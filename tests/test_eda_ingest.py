@@ -0,0 +1,137 @@
+import os
+
+import pytest
+
+from src.eda.eda_basic import compute_categorical_features, compute_temporal_patterns
+from src import utils
+from src.eda import eda_ingest, eda_resources
+from src.eda.eda_ingest import AGGREGATES, corpus_aggregates, ingest_batch
+from src.eda.eda_network import analyze_networks
+from src.eda.eda_nlp import compute_content, compute_sentiment
+from src.eda.eda_partials import PARTIALS, partial_report
+from src.eda.eda_resources import missing_resources
+from src.synthetic import generate_dataset
+from src.utils import CACHE_DIR, INGEST_MANIFEST, RAW_DIR, dataset_shards, load_data
+
+# Sections whose merged partials are exact
+EXACT_SECTIONS = {
+    "categorical": lambda df: compute_categorical_features(df)[0],
+    "temporal": lambda df: compute_temporal_patterns(df)[0],
+    "content": lambda df: compute_content(df)[0],
+    "network": analyze_networks,
+}
+
+
+@pytest.fixture
+def batch_paths(dataset_dir):
+    paths = []
+    for seed in (1, 2):
+        trimmed, _ = generate_dataset(500, seed)
+        path = os.path.join(dataset_dir, f"batch_{seed}.csv")
+        trimmed.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def batches(batch_paths):
+    if missing_resources():
+        pytest.skip("NLTK corpora missing; run `python -m src.main fetch-nltk`")
+    return batch_paths
+
+
+def assert_nothing_ingested():
+    assert dataset_shards() == [1]
+    assert not os.path.exists(INGEST_MANIFEST)
+    assert not os.path.exists(os.path.join(RAW_DIR, "100_trimmed.csv"))
+    assert not os.path.exists(os.path.join(RAW_DIR, "100_derived.csv"))
+
+
+def test_exact_sections_without_nltk(batch_paths):
+    for path in batch_paths:
+        reports = ingest_batch(path, partials=PARTIALS)
+    assert dataset_shards() == [1, 100, 101]
+
+    combined = load_data(use_cache=False)[2]
+    corpus = reports["corpus"]
+    assert corpus["rows"] == len(combined) == 3000 + 2 * 500
+    assert "sentiment" not in corpus
+    for section, compute in EXACT_SECTIONS.items():
+        assert corpus[section] == compute(combined)
+
+
+def test_ingest_two_batches_matches_the_whole_corpus(batches):
+    for path in batches:
+        reports = ingest_batch(path)
+    assert dataset_shards() == [1, 100, 101]
+
+    combined = load_data(use_cache=False)[2]
+    corpus = reports["corpus"]
+    assert corpus["rows"] == len(combined) == 3000 + 2 * 500
+    assert reports["shard_101"]["rows"] == 500
+    for section, compute in EXACT_SECTIONS.items():
+        assert corpus[section] == compute(combined)
+
+    expected = compute_sentiment(combined)[0]
+    sentiment = corpus["sentiment"]
+    for key in ("mean", "std", "positive_ratio", "neutral_ratio", "negative_ratio"):
+        assert sentiment["sentiment_distribution"][key] == pytest.approx(
+            expected["sentiment_distribution"][key], rel=1e-9, abs=1e-12
+        )
+    assert sentiment["sentiment_by_category"] == pytest.approx(expected["sentiment_by_category"])
+
+
+def test_incremental_aggregates_match_a_rebuild(batches):
+    for path in batches:
+        ingest_batch(path)
+    incremental = partial_report(corpus_aggregates(dataset_shards()))
+
+    os.remove(os.path.join(CACHE_DIR, f"{AGGREGATES}.pkl"))
+    rebuilt = partial_report(corpus_aggregates(dataset_shards()))
+    assert rebuilt["rows"] == incremental["rows"]
+    for section in EXACT_SECTIONS:
+        assert rebuilt[section] == incremental[section]
+    assert rebuilt["sentiment"]["sentiment_distribution"]["mean"] == pytest.approx(
+        incremental["sentiment"]["sentiment_distribution"]["mean"]
+    )
+
+
+def test_missing_lexicon_fails_before_writing(batch_paths, monkeypatch):
+    monkeypatch.setattr(eda_resources, "missing_resources", lambda names=None: ["vader_lexicon"])
+    with pytest.raises(RuntimeError, match="vader_lexicon"):
+        ingest_batch(batch_paths[0])
+    assert_nothing_ingested()
+
+
+def test_failed_write_rolls_back_the_shard(batch_paths, monkeypatch):
+    write = eda_ingest.write_cache
+
+    def fail(name, data, sources):
+        # The aggregates of the earlier shards are stored, the new shard's are not
+        if any(source.startswith(f"{RAW_DIR}/100_") for source in sources):
+            raise OSError("disk full")
+        write(name, data, sources)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(eda_ingest, "write_cache", fail)
+        with pytest.raises(OSError, match="disk full"):
+            ingest_batch(batch_paths[0], partials=PARTIALS)
+    assert_nothing_ingested()
+    assert os.path.exists(os.path.join(CACHE_DIR, f"{AGGREGATES}_{'_'.join(PARTIALS)}.pkl"))
+
+    reports = ingest_batch(batch_paths[0], partials=PARTIALS)
+    assert dataset_shards() == [1, 100]
+    assert reports["shard_100"]["rows"] == 500
+
+
+def test_aggregates_are_rebuilt_after_code_changes(batch_paths, monkeypatch, capsys):
+    monkeypatch.setattr(utils, "_CODE", {})
+    ingest_batch(batch_paths[0], partials=PARTIALS)
+    capsys.readouterr()
+
+    corpus_aggregates(dataset_shards(), PARTIALS)
+    assert "Rebuilding" not in capsys.readouterr().out
+    monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+    rebuilt = corpus_aggregates(dataset_shards(), PARTIALS)
+    assert "Rebuilding the aggregates of 2 shards" in capsys.readouterr().out
+    assert partial_report(rebuilt)["rows"] == 3000 + 500
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from src import utils
+from src.eda import eda_partials
+from src.eda.eda_basic import (
+    compute_account_behavior,
+    compute_cardinality,
+    compute_categorical_features,
+    compute_numerical_features,
+    compute_temporal_patterns,
+)
+from src.eda.eda_network import analyze_networks
+from src.eda.eda_nlp import compute_content, compute_correlation_matrix
+from src.eda.eda_partials import build_partials, merge_partials, partial_report
+from src.utils import load_data
+
+# Sketch quantiles are checked by rank: QuantileSketch(k=200) has a
+# normalized rank error of about 1.7 / 200
+RANK_ERROR = 0.03
+
+# HyperLogLog relative error, a few standard errors at the default precision
+DISTINCT_ERROR = 0.05
+
+
+@pytest.fixture
+def combined(dataset_dir):
+    return load_data(use_cache=False)[2]
+
+
+@pytest.fixture
+def merged_report(combined):
+    bounds = [0, 700, 1800, len(combined)]
+    parts = [
+        build_partials(combined.iloc[start:end], seed=i)
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+    return partial_report(merge_partials(parts))
+
+
+def assert_rank(values, value, q):
+    """`value` is a q-quantile of `values` within RANK_ERROR"""
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    assert (values < value).mean() <= q + RANK_ERROR
+    assert (values <= value).mean() >= q - RANK_ERROR
+
+
+def test_merged_rows(combined, merged_report):
+    assert merged_report["rows"] == len(combined)
+
+
+@pytest.mark.parametrize("section, compute", [
+    ("categorical", lambda df: compute_categorical_features(df)[0]),
+    ("temporal", lambda df: compute_temporal_patterns(df)[0]),
+    ("content", lambda df: compute_content(df)[0]),
+    ("network", analyze_networks),
+])
+def test_exact_sections_match_the_whole_frame(combined, merged_report, section, compute):
+    assert merged_report[section] == compute(combined)
+
+
+def test_correlations_match_the_whole_frame(combined, merged_report):
+    expected = compute_correlation_matrix(combined)[0]["correlation_matrix"]
+    merged = merged_report["correlation"]["correlation_matrix"]
+    assert merged.keys() == expected.keys()
+    for row, values in expected.items():
+        assert merged[row] == pytest.approx(values, rel=1e-9, abs=1e-12, nan_ok=True)
+
+
+def test_distinct_counts_within_sketch_error(combined, merged_report):
+    expected = compute_cardinality(combined, exact=True)[0]
+    merged = merged_report["cardinality"]
+    assert merged["approximate"]
+    for column, count in expected["distinct_counts"].items():
+        assert merged["distinct_counts"][column] == pytest.approx(count, rel=DISTINCT_ERROR)
+    assert merged["distinct_hashtags_by_category_month"].keys() == (
+        expected["distinct_hashtags_by_category_month"].keys()
+    )
+
+
+def test_numerical_quantiles_within_sketch_error(combined, merged_report):
+    expected = compute_numerical_features(combined)[0]["numerical_features"]
+    merged = merged_report["numerical"]["numerical_features"]
+    assert merged.keys() == expected.keys()
+    for feature, stats in merged.items():
+        exact = expected[feature]
+        assert stats["count"] == exact["count"]
+        assert stats["min"] == exact["min"]
+        assert stats["max"] == exact["max"]
+        assert stats["mean"] == pytest.approx(exact["mean"], rel=1e-9)
+        assert stats["std"] == pytest.approx(exact["std"], rel=1e-9)
+
+        values = combined[feature].to_numpy(dtype="float64", na_value=np.nan)
+        for q, key in ((0.25, "25%"), (0.5, "median"), (0.75, "75%")):
+            assert_rank(values, stats[key], q)
+        outliers = stats["outliers"]
+        beyond = (values < outliers["lower_bound"]) | (values > outliers["upper_bound"])
+        assert abs(outliers["count"] - beyond.sum()) <= 2 * RANK_ERROR * len(values)
+
+
+def test_account_behavior_within_sketch_error(combined, merged_report):
+    expected = compute_account_behavior(combined)[0]
+    merged = merged_report["account_behavior"]
+    assert merged["retweet_behavior"] == pytest.approx(expected["retweet_behavior"])
+    for key in ("highest_retweet_category", "lowest_retweet_category", "follower_stats_level"):
+        assert merged[key] == expected[key]
+
+    assert merged["follower_following_stats"].keys() == expected["follower_following_stats"].keys()
+    for category, stats in merged["follower_following_stats"].items():
+        group = combined[combined["account_category"] == category]
+        assert_rank(group["followers"], stats["median_followers"], 0.5)
+        assert_rank(group["following"], stats["median_following"], 0.5)
+
+
+def test_shard_partials_are_rebuilt_after_code_changes(dataset_dir, monkeypatch):
+    calls = []
+    build = eda_partials.build_partials
+    monkeypatch.setattr(eda_partials, "build_partials", lambda df, seed: calls.append(seed) or build(df, seed))
+    monkeypatch.setattr(utils, "_CODE", {})
+
+    eda_partials.shard_partials(1)
+    eda_partials.shard_partials(1)
+    assert calls == [1]
+    monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+    eda_partials.shard_partials(1)
+    eda_partials.shard_partials(1, use_cache=False)
+    assert calls == [1, 1, 1]
+
+
+def test_hashtags_by_category_month_ignore_the_frame_index(combined):
+    expected = compute_cardinality(combined)[0]["distinct_hashtags_by_category_month"]
+    duplicated = combined.set_axis(np.zeros(len(combined), dtype=int))
+    assert compute_cardinality(duplicated)[0]["distinct_hashtags_by_category_month"] == expected
+    merged = partial_report(build_partials(duplicated, seed=0))["cardinality"]
+    assert merged["distinct_hashtags_by_category_month"] == (
+        partial_report(build_partials(combined, seed=0))["cardinality"]["distinct_hashtags_by_category_month"]
+    )
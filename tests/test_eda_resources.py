@@ -0,0 +1,17 @@
+import pytest
+
+from src.eda.eda_resources import load_resources, missing_resources, sentiment_analyzer
+
+pytestmark = pytest.mark.skipif(
+    bool(missing_resources()), reason="NLTK corpora missing; run `python -m src.main fetch-nltk`"
+)
+
+
+def test_sentiment_analyzer_matches_nltk():
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    load_resources()
+    sentence = "The rally was GREAT, but the coverage was not good at all :("
+    scores = sentiment_analyzer().polarity_scores(sentence)
+    assert scores == SentimentIntensityAnalyzer().polarity_scores(sentence)
+    assert scores["compound"] != 0
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src.eda.eda_accounts import build_account_profiles, load_account_profiles
+from src.eda.eda_rollup import load_rollup
+from src.utils import load_data
+
+
+@pytest.fixture
+def scored(dataset_dir):
+    combined = load_data(use_cache=False)[2]
+    scores = np.random.default_rng(0).uniform(-1, 1, len(combined))
+    return combined, scores
+
+
+def test_rollup_sentiment_is_added_and_cached(scored):
+    combined, scores = scored
+    cube = load_rollup(combined)
+    assert "sentiment_sum" not in cube.measures
+
+    load_rollup(combined, sentiment=scores)
+    assert cube.measures["sentiment_count"].sum() == cube.measures["count"].sum()
+    reloaded = load_rollup(load_data(use_cache=False)[2])
+    assert reloaded is not cube
+    assert reloaded.measures["sentiment_sum"].sum() == pytest.approx(cube.measures["sentiment_sum"].sum())
+
+
+def test_profile_sentiment_matches_a_scored_build(scored):
+    combined, scores = scored
+    assert "median_sentiment" not in load_account_profiles(combined).columns
+
+    profiles = load_account_profiles(combined, sentiment=scores)
+    expected = build_account_profiles(combined, scores)
+    np.testing.assert_array_equal(profiles["median_sentiment"], expected["median_sentiment"])
+    assert "median_sentiment" in load_account_profiles(load_data(use_cache=False)[2]).columns
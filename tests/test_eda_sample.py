@@ -0,0 +1,53 @@
+from src import utils
+from src.eda import eda_cache
+from src.eda.eda_sample import MIN_PER_STRATUM, bootstrap_intervals, load_sample
+
+
+def test_sample_design_records_requested_and_drawn_sizes(dataset_dir):
+    _, _, combined, design = load_sample(100, seed=0)
+    assert design["size"] == 100
+    assert design["sample_rows"] == len(combined)
+    # Every stratum keeps its minimum, which can exceed the proportional share
+    assert len(combined) >= min(design["population_rows"], 100)
+    for stratum in design["strata"].values():
+        assert stratum["sample"] >= min(stratum["population"], MIN_PER_STRATUM)
+
+
+def test_bootstrap_intervals_cover_the_estimate(dataset_dir):
+    _, _, combined, _ = load_sample(1000, seed=0)
+
+    def mean_followers(df):
+        return {"followers": float(df["followers"].mean())}
+
+    result = bootstrap_intervals(mean_followers, combined, replicates=50)
+    assert result["replicates"] == 50
+    low, high = result["intervals"]["/followers"]
+    assert low <= mean_followers(combined)["followers"] <= high
+
+
+def test_bootstrap_intervals_follow_the_result_cache(dataset_dir, monkeypatch):
+    _, _, combined, _ = load_sample(200, seed=0)
+    calls = []
+
+    def row_count(df):
+        calls.append(len(df))
+        return {"rows": len(df)}
+
+    monkeypatch.setattr(utils, "_CODE", {})
+    monkeypatch.setitem(eda_cache._DISK, "pruned", False)
+    eda_cache.use_disk_cache(False)
+    bootstrap_intervals(row_count, combined, replicates=5)
+    bootstrap_intervals(row_count, combined, replicates=5)
+    assert len(calls) == 10
+
+    eda_cache.use_disk_cache()
+    try:
+        bootstrap_intervals(row_count, combined, replicates=5)
+        bootstrap_intervals(row_count, combined, replicates=5)
+        assert len(calls) == 15
+        # Intervals stored by other code are not reused
+        monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+        bootstrap_intervals(row_count, combined, replicates=5)
+        assert len(calls) == 20
+    finally:
+        eda_cache.use_disk_cache(False)
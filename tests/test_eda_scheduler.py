@@ -0,0 +1,24 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.eda.eda_scheduler import SharedColumns
+
+
+@pytest.mark.parametrize("texts", [
+    ["Привет мир", None, "", "#tag 🙂", "plain"],
+    ["with\0nul", "other", None, "", "last"],
+    [],
+])
+def test_text_columns_round_trip(texts):
+    df = pd.DataFrame({"content": pd.Series(texts, dtype=object), "retweet": np.arange(len(texts))})
+    shared = SharedColumns(df)
+    try:
+        frame = pickle.loads(pickle.dumps(shared)).frame()
+        assert frame["content"].isna().tolist() == [text is None for text in texts]
+        assert frame["content"].dropna().tolist() == [text for text in texts if text is not None]
+        assert frame["retweet"].tolist() == list(range(len(texts)))
+    finally:
+        shared.close()
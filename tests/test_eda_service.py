@@ -0,0 +1,16 @@
+from src.eda import eda_cache
+from src.eda.eda_service import FILTERED_FRAMES, load_service_dataset, run_query
+from src.utils import load_data
+
+
+def test_filtered_results_are_freed_with_their_frames(dataset_dir):
+    eda_cache.clear_result_cache()
+    _, _, combined = load_data(use_cache=False)
+    load_service_dataset(combined)
+    run_query("categorical", {})
+    baseline = len(eda_cache._RESULTS)
+
+    for day in range(1, 4 * FILTERED_FRAMES):
+        response = run_query("categorical", {"start": "2015-01-01", "end": f"2016-01-{day:02d}"})
+        assert 0 < response["rows"] < len(combined)
+    assert len(eda_cache._RESULTS) == baseline
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import utils
+from src.dates import MISSING_EPOCH
+from src.eda.eda_basic import compute_basic_stats
+from src.eda.eda_llm import dataset_overview
+from src.utils import INTERNAL_COLUMNS, combine_frames
+
+
+def _frames():
+    raw = pd.DataFrame({
+        "content": ["a", "b", "c"],
+        "publish_date": ["1/2/2017 10:00", None, "not a date"],
+    })
+    derived = pd.DataFrame({"followers": [1, 2, 3]})
+    return raw, derived
+
+
+def test_combine_frames_parses_missing_dates_as_sentinel():
+    combined = combine_frames(*_frames())["combined"]
+    assert "publish_epoch" in combined.columns
+    assert (combined["publish_epoch"].iloc[1:] == MISSING_EPOCH).all()
+    assert combined["publish_epoch"].iloc[0] != MISSING_EPOCH
+
+
+def test_internal_columns_are_not_reported():
+    combined = combine_frames(*_frames())["combined"]
+    result, _ = compute_basic_stats(combined)
+    overview = dataset_overview(combined)
+    for column in INTERNAL_COLUMNS:
+        assert column not in result["descriptive_stats"]
+        assert column not in result["missing_values"]
+        assert column not in overview["numerical_columns"]
+    assert result["shape"]["columns"] == 3
+    assert result["missing_values"]["publish_date"] == 1
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_CODE", {})
+    source = tmp_path / "source.csv"
+    source.write_text("a\n1\n")
+    return tmp_path, [str(source)]
+
+
+def test_cache_round_trips_atomically(cache_dir):
+    directory, sources = cache_dir
+    utils.write_cache("nested/entry", {"value": 1}, sources)
+    assert utils.read_cache("nested/entry", sources) == {"value": 1}
+    assert os.listdir(directory / "nested") == ["entry.pkl"]
+
+
+def test_cache_is_invalidated_by_code_changes(cache_dir, monkeypatch):
+    _, sources = cache_dir
+    utils.write_cache("entry", {"value": 1}, sources)
+    monkeypatch.setitem(utils._CODE, "fingerprint", "edited")
+    assert utils.read_cache("entry", sources) is None
+
+
+def test_truncated_cache_entry_is_a_miss(cache_dir):
+    directory, sources = cache_dir
+    utils.write_cache("entry", list(range(1000)), sources)
+    path = directory / "entry.pkl"
+    path.write_bytes(path.read_bytes()[:-100])
+    assert utils.read_cache("entry", sources) is None
+
+
+def test_code_fingerprint_is_stable():
+    assert utils.code_fingerprint() == utils.code_fingerprint()